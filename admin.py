@@ -1,11 +1,19 @@
 from flask import Blueprint, render_template, request, jsonify, abort, current_app
 from flask_login import login_required, current_user
-from models import db, User, Server, BuildType, BuildVersion, Plugin, Mod
+from datetime import datetime, timedelta
+from models import db, User, Server, BuildType, BuildVersion, Plugin, Mod, ServerStartup, StartupComponent
+from sqlalchemy import func
 from mc_server import (
+    collect_servers_status,
+    cpu_topology,
+    get_fleet_run,
+    get_memory_capacity,
+    get_server_paths,
     get_server_status,
-    start_server,
-    stop_server,
-    restart_server,
+    status_query,
+    submit_fleet_boot,
+    submit_fleet_shutdown,
+    submit_lifecycle_job,
     total_cores,
     JAVA_EXECUTABLE,
 )
@@ -13,7 +21,8 @@ import subprocess
 import sys
 import os
 import re
-from server_creator import SERVICE_LEVELS, create_server_from_payload
+from jvm_profiles import PROFILE_AUTO, PROFILES
+from server_creator import SERVICE_LEVELS, create_server_from_payload, write_start_scripts
 
 try:
     import psutil
@@ -23,10 +32,15 @@ except ImportError:
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 def _build_cpu_affinity_summary(servers):
-    cores = [{'index': index, 'servers': []} for index in range(total_cores or 0)]
+    cores = [
+        {'index': cpu, 'node': cpu_topology.cpu_node.get(cpu, 0), 'servers': []}
+        for cpu in cpu_topology.cpus
+    ]
+    positions = {core['index']: position for position, core in enumerate(cores)}
+    statuses = collect_servers_status(servers)
 
     for server in servers:
-        status = get_server_status(server.id)
+        status = statuses.get(server.id, {})
         assigned_cores = status.get('assigned_cores') or []
 
         if not assigned_cores and psutil and status.get('status') == 'running' and status.get('pid'):
@@ -38,8 +52,8 @@ def _build_cpu_affinity_summary(servers):
                 assigned_cores = []
 
         for core in assigned_cores:
-            if isinstance(core, int) and 0 <= core < len(cores):
-                cores[core]['servers'].append(server.name)
+            if core in positions:
+                cores[positions[core]]['servers'].append(server.name)
 
     used_count = sum(1 for core in cores if core['servers'])
     return {
@@ -50,6 +64,16 @@ def _build_cpu_affinity_summary(servers):
     }
 
 
+def _build_memory_capacity_summary(servers):
+    capacity = get_memory_capacity()
+    names = {server.id: server.name for server in servers}
+    capacity['servers'] = [
+        {'id': server_id, 'name': names.get(server_id, f'#{server_id}'), **info}
+        for server_id, info in sorted(capacity['servers'].items(), key=lambda item: -item[1]['committed_mb'])
+    ]
+    return capacity
+
+
 def _get_java_runtime_info():
     try:
         result = subprocess.run(
@@ -109,7 +133,7 @@ def index():
 @login_required
 @admin_required
 def servers():
-    servers = Server.query.order_by(Server.id.asc()).all()
+    servers = status_query().order_by(Server.id.asc()).all()
     users = User.query.order_by(User.username.asc()).all()
     build_types = BuildType.query.order_by(BuildType.name.asc()).all()
     build_versions = BuildVersion.query.join(BuildType).order_by(
@@ -118,6 +142,7 @@ def servers():
         BuildVersion.build_number.desc()
     ).all()
     cpu_summary = _build_cpu_affinity_summary(servers)
+    memory_summary = _build_memory_capacity_summary(servers)
     return render_template(
         'admin/servers.html',
         servers=servers,
@@ -125,11 +150,112 @@ def servers():
         build_types=build_types,
         build_versions=build_versions,
         service_levels=SERVICE_LEVELS,
+        jvm_profiles=PROFILES,
         cpu_summary=cpu_summary,
+        memory_summary=memory_summary,
         java_info=_get_java_runtime_info()
     )
 
 
+@admin_bp.route('/capacity')
+@login_required
+@admin_required
+def capacity():
+    # Přidělená paměť serverů vs. fyzická RAM a tlak na paměť hostitele
+    return jsonify(_build_memory_capacity_summary(Server.query.all()))
+
+
+def _int_list(values):
+    if values is None:
+        return None
+    if not isinstance(values, list):
+        values = [values]
+    return [int(value) for value in values]
+
+
+@admin_bp.route('/fleet/<action>', methods=['POST'])
+@login_required
+@admin_required
+def fleet_action(action):
+    if action not in ('boot', 'shutdown'):
+        return jsonify({'success': False, 'error': 'Unknown action'}), 400
+    data = request.get_json(silent=True) or {}
+    try:
+        server_ids = _int_list(data.get('server_ids'))
+        levels = _int_list(data.get('levels'))
+        if action == 'boot':
+            limit = data.get('concurrency')
+            run, created = submit_fleet_boot(server_ids, levels, int(limit) if limit else None)
+        else:
+            limit = data.get('budget_seconds')
+            run, created = submit_fleet_shutdown(server_ids, levels, float(limit) if limit else None)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Neplatné parametry.'}), 400
+    # Běží-li už jiná hromadná operace, vrací se ta
+    return jsonify({'success': created, 'run': run}), 202 if created else 409
+
+
+@admin_bp.route('/fleet', defaults={'run_id': None})
+@admin_bp.route('/fleet/<run_id>')
+@login_required
+@admin_required
+def fleet_run(run_id):
+    run = get_fleet_run(run_id)
+    if run is None:
+        return jsonify({'success': False, 'error': 'Hromadná operace nenalezena'}), 404
+    return jsonify({'success': True, 'run': run})
+
+
+@admin_bp.route('/startups/slowest')
+@login_required
+@admin_required
+def slowest_startups():
+    # Nejpomalejší pluginy/mody při startu napříč všemi servery (průměr přes starty v okně)
+    days = min(max(request.args.get('days', 30, type=int), 1), 365)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    kind = request.args.get('kind')
+    since = datetime.utcnow() - timedelta(days=days)
+
+    average = func.avg(StartupComponent.seconds)
+    components = db.session.query(
+        StartupComponent.kind,
+        StartupComponent.name,
+        average,
+        func.max(StartupComponent.seconds),
+        func.count(StartupComponent.id),
+        func.count(func.distinct(ServerStartup.server_id)),
+    ).join(ServerStartup).filter(ServerStartup.started_at >= since)
+    if kind in ('plugin', 'mod'):
+        components = components.filter(StartupComponent.kind == kind)
+    components = components.group_by(StartupComponent.kind, StartupComponent.name) \
+        .order_by(average.desc()).limit(limit).all()
+
+    servers = db.session.query(
+        Server.id, Server.name, func.avg(ServerStartup.total_seconds), func.count(ServerStartup.id)
+    ).join(ServerStartup, ServerStartup.server_id == Server.id) \
+        .filter(ServerStartup.started_at >= since) \
+        .group_by(Server.id, Server.name) \
+        .order_by(func.avg(ServerStartup.total_seconds).desc()).limit(limit).all()
+
+    return jsonify({
+        'days': days,
+        'components': [{
+            'kind': row[0],
+            'name': row[1],
+            'avg_seconds': round(row[2], 2),
+            'max_seconds': round(row[3], 2),
+            'startups': row[4],
+            'servers': row[5],
+        } for row in components],
+        'servers': [{
+            'id': row[0],
+            'name': row[1],
+            'avg_total_seconds': round(row[2], 2),
+            'startups': row[3],
+        } for row in servers],
+    })
+
+
 @admin_bp.route('/server/create', methods=['POST'])
 @login_required
 @admin_required
@@ -153,15 +279,31 @@ def create_server():
 @admin_required
 def server_action(server_id):
     action = request.json.get('action')
-    if action == 'start':
-        success = start_server(server_id)
-    elif action == 'stop':
-        success = stop_server(server_id)
-    elif action == 'restart':
-        success = restart_server(server_id)
-    else:
+    if action not in ('start', 'stop', 'restart'):
         return jsonify({'success': False, 'error': 'Unknown action'})
-    return jsonify({'success': success})
+    # Operace běží na pozadí, průběh je vidět ve stavu serveru (state)
+    job, created = submit_lifecycle_job(server_id, action)
+    return jsonify({'success': created, 'job': job.to_dict()})
+
+@admin_bp.route('/server/<int:server_id>/jvm-profile', methods=['POST'])
+@login_required
+@admin_required
+def server_jvm_profile(server_id):
+    server = Server.query.get_or_404(server_id)
+    profile = ((request.get_json() or {}).get('profile') or PROFILE_AUTO).strip().lower()
+    if profile not in PROFILES:
+        return jsonify({'success': False, 'error': 'Neplatný profil JVM.'}), 400
+
+    server.jvm_profile = None if profile == PROFILE_AUTO else profile
+    db.session.commit()
+    # Startovací skripty na disku musí odpovídat tomu, co spouští web
+    paths = get_server_paths(server_id)
+    build_type = server.build_version.build_type.name if server.build_version else "Vanilla"
+    try:
+        write_start_scripts(paths['server_path'], server.id, build_type, server.service_level, server.jvm_profile)
+    except OSError as e:
+        current_app.logger.warning('Startovací skripty serveru %s nelze přepsat: %s', server_id, e)
+    return jsonify({'success': True, 'profile': profile, 'message': 'Profil se projeví při příštím startu.'})
 
 @admin_bp.route('/server/<int:server_id>/status')
 @login_required
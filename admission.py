@@ -0,0 +1,156 @@
+# admission.py
+import threading
+import time
+
+import psutil
+
+from cgroups import parse_pressure
+
+
+MEMORY_PRESSURE_PATH = "/proc/pressure/memory"
+MB = 1024 * 1024
+
+
+class AdmissionController:
+    """
+    Kontrola paměti hostitele před startem serveru.
+
+    Každý běžící server má přidělenou (committed) paměť podle tarifu – haldu JVM i s režií.
+    Start se povolí jen pokud:
+      1. součet přidělené paměti nepřekročí `overcommit_percent` % fyzické RAM minus rezervu,
+      2. hostitel má skutečně volno na celý server i rezervu (servery, které ještě startují,
+         se odečítají zvlášť – jejich halda se teprve mapuje),
+      3. hostitel není pod paměťovým tlakem (PSI some avg10 nad `max_pressure` %).
+    Jinak start čeká ve frontě (wait) nebo je odmítnut s důvodem.
+    """
+
+    def __init__(self, reserve_mb=2048, overcommit_percent=100, max_pressure=10,
+                 pressure_path=MEMORY_PRESSURE_PATH):
+        self.reserve_mb = reserve_mb
+        self.overcommit_percent = overcommit_percent
+        self.max_pressure = max_pressure
+        self.pressure_path = pressure_path
+        self._committed = {}              # {server_id: MB}
+        self._pending = set()             # přijaté servery, které ještě nenahlásily připravenost
+        self._lock = threading.Lock()
+
+    # --- stav hostitele ----------------------------------------------------
+
+    @staticmethod
+    def host_memory():
+        memory = psutil.virtual_memory()
+        return {"total_mb": memory.total // MB, "available_mb": memory.available // MB}
+
+    def pressure(self):
+        """Tlak na paměť hostitele (PSI), nebo None bez /proc/pressure (Windows, starší jádra)."""
+        try:
+            with open(self.pressure_path, "r", encoding="ascii") as pressure_file:
+                return parse_pressure(pressure_file.read())
+        except (OSError, ValueError):
+            return None
+
+    def capacity_mb(self, total_mb):
+        """Kolik paměti lze celkem přidělit serverům"""
+        return max(total_mb * self.overcommit_percent // 100 - self.reserve_mb, 0)
+
+    # --- přijetí serveru ---------------------------------------------------
+
+    def _refusal(self, server_id, required_mb):
+        """Důvod odmítnutí startu, nebo None; volá se se zámkem."""
+        memory = self.host_memory()
+        capacity = self.capacity_mb(memory["total_mb"])
+        committed = sum(mb for other_id, mb in self._committed.items() if other_id != server_id)
+        if committed + required_mb > capacity:
+            return (
+                f"Nedostatek paměti: server potřebuje {required_mb} MB, běžícím serverům je přiděleno "
+                f"{committed} MB z {capacity} MB kapacity hostitele"
+            )
+
+        starting = sum(
+            self._committed[other_id] for other_id in self._pending
+            if other_id != server_id and other_id in self._committed
+        )
+        available = memory["available_mb"] - starting
+        if available - required_mb < self.reserve_mb:
+            return (
+                f"Na hostiteli je volných jen {max(available, 0)} MB, server potřebuje {required_mb} MB "
+                f"a rezerva systému je {self.reserve_mb} MB"
+            )
+
+        if self.max_pressure:
+            avg10 = ((self.pressure() or {}).get("some") or {}).get("avg10")
+            if avg10 is not None and avg10 > self.max_pressure:
+                return f"Hostitel je pod paměťovým tlakem (PSI some avg10 {avg10:.1f} %, limit {self.max_pressure} %)"
+        return None
+
+    def check(self, server_id, required_mb):
+        """Důvod, proč by se server teď nespustil, nebo None (nic nepřiděluje)."""
+        with self._lock:
+            return self._refusal(server_id, required_mb)
+
+    def admit(self, server_id, required_mb):
+        """Ověří a rovnou přidělí paměť serveru; vrací (True, None) nebo (False, důvod)."""
+        with self._lock:
+            reason = self._refusal(server_id, required_mb)
+            if reason:
+                return False, reason
+            self._committed[server_id] = required_mb
+            self._pending.add(server_id)
+            return True, None
+
+    def wait(self, server_id, required_mb, timeout, interval=5, on_wait=None):
+        """
+        Čeká ve frontě, dokud by server prošel kontrolou; vrací None, nebo důvod po timeoutu.
+
+        on_wait(důvod) se zavolá při prvním čekání (např. pro zobrazení v jobu).
+        """
+        deadline = time.monotonic() + max(timeout, 0)
+        reason = self.check(server_id, required_mb)
+        if reason and on_wait is not None:
+            on_wait(reason)
+        while reason and time.monotonic() < deadline:
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            reason = self.check(server_id, required_mb)
+        return reason
+
+    def commit(self, server_id, required_mb):
+        """Přidělí paměť bez kontroly – převzaté servery, které už běží."""
+        with self._lock:
+            self._committed[server_id] = required_mb
+
+    def settle(self, server_id):
+        """Server dostartoval – jeho halda už je ve využití hostitele."""
+        with self._lock:
+            self._pending.discard(server_id)
+
+    def release(self, server_id):
+        with self._lock:
+            self._committed.pop(server_id, None)
+            self._pending.discard(server_id)
+
+    # --- přehled -----------------------------------------------------------
+
+    def summary(self):
+        """Přidělená paměť vs. fyzická kapacita hostitele (pro administraci)."""
+        memory = self.host_memory()
+        with self._lock:
+            committed = dict(self._committed)
+            pending = set(self._pending)
+        capacity = self.capacity_mb(memory["total_mb"])
+        committed_mb = sum(committed.values())
+        return {
+            "physical_mb": memory["total_mb"],
+            "available_mb": memory["available_mb"],
+            "reserve_mb": self.reserve_mb,
+            "overcommit_percent": self.overcommit_percent,
+            "capacity_mb": capacity,
+            "committed_mb": committed_mb,
+            "free_mb": max(capacity - committed_mb, 0),
+            "committed_percent": round(committed_mb / capacity * 100, 1) if capacity else None,
+            "pressure": self.pressure(),
+            "max_pressure": self.max_pressure,
+            "servers": {
+                server_id: {"committed_mb": mb, "starting": server_id in pending}
+                for server_id, mb in committed.items()
+            },
+        }
@@ -8,7 +8,7 @@ from flask_migrate import Migrate
 from admin import admin_bp
 from app_config import DATABASE_URI, SECRET_KEY
 from auth import auth_blueprint
-from mc_server import server_api
+from mc_server import init_server_runtime, server_api
 from models import db, PlayerServerAccess, Server, User
 from player_view import player_api
 from routes_mods import mods_api
@@ -146,4 +146,8 @@ if __name__ == '__main__':
     if not os.path.exists('db.sqlite3'):
         with app.app_context():
             db.create_all()
+    # Převzetí běžících serverů a vlákna na pozadí jen ve webovém procesu, ne při importu
+    # (CLI skripty) – s reloaderem až v potomkovi, který obsluhuje požadavky (produkčně viz serve.py)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_server_runtime(app)
     app.run(debug=True)
@@ -0,0 +1,313 @@
+# app_cds.py
+"""
+AppCDS archivy pro rychlejší start serverů.
+
+Pro každý build se jednou provede tréninkový běh s -XX:ArchiveClassesAtExit a vzniklý
+archiv (app_cds.jsa) se uloží vedle buildu v BASE_BUILD_PATH. start_server ho pak předá
+JVM přes -XX:SharedArchiveFile, pokud odpovídá jar serveru, verze Javy i parametry JVM.
+Trénink běží se stejným příkazem jako produkční start (java_command: halda, GC profil),
+a to pro nejčastější tarif a profil serverů s daným buildem.
+
+Použití:
+    python app_cds.py                  # buildy použité nějakým serverem, které archiv nemají
+    python app_cds.py --all            # všechny stažené buildy
+    python app_cds.py --build 12 --force
+"""
+import argparse
+import functools
+from collections import Counter
+import hashlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+
+from app_config import APP_CDS_TRAINING_TIMEOUT, BASE_BUILD_PATH
+from jvm_profiles import java_command, jvm_flags
+from lifecycle import parse_ready_line
+
+
+ARCHIVE_NAME = "app_cds.jsa"
+META_NAME = "app_cds.json"
+# JVM ověřuje cestu jaru proti tréninku – server se s archivem spouští přes hardlink s tímto názvem
+CDS_JAR_NAME = "server_cds.jar"
+
+
+class CdsError(Exception):
+    """Tréninkový běh pro AppCDS selhal."""
+
+
+@functools.lru_cache(maxsize=8)
+def java_version(java_executable):
+    """Celý výstup `java -version` – archiv platí jen pro přesně stejné sestavení JVM."""
+    try:
+        result = subprocess.run(
+            [java_executable, "-version"], capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return (result.stderr or result.stdout).strip() or None
+
+
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+def jar_fingerprint(jar_path):
+    """{"size", "sha256"} jaru; hash se přepočítá jen po změně souboru."""
+    stat = os.stat(jar_path)
+    key = (os.path.abspath(jar_path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprints_lock:
+        cached = _fingerprints.get(key)
+    if cached:
+        return dict(cached)
+    digest = hashlib.sha256()
+    with open(jar_path, "rb") as jar_file:
+        for chunk in iter(lambda: jar_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    fingerprint = {"size": stat.st_size, "sha256": digest.hexdigest()}
+    with _fingerprints_lock:
+        _fingerprints[key] = fingerprint
+    return dict(fingerprint)
+
+
+def archive_paths(build_source_path):
+    """(archiv, metadata) vedle jaru buildu"""
+    # Absolutní cesty – JVM běží s cwd ve složce serveru
+    build_dir = os.path.dirname(os.path.abspath(build_source_path))
+    return os.path.join(build_dir, ARCHIVE_NAME), os.path.join(build_dir, META_NAME)
+
+
+def read_meta(build_source_path):
+    _, meta_path = archive_paths(build_source_path)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as meta_file:
+            return json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+
+
+def find_archive(build_source_path, server_jar_path, java_executable, flags=None):
+    """
+    Vrátí (cesta k archivu, metadata), pokud archiv buildu sedí na jar serveru a JVM, jinak None.
+
+    flags = parametry JVM serveru (jvm_flags); archiv z tréninku s jinou haldou nebo GC se nepoužije.
+    """
+    if not build_source_path:
+        return None
+    archive_path, _ = archive_paths(build_source_path)
+    meta = read_meta(build_source_path)
+    if not meta or not os.path.exists(archive_path):
+        return None
+    if meta.get("java_version") != java_version(java_executable):
+        return None
+    if flags is not None and meta.get("jvm_flags") != list(flags):
+        return None
+    try:
+        if jar_fingerprint(server_jar_path) != meta.get("jar"):
+            return None
+    except OSError:
+        return None
+    return archive_path, meta
+
+
+def prepare_launch_jar(server_path, server_jar):
+    """
+    Hardlink jaru serveru pod názvem z tréninku; vrací název pro -jar, nebo None.
+
+    Hardlink sdílí velikost i čas změny s originálem, takže kontrola cesty v JVM projde.
+    """
+    source = os.path.join(server_path, server_jar)
+    target = os.path.join(server_path, CDS_JAR_NAME)
+    try:
+        if os.path.exists(target):
+            if os.path.samefile(source, target):
+                return CDS_JAR_NAME
+            os.remove(target)
+        os.link(source, target)
+        return CDS_JAR_NAME
+    except OSError as e:
+        print(f"[WARN] Nelze připravit {target} pro AppCDS: {e}")
+        return None
+
+
+# --- trénink ---------------------------------------------------------------
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _prepare_training_dir(build_version, training_dir):
+    from server_creator import _copy_build_files
+
+    shutil.rmtree(training_dir, ignore_errors=True)
+    os.makedirs(training_dir)
+    _copy_build_files(build_version, training_dir, None, jar_name=CDS_JAR_NAME)
+    with open(os.path.join(training_dir, "eula.txt"), "w", encoding="utf-8") as eula_file:
+        eula_file.write("eula=true\n")
+    with open(os.path.join(training_dir, "server.properties"), "w", encoding="utf-8") as properties_file:
+        properties_file.write(
+            f"server-port={_free_port()}\n"
+            "server-ip=127.0.0.1\n"
+            "online-mode=false\n"
+            "enable-query=false\n"
+            "enable-rcon=false\n"
+            "motd=AppCDS training\n"
+        )
+
+
+def _run_until_ready(command, cwd, timeout):
+    """Spustí server, po hlášce "Done (x s)!" ho zastaví; vrací dobu startu v sekundách."""
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1,
+    )
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    startup_seconds = None
+    try:
+        for line in process.stdout:
+            if startup_seconds is None:
+                startup_seconds = parse_ready_line(line)
+                if startup_seconds is not None:
+                    process.stdin.write("stop\n")
+                    process.stdin.flush()
+        process.wait()
+    finally:
+        timer.cancel()
+    if startup_seconds is None:
+        raise CdsError(f"Server nenastartoval (návratový kód {process.returncode})")
+    return startup_seconds
+
+
+def train(build_version, java_executable, level, profile=None, timeout=APP_CDS_TRAINING_TIMEOUT):
+    """
+    Vytvoří AppCDS archiv pro build a změří přínos.
+
+    Všechny běhy používají produkční příkaz (java_command) pro úroveň služby `level` a profil JVM:
+    1. běh vygeneruje svět a při ukončení zapíše archiv (trénink),
+    2. běh bez archivu = výchozí doba startu,
+    3. běh s archivem = doba startu s AppCDS.
+    Vrací uložená metadata.
+    """
+    from server_creator import build_source_path
+
+    source_path = build_source_path(build_version)
+    if not source_path:
+        raise CdsError("Soubor buildu nebyl nalezen. Nejdřív proveď synchronizaci buildů.")
+    version = java_version(java_executable)
+    if not version:
+        raise CdsError(f"Nelze spustit {java_executable} -version")
+
+    archive_path, meta_path = archive_paths(source_path)
+    temp_archive = archive_path + ".tmp"
+    training_dir = os.path.join(BASE_BUILD_PATH, ".cds_training", f"build_{build_version.id}")
+    build_type = build_version.build_type.name.upper()
+
+    def command(*extra_flags):
+        return java_command(java_executable, CDS_JAR_NAME, level, build_type, profile, extra_flags=extra_flags)
+
+    try:
+        _prepare_training_dir(build_version, training_dir)
+        if os.path.exists(temp_archive):
+            os.remove(temp_archive)
+        _run_until_ready(command(f"-XX:ArchiveClassesAtExit={temp_archive}"), training_dir, timeout)
+        if not os.path.exists(temp_archive):
+            raise CdsError("JVM archiv nevytvořila (podporuje AppCDS až Java 13+)")
+
+        baseline = _run_until_ready(command(), training_dir, timeout)
+        with_cds = _run_until_ready(command(f"-XX:SharedArchiveFile={temp_archive}"), training_dir, timeout)
+
+        os.replace(temp_archive, archive_path)
+        meta = {
+            "build_version_id": build_version.id,
+            "java_version": version,
+            "jar": jar_fingerprint(os.path.join(training_dir, CDS_JAR_NAME)),
+            "jvm_flags": jvm_flags(level, build_type, profile),
+            "baseline_seconds": baseline,
+            "cds_seconds": with_cds,
+            "improvement_percent": round((baseline - with_cds) / baseline * 100, 1) if baseline else None,
+            "created_at": time.time(),
+        }
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+        return meta
+    finally:
+        shutil.rmtree(training_dir, ignore_errors=True)
+        if os.path.exists(temp_archive):
+            os.remove(temp_archive)
+
+
+def _describe(build_version):
+    label = f"{build_version.build_type.name} {build_version.mc_version}"
+    if build_version.build_number:
+        label += f" #{build_version.build_number}"
+    return label
+
+
+def training_config(build_version):
+    """(úroveň služby, profil JVM) nejčastější mezi servery s buildem – archiv platí jen pro ně."""
+    from server_creator import SERVICE_LEVELS
+
+    configs = Counter((server.service_level or 1, server.jvm_profile) for server in build_version.servers)
+    service_level, profile = configs.most_common(1)[0][0] if configs else (1, None)
+    return SERVICE_LEVELS.get(service_level, SERVICE_LEVELS[1]), profile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vytvoří AppCDS archivy pro buildy serverů.")
+    parser.add_argument("--build", type=int, action="append", help="ID BuildVersion (lze opakovat)")
+    parser.add_argument("--all", action="store_true", help="všechny stažené buildy, ne jen používané")
+    parser.add_argument("--force", action="store_true", help="přegenerovat i existující archivy")
+    args = parser.parse_args(argv)
+
+    from app import app
+    from mc_server import JAVA_EXECUTABLE
+    from models import BuildVersion, Server
+    from server_creator import build_source_path
+
+    with app.app_context():
+        query = BuildVersion.query
+        if args.build:
+            query = query.filter(BuildVersion.id.in_(args.build))
+        elif not args.all:
+            query = query.filter(BuildVersion.id.in_(Server.query.with_entities(Server.build_version_id)))
+        failed = 0
+        for build_version in query.order_by(BuildVersion.id).all():
+            source_path = build_source_path(build_version)
+            if not source_path:
+                continue
+            level, profile = training_config(build_version)
+            flags = jvm_flags(level, build_version.build_type.name.upper(), profile)
+            if not args.force and find_archive(source_path, source_path, JAVA_EXECUTABLE, flags):
+                print(f"[INFO] {_describe(build_version)}: archiv je aktuální")
+                continue
+            print(f"[INFO] {_describe(build_version)}: tréninkový běh ({level['label']}, {' '.join(flags[:2])})...")
+            try:
+                meta = train(build_version, JAVA_EXECUTABLE, level, profile)
+            except (CdsError, OSError) as e:
+                failed += 1
+                print(f"[ERROR] {_describe(build_version)}: {e}")
+                continue
+            print(
+                f"[INFO] {_describe(build_version)}: start {meta['baseline_seconds']:.1f} s -> "
+                f"{meta['cds_seconds']:.1f} s s AppCDS (rychlejší o {meta['improvement_percent']} %)"
+            )
+        return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
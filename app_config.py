@@ -66,6 +66,96 @@ BASE_MODS_PATH = get_config_value(
     r"C:\Users\hospv\Documents\minecraft_mods"
 )
 
+# Složka pro běhová data webu (PID registr, metriky, ...)
+RUNTIME_DATA_PATH = get_config_value(
+    "RUNTIME_DATA_PATH",
+    str(PROJECT_ROOT / "instance" / "runtime")
+)
+
 MINECRAFT_JAVA_PATH = get_config_value("MINECRAFT_JAVA_PATH", "java")
 PORT_RANGE_START = get_config_int("PORT_RANGE_START", 25566)
 PORT_RANGE_END = get_config_int("PORT_RANGE_END", 30000)
+
+# Adresa webu při produkčním spuštění přes waitress (python serve.py)
+WEB_HOST = get_config_value("WEB_HOST", "127.0.0.1")
+WEB_PORT = get_config_int("WEB_PORT", 5000)
+# Počet vláken waitress – každá otevřená konzole (SSE) jedno z nich drží až CONSOLE_STREAM_MAX_SECONDS,
+# proto víc než výchozí 4 (jinak by čtyři otevřené konzole zablokovaly celý panel včetně přihlášení)
+WEB_THREADS = get_config_int("WEB_THREADS", 32)
+
+# Interval (v sekundách), ve kterém background vlákno vzorkuje CPU/RAM běžících serverů
+METRICS_SAMPLE_INTERVAL = get_config_int("METRICS_SAMPLE_INTERVAL", 2)
+# Hromadné zjišťování stavů: počet paralelních sond a limit na celou odpověď (ms)
+STATUS_BATCH_WORKERS = get_config_int("STATUS_BATCH_WORKERS", 8)
+STATUS_BATCH_DEADLINE_MS = get_config_int("STATUS_BATCH_DEADLINE_MS", 1500)
+# Maximální délka jednoho SSE spojení konzole (s) a za kolik ms se prohlížeč připojí znovu.
+# Otevřená konzole po tu dobu drží jedno vlákno webu (WEB_THREADS), proto nejvýš 30 s.
+CONSOLE_STREAM_MAX_SECONDS = min(get_config_int("CONSOLE_STREAM_MAX_SECONDS", 25), 30)
+CONSOLE_STREAM_RETRY_MS = get_config_int("CONSOLE_STREAM_RETRY_MS", 1000)
+# Lifecycle joby: max. čekání na "Done" po startu, na vypnutí JVM (s) a počet souběžných jobů
+LIFECYCLE_START_TIMEOUT = get_config_int("LIFECYCLE_START_TIMEOUT", 600)
+LIFECYCLE_STOP_TIMEOUT = get_config_int("LIFECYCLE_STOP_TIMEOUT", 30)
+LIFECYCLE_WORKERS = get_config_int("LIFECYCLE_WORKERS", 4)
+# Trvalý záznam konzole na disku: velikost segmentu, stáří a celkový limit na server
+CONSOLE_CAPTURE_SEGMENT_MB = get_config_int("CONSOLE_CAPTURE_SEGMENT_MB", 8)
+CONSOLE_CAPTURE_RETENTION_DAYS = get_config_int("CONSOLE_CAPTURE_RETENTION_DAYS", 7)
+CONSOLE_CAPTURE_MAX_MB = get_config_int("CONSOLE_CAPTURE_MAX_MB", 512)
+# Zjišťování hráčů na běžících serverech: interval, platnost údaje (s) a timeout jedné sondy (ms)
+PLAYER_POLL_INTERVAL = get_config_int("PLAYER_POLL_INTERVAL", 5)
+PLAYER_CACHE_TTL = get_config_int("PLAYER_CACHE_TTL", 20)
+PLAYER_PROBE_TIMEOUT_MS = get_config_int("PLAYER_PROBE_TIMEOUT_MS", 1500)
+# Servery, jejichž konzoli čteme, se sondují jen pro kontrolu seznamu hráčů (s)
+PLAYER_RECONCILE_INTERVAL = get_config_int("PLAYER_RECONCILE_INTERVAL", 120)
+# Interval (v sekundách) doindexování logů pro fulltextové hledání
+LOG_INDEX_INTERVAL = get_config_int("LOG_INDEX_INTERVAL", 60)
+# Samostatný supervisor serverů (python supervisor.py): adresa "host:port" nebo cesta k Unix socketu.
+# Prázdná hodnota = JVM vlastní přímo webový proces (jen jeden worker).
+SUPERVISOR_ADDRESS = get_config_value("SUPERVISOR_ADDRESS", "")
+# Klíč pro RPC supervisoru – povinný a jiný než SECRET_KEY (supervisor rozbalí vše, co mu ověřený klient pošle)
+SUPERVISOR_AUTHKEY = get_config_value("SUPERVISOR_AUTHKEY", "")
+# Max. čekání webu na odpověď supervisoru (s)
+SUPERVISOR_TIMEOUT = get_config_int("SUPERVISOR_TIMEOUT", 60)
+# RCON: port = herní port + offset (mimo rozsah herních portů), timeout příkazu (ms), paralelismus hromadných příkazů
+RCON_PORT_OFFSET = get_config_int("RCON_PORT_OFFSET", 10000)
+RCON_TIMEOUT_MS = get_config_int("RCON_TIMEOUT_MS", 5000)
+RCON_BULK_WORKERS = get_config_int("RCON_BULK_WORKERS", 16)
+# Přerozdělování jader podle zátěže: interval (s, 0 = vypnuto), po jaké době bez hráčů a pod jakým
+# vytížením (% jednoho jádra) jde server na sdílený pool, od jakého vytížení se vrací, velikost poolu
+CPU_REBALANCE_INTERVAL = get_config_int("CPU_REBALANCE_INTERVAL", 30)
+CPU_IDLE_SECONDS = get_config_int("CPU_IDLE_SECONDS", 600)
+CPU_IDLE_PERCENT = get_config_int("CPU_IDLE_PERCENT", 10)
+CPU_BUSY_PERCENT = get_config_int("CPU_BUSY_PERCENT", 60)
+CPU_SHARED_POOL_CORES = get_config_int("CPU_SHARED_POOL_CORES", 2)
+# Limity serverů v cgroup v2 (cpu.max, memory.max/high, io.weight podle tarifu); rodičovská cgroup
+# relativně k /sys/fs/cgroup – web musí mít právo do ní zapisovat (systemd: Delegate=yes)
+CGROUP_ENABLED = get_config_bool("CGROUP_ENABLED", True)
+CGROUP_PARENT = get_config_value("CGROUP_PARENT", "mc_web")
+# Profily JVM: od jaké haldy (MB) volí automatický profil ZGC místo G1 (0 = nikdy)
+# a velké stránky (auto = podle /proc/meminfo a transparent hugepages, true/false = vynutit)
+JVM_ZGC_MIN_HEAP_MB = get_config_int("JVM_ZGC_MIN_HEAP_MB", 16384)
+JVM_LARGE_PAGES = get_config_value("JVM_LARGE_PAGES", "auto")
+# Max. délka jednoho tréninkového běhu serveru při tvorbě AppCDS archivu (s), viz app_cds.py
+APP_CDS_TRAINING_TIMEOUT = get_config_int("APP_CDS_TRAINING_TIMEOUT", 900)
+# Uspávání serverů bez hráčů (tarify s "hibernate" v SERVICE_LEVELS): po kolika minutách (0 = vypnuto)
+# a jak často (s) se nečinnost kontroluje. Uspaný server probudí pokus hráče o připojení.
+HIBERNATE_IDLE_MINUTES = get_config_int("HIBERNATE_IDLE_MINUTES", 30)
+HIBERNATE_CHECK_INTERVAL = get_config_int("HIBERNATE_CHECK_INTERVAL", 60)
+# Kontrola paměti před startem serveru (viz admission.py): rezerva pro systém a web (MB), kolik %
+# fyzické RAM smí být přiděleno běžícím serverům, max. tlak na paměť (PSI some avg10, %; 0 = nekontroluje)
+# a jak dlouho (s) start čeká ve frontě na uvolnění paměti, než je odmítnut (0 = odmítne hned)
+ADMISSION_RESERVE_MB = get_config_int("ADMISSION_RESERVE_MB", 2048)
+ADMISSION_OVERCOMMIT_PERCENT = get_config_int("ADMISSION_OVERCOMMIT_PERCENT", 100)
+ADMISSION_MAX_PRESSURE = get_config_int("ADMISSION_MAX_PRESSURE", 10)
+ADMISSION_QUEUE_SECONDS = get_config_int("ADMISSION_QUEUE_SECONDS", 120)
+# Hromadný start a vypnutí serverů (fleet.py, /admin/fleet): kolik serverů startuje najednou
+# a společný limit (s) pro řádné vypnutí všech serverů, po kterém se zbylé ukončí násilně
+FLEET_BOOT_CONCURRENCY = get_config_int("FLEET_BOOT_CONCURRENCY", 3)
+FLEET_SHUTDOWN_BUDGET = get_config_int("FLEET_SHUTDOWN_BUDGET", 120)
+# Automatický restart spadlých serverů (crash_watchdog.py): zapnutí, první odstup (s), který se
+# s každým dalším pádem zdvojnásobí až do max. odstupu (s), a pojistka proti smyčce pádů –
+# po CRASH_LOOP_MAX pádech během CRASH_LOOP_WINDOW s zůstane server vypnutý do ručního startu
+CRASH_RESTART_ENABLED = get_config_bool("CRASH_RESTART_ENABLED", True)
+CRASH_BACKOFF_BASE = get_config_int("CRASH_BACKOFF_BASE", 10)
+CRASH_BACKOFF_MAX = get_config_int("CRASH_BACKOFF_MAX", 300)
+CRASH_LOOP_WINDOW = get_config_int("CRASH_LOOP_WINDOW", 900)
+CRASH_LOOP_MAX = get_config_int("CRASH_LOOP_MAX", 5)
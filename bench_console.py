@@ -0,0 +1,80 @@
+# bench_console.py
+"""
+Benchmark vykreslení konzole: původní převod celého bufferu při každém requestu
+vs. jednou převedené (memoizované) HTML fragmenty v ConsoleBufferu.
+
+Spuštění:
+    python bench_console.py [--servers 50] [--lines 1000] [--rounds 5]
+"""
+import argparse
+import random
+import time
+
+from ansi2html import Ansi2HTMLConverter
+
+from console_buffer import ConsoleBuffer, render_ansi_line
+
+
+SAMPLE_LINES = [
+    "[12:00:01 INFO]: Preparing spawn area: 42%",
+    "[12:00:02 INFO]: Steve joined the game",
+    "\x1b[33m[12:00:03 WARN]: Can't keep up! Is the server overloaded? Running 2034ms or 40 ticks behind\x1b[0m",
+    "\x1b[31m[12:00:04 ERROR]: Could not pass event PlayerMoveEvent to SomePlugin v1.2.3\x1b[0m",
+    "[12:00:05 INFO]: <Alex> hello & welcome <3",
+    "\x1b[32m[12:00:06 INFO]: Done (12.345s)! For help, type \"help\"\x1b[0m",
+]
+
+
+def build_buffers(servers, lines):
+    random.seed(42)
+    buffers = []
+    for _ in range(servers):
+        buffer = ConsoleBuffer(max_bytes=10 * 1024 * 1024, renderer=render_ansi_line)
+        for _ in range(lines):
+            buffer.append(random.choice(SAMPLE_LINES))
+        buffers.append(buffer)
+    return buffers
+
+
+def old_request(buffer, lines):
+    # Původní server_logs_api: nový konvertor a převod celého spojeného bufferu
+    text = "\n".join(entry.text for entry in buffer.tail(lines))
+    return Ansi2HTMLConverter(inline=True).convert(text, full=False)
+
+
+def new_request(buffer, lines):
+    return buffer.render_html(buffer.tail(lines))
+
+
+def measure(label, func, buffers, lines, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for buffer in buffers:
+            func(buffer, lines)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    per_request_ms = best / len(buffers) * 1000
+    print(f"{label:<32} {best * 1000:9.1f} ms / {len(buffers)} serverů   {per_request_ms:7.3f} ms / request")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    buffers = build_buffers(args.servers, args.lines)
+    print(f"Buffery: {args.servers} serverů x {args.lines} řádků, nejlepší z {args.rounds} kol\n")
+
+    old = measure("původní (převod celého bufferu)", old_request, buffers, args.lines, args.rounds)
+    # První průchod naplní memo – odpovídá prvnímu requestu po příchodu řádků
+    measure("memo – první request", new_request, buffers, args.lines, 1)
+    new = measure("memo – další requesty", new_request, buffers, args.lines, args.rounds)
+    print(f"\nZrychlení opakovaných requestů: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# cgroups.py
+import os
+import threading
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+CONTROLLERS = ("cpu", "memory", "io")
+CPU_PERIOD_USEC = 100000
+# Rezerva nad haldou JVM (metaspace, vlákna, direct buffery, JIT); memory_max_mb tarifů = halda + rezerva
+JVM_OVERHEAD_MB = 1536
+
+
+def _write(path, value):
+    with open(path, "w", encoding="ascii") as cgroup_file:
+        cgroup_file.write(value)
+
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="ascii") as cgroup_file:
+            return cgroup_file.read().strip()
+    except OSError:
+        return None
+
+
+def parse_flat_keyed(text):
+    """"usage_usec 123\\nnr_throttled 4" -> {"usage_usec": 123, "nr_throttled": 4}"""
+    values = {}
+    for line in (text or "").splitlines():
+        key, _, value = line.partition(" ")
+        if value.strip().lstrip("-").isdigit():
+            values[key] = int(value)
+    return values
+
+
+def parse_pressure(text):
+    """PSI: "some avg10=0.00 avg60=0.00 avg300=0.00 total=0" -> {"some": {...}, "full": {...}}"""
+    pressure = {}
+    for line in (text or "").splitlines():
+        kind, *fields = line.split()
+        values = {}
+        for field in fields:
+            key, _, value = field.partition("=")
+            values[key] = int(value) if key == "total" else float(value)
+        pressure[kind] = values
+    return pressure
+
+
+def memory_limit_mb(level, heap_mb=0):
+    """
+    Paměť, kterou JVM serveru smí zabrat: limit tarifu (halda tarifu + režie), nejméně však
+    skutečná halda + režie – start.bat/start.sh může mít -Xmx větší než tarif.
+    """
+    return max(level["memory_max_mb"], heap_mb + JVM_OVERHEAD_MB)
+
+
+class CgroupManager:
+    """
+    Každé JVM ve vlastní cgroup v2 s limity podle tarifu (cpu.max, memory.max/high, io.weight).
+
+    Cgroupy vznikají pod `parent` (relativně k /sys/fs/cgroup). Proces se do cgroup
+    zapíše ještě před exec JVM, takže se do limitu počítá od prvního bajtu haldy.
+    Bez cgroup v2 nebo bez práv zápisu se limity tiše nevynucují (jen jedno varování).
+    """
+
+    def __init__(self, parent="mc_web", root=CGROUP_ROOT, enabled=True):
+        self.root = root
+        self.parent_path = os.path.join(root, parent)
+        self.enabled = enabled
+        self._available = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        if self._available is None:
+            with self._lock:
+                if self._available is None:
+                    self._available = self._setup()
+        return self._available
+
+    def _setup(self):
+        if not self.enabled or os.name != "posix":
+            return False
+        if not os.path.exists(os.path.join(self.root, "cgroup.controllers")):
+            print("[WARN] cgroup v2 není k dispozici, limity serverů se nevynucují")
+            return False
+        try:
+            os.makedirs(self.parent_path, exist_ok=True)
+        except OSError as e:
+            print(f"[WARN] Nelze vytvořit cgroup {self.parent_path} ({e}), limity serverů se nevynucují")
+            return False
+
+        # Řadiče musí být povolené v subtree_control každého předka až k našemu rodiči
+        relative = os.path.relpath(self.parent_path, self.root)
+        current = self.root
+        for part in [""] + relative.split(os.sep):
+            current = os.path.join(current, part) if part else current
+            enabled = (_read(os.path.join(current, "cgroup.subtree_control")) or "").split()
+            missing = [name for name in CONTROLLERS if name not in enabled]
+            if not missing:
+                continue
+            try:
+                _write(os.path.join(current, "cgroup.subtree_control"), " ".join(f"+{name}" for name in missing))
+            except OSError as e:
+                print(f"[WARN] Nelze povolit řadiče {missing} v {current}: {e}")
+        return True
+
+    # --- limity ------------------------------------------------------------
+
+    @staticmethod
+    def limits_for(level, heap_mb=0):
+        """Hodnoty řídicích souborů pro úroveň služby (SERVICE_LEVELS) a haldu JVM."""
+        memory_mb = memory_limit_mb(level, heap_mb)
+        return {
+            "cpu.max": f"{level['cpu_limit_percent'] * CPU_PERIOD_USEC // 100} {CPU_PERIOD_USEC}",
+            "cpu.weight": str(level["cpu_limit_percent"]),
+            "memory.max": str(memory_mb * 1024 * 1024),
+            # Nad memory.high jádro proces zpomalí a uvolňuje cache dřív, než dojde na OOM
+            "memory.high": str(memory_mb * 1024 * 1024 * 9 // 10),
+            "io.weight": f"default {level['io_weight']}",
+        }
+
+    def prepare(self, server_id, limits):
+        """Vytvoří (nebo přenastaví) cgroup serveru; vrací její cestu, nebo None."""
+        if not self.available:
+            return None
+        path = os.path.join(self.parent_path, f"server_{server_id}")
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            print(f"[WARN] Nelze vytvořit cgroup serveru {server_id}: {e}")
+            return None
+        for name, value in limits.items():
+            try:
+                _write(os.path.join(path, name), value)
+            except OSError as e:
+                # Např. io.weight bez řadiče io – ostatní limity platí dál
+                print(f"[WARN] Nelze nastavit {name} serveru {server_id}: {e}")
+        return path
+
+    @staticmethod
+    def attach_hook(path):
+        """preexec_fn pro Popen: zapíše potomka do cgroup ještě před spuštěním JVM."""
+        procs_path = os.path.join(path, "cgroup.procs").encode()
+
+        def attach():
+            # Po forku jen syscally – žádné zámky ani alokace Pythonu navíc. Chyba nesmí
+            # zabránit startu serveru; zda se zápis povedl, ověří volající přes path_of().
+            try:
+                fd = os.open(procs_path, os.O_WRONLY)
+            except OSError:
+                return
+            try:
+                os.write(fd, b"0")
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+        return attach
+
+    def path_of(self, pid):
+        """Cesta k cgroup procesu, pokud leží pod naším rodičem (převzaté servery)."""
+        text = _read(f"/proc/{pid}/cgroup")
+        for line in (text or "").splitlines():
+            if line.startswith("0::"):
+                path = os.path.join(self.root, line[3:].lstrip("/"))
+                if os.path.commonpath([path, self.parent_path]) == self.parent_path and path != self.parent_path:
+                    return path
+        return None
+
+    @staticmethod
+    def populated(path):
+        """Běží v cgroup ještě nějaký proces? (cgroup.events, u smazané cgroup False)"""
+        if not path:
+            return False
+        return parse_flat_keyed(_read(os.path.join(path, "cgroup.events"))).get("populated", 0) > 0
+
+    def remove(self, path):
+        """Smaže prázdnou cgroup po skončení JVM."""
+        if not path:
+            return
+        try:
+            os.rmdir(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[WARN] Nelze smazat cgroup {path}: {e}")
+
+    # --- účtování ----------------------------------------------------------
+
+    def stats(self, path):
+        """Vlastní účtování cgroup: využití a throttling CPU, paměť, OOM a tlak (PSI)."""
+        if not path:
+            return None
+        cpu = parse_flat_keyed(_read(os.path.join(path, "cpu.stat")))
+        events = parse_flat_keyed(_read(os.path.join(path, "memory.events")))
+        memory_current = _read(os.path.join(path, "memory.current"))
+        memory_max = _read(os.path.join(path, "memory.max"))
+        return {
+            "cpu_max": _read(os.path.join(path, "cpu.max")),
+            "cpu_usage_seconds": round(cpu.get("usage_usec", 0) / 1e6, 1),
+            "nr_periods": cpu.get("nr_periods", 0),
+            "nr_throttled": cpu.get("nr_throttled", 0),
+            "throttled_seconds": round(cpu.get("throttled_usec", 0) / 1e6, 1),
+            "memory_mb": int(memory_current) // (1024 * 1024) if memory_current and memory_current.isdigit() else None,
+            "memory_max_mb": int(memory_max) // (1024 * 1024) if memory_max and memory_max.isdigit() else None,
+            "memory_high_events": events.get("high", 0),
+            "oom_kills": events.get("oom_kill", 0),
+            "pressure": {
+                resource: parse_pressure(_read(os.path.join(path, f"{resource}.pressure")))
+                for resource in ("cpu", "memory", "io")
+            },
+        }
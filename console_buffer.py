@@ -0,0 +1,170 @@
+# console_buffer.py
+import html
+import queue
+import threading
+from collections import deque
+from itertools import islice
+
+from ansi2html import Ansi2HTMLConverter
+
+
+DEFAULT_MAX_BYTES = 256 * 1024
+DEFAULT_SUBSCRIBER_QUEUE = 1000
+
+
+class ConsoleLine:
+    """Jeden řádek konzole; HTML podoba se vytváří líně a jen jednou."""
+
+    __slots__ = ("seq", "text", "size", "html")
+
+    def __init__(self, seq, text, size):
+        self.seq = seq
+        self.text = text
+        self.size = size
+        self.html = None
+
+
+def escape_line(text):
+    return html.escape(text, quote=False)
+
+
+_ansi_converter = Ansi2HTMLConverter(inline=True)
+_ansi_converter_lock = threading.Lock()
+
+
+def render_ansi_line(line):
+    """Převede jeden řádek konzole s ANSI kódy na HTML (bez ANSI stačí escapování)"""
+    if "\x1b" not in line:
+        return escape_line(line)
+    with _ansi_converter_lock:
+        return _ansi_converter.convert(line, full=False)
+
+
+class ConsoleSubscriber:
+    """
+    Odběratel nových řádků (např. SSE spojení).
+
+    Fronta je omezená – pomalý klient nikdy nezdrží vlákno čtoucí konzoli. Při
+    přetečení se jen nastaví `overflowed` a klient se dorovná z bufferu přes since().
+    """
+
+    def __init__(self, max_queue=DEFAULT_SUBSCRIBER_QUEUE):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def push(self, entry):
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Počká na první řádek a vrátí všechny čekající ConsoleLine (prázdný seznam po timeoutu)."""
+        try:
+            entries = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                entries.append(self.queue.get_nowait())
+            except queue.Empty:
+                return entries
+
+
+class ConsoleBuffer:
+    """
+    Kruhový buffer konzolového výstupu s monotónně rostoucími sekvenčními čísly.
+
+    Limit je v bajtech (UTF-8), takže server se dlouhými řádky (stack trace modů)
+    nezabere víc paměti než server s krátkými. Klient si pamatuje poslední `seq`
+    a při dalším dotazu dostane jen nové řádky.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, renderer=escape_line, start_seq=1):
+        self.max_bytes = max_bytes
+        self.renderer = renderer      # text řádku -> HTML fragment
+        self.entries = deque()        # ConsoleLine
+        self.size = 0
+        self.next_seq = start_seq         # navazuje na trvalý záznam konzole (console_capture)
+        self.lock = threading.Lock()
+        self.subscribers = set()
+
+    def set_max_bytes(self, max_bytes):
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._trim()
+
+    def append(self, line):
+        """Přidá řádek a vrátí jeho sekvenční číslo."""
+        size = len(line.encode("utf-8", errors="replace")) + 1
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            entry = ConsoleLine(seq, line, size)
+            self.entries.append(entry)
+            self.size += size
+            self._trim()
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.push(entry)
+        return seq
+
+    def subscribe(self, max_queue=DEFAULT_SUBSCRIBER_QUEUE):
+        subscriber = ConsoleSubscriber(max_queue)
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def _trim(self):
+        # Vždy ponecháme alespoň poslední řádek, i kdyby sám přesáhl limit
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            self.size -= self.entries.popleft().size
+
+    @property
+    def last_seq(self):
+        return self.next_seq - 1
+
+    def tail(self, lines=50):
+        """Vrátí posledních `lines` záznamů jako [ConsoleLine] (0 = vše)."""
+        with self.lock:
+            if lines <= 0 or lines >= len(self.entries):
+                return list(self.entries)
+            return list(islice(self.entries, len(self.entries) - lines, None))
+
+    def since(self, seq, limit=1000):
+        """
+        Vrátí (záznamy, reset) pro řádky s číslem větším než `seq`.
+
+        `reset` je True, pokud klient o část řádků přišel (byly už vyřazeny z bufferu)
+        nebo zná novější číslo, než buffer (restart webu) – pak má obsah nahradit.
+        """
+        with self.lock:
+            if not self.entries:
+                return [], seq > self.last_seq
+            first_seq = self.entries[0].seq
+            reset = seq < first_seq - 1 or seq > self.last_seq
+            if reset:
+                start = 0
+            else:
+                # Sekvenční čísla v bufferu jsou souvislá – index spočítáme přímo
+                start = seq - first_seq + 1
+            if len(self.entries) - start > limit:
+                start = len(self.entries) - limit
+                reset = True
+            selected = list(islice(self.entries, start, None))
+        return selected, reset
+
+    def render_html(self, entries):
+        """Vrátí HTML zadaných řádků spojené novým řádkem; každý řádek se převádí jen jednou."""
+        fragments = []
+        for entry in entries:
+            fragment = entry.html
+            if fragment is None:
+                fragment = self.renderer(entry.text)
+                entry.html = fragment
+            fragments.append(fragment)
+        return "\n".join(fragments)
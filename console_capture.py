@@ -0,0 +1,303 @@
+# console_capture.py
+import glob
+import gzip
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from log_reader import LogReader
+
+
+# Aktivní soubor se po dosažení této velikosti uzavře jako segment a zkomprimuje
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Zápis na disk nejpozději po této době (čtení si flush vynutí samo)
+FLUSH_INTERVAL = 1.0
+# Retence se kromě rotace kontroluje i průběžně při zápisu (s) a aktivní soubor se po této době
+# uzavře jako segment i bez dosažení velikosti – jinak by tichý server staré řádky nikdy nesmazal
+RETENTION_CHECK_INTERVAL = 3600
+ACTIVE_MAX_AGE = 86400
+
+ACTIVE_NAME = "console.log"
+_SEGMENT_RE = re.compile(r"^segment-(\d+)-(\d+)\.log(\.gz)?$")
+
+# Komprese segmentů běží mimo vlákno čtoucí stdout serveru, aby JVM nikdy nečekala na plnou pipe
+_compress_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="console-compress")
+# Čtení .gz segmentů přes kontrolní body (sdílená cache indexů)
+_segment_reader = LogReader()
+
+
+def _parse_record(record):
+    """b"seq\\ttext" -> (seq, text)"""
+    seq, _, text = record.partition(b"\t")
+    return int(seq), text.decode("utf-8", errors="replace")
+
+
+def _mmap_read(path, start_seq, end_seq):
+    """Vrátí [(seq, text)] pro start_seq <= seq < end_seq z nekomprimovaného souboru (binární hledání)."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return []
+    if size == 0:
+        return []
+
+    with open(path, "rb") as capture_file, \
+            mmap.mmap(capture_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Najdi začátek prvního záznamu se seq >= start_seq
+        lo, hi = 0, size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            line_start = mm.rfind(b"\n", 0, mid) + 1
+            line_end = mm.find(b"\n", line_start)
+            if line_end < 0:
+                hi = line_start
+                continue
+            seq, _ = _parse_record(mm[line_start:line_end])
+            if seq < start_seq:
+                lo = line_end + 1
+            else:
+                hi = line_start
+
+        records = []
+        position = lo
+        while position < size:
+            line_end = mm.find(b"\n", position)
+            if line_end < 0:
+                break
+            seq, text = _parse_record(mm[position:line_end])
+            if seq >= end_seq:
+                break
+            records.append((seq, text))
+            position = line_end + 1
+        return records
+
+
+class ConsoleCapture:
+    """
+    Trvalý záznam konzole jednoho serveru na disku.
+
+    Řádky se zapisují jako "seq<TAB>text" do console.log; po dosažení velikosti
+    segmentu se soubor uzavře jako segment-<první>-<poslední>.log a na pozadí
+    zkomprimuje. Sekvenční čísla navazují i po restartu webu, takže se dají
+    používat stejně jako seq v ConsoleBufferu.
+    """
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES,
+                 retention_days=DEFAULT_RETENTION_DAYS, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.active_path = os.path.join(directory, ACTIVE_NAME)
+        self.lock = threading.Lock()
+        self._file = None
+        self._active_size = 0
+        self._active_first_seq = None
+        self._active_started = None       # time.time() prvního záznamu v aktivním souboru
+        self._last_flush = 0.0
+        self._last_retention = time.monotonic()
+        self.last_seq = 0
+        self._recover()
+
+    # --- obnovení po restartu ---------------------------------------------
+
+    def _recover(self):
+        # Složka vzniká až při prvním zápisu (append) – čtení neexistujícího serveru nic nezakládá
+        if not os.path.isdir(self.directory):
+            return
+        segments = self._segments()
+        if segments:
+            self.last_seq = segments[-1][1]
+            for first_seq, last_seq, path in segments:
+                if not path.endswith(".gz"):
+                    # Komprese byla přerušena (restart webu) – dokončíme ji
+                    _compress_executor.submit(self._compress_segment, path)
+
+        if os.path.exists(self.active_path):
+            self._truncate_partial_record()
+            self._active_size = os.path.getsize(self.active_path)
+            if self._active_size:
+                with open(self.active_path, "rb") as capture_file:
+                    self._active_first_seq = _parse_record(capture_file.readline().rstrip(b"\n"))[0]
+                    capture_file.seek(max(self._active_size - 64 * 1024, 0))
+                    tail = capture_file.read().rstrip(b"\n")
+                    self.last_seq = max(self.last_seq, _parse_record(tail.rsplit(b"\n", 1)[-1])[0])
+                self._active_started = os.path.getmtime(self.active_path)
+                if time.time() - self._active_started >= ACTIVE_MAX_AGE:
+                    # Aktivní soubor z dávného běhu – uzavřít, ať na něj platí retence
+                    self._rotate()
+        _compress_executor.submit(self._apply_retention)
+
+    def _truncate_partial_record(self):
+        # Pád uprostřed zápisu může zanechat nedokončený poslední záznam
+        with open(self.active_path, "rb+") as capture_file:
+            capture_file.seek(0, os.SEEK_END)
+            size = capture_file.tell()
+            if size == 0:
+                return
+            capture_file.seek(max(size - 64 * 1024, 0))
+            tail = capture_file.read()
+            if tail.endswith(b"\n"):
+                return
+            last_newline = tail.rfind(b"\n")
+            capture_file.truncate(size - len(tail) + last_newline + 1)
+
+    def _segments(self):
+        """Seznam (first_seq, last_seq, path) seřazený podle seq."""
+        segments = {}
+        for path in glob.glob(os.path.join(self.directory, "segment-*.log*")):
+            match = _SEGMENT_RE.match(os.path.basename(path))
+            if not match:
+                continue
+            key = (int(match.group(1)), int(match.group(2)))
+            # Pokud existuje .log i .log.gz (komprese nedoběhla), .log je úplný
+            if key not in segments or not path.endswith(".gz"):
+                segments[key] = path
+        return [(first, last, path) for (first, last), path in sorted(segments.items())]
+
+    # --- zápis -------------------------------------------------------------
+
+    def append(self, seq, line):
+        record = f"{seq}\t{line}\n".encode("utf-8", errors="replace")
+        with self.lock:
+            if self._file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._file = open(self.active_path, "ab")
+            self._file.write(record)
+            if self._active_first_seq is None:
+                self._active_first_seq = seq
+                self._active_started = time.time()
+            self._active_size += len(record)
+            self.last_seq = seq
+
+            now = time.monotonic()
+            if now - self._last_flush >= FLUSH_INTERVAL:
+                self._file.flush()
+                self._last_flush = now
+            if self._active_size >= self.segment_bytes or time.time() - self._active_started >= ACTIVE_MAX_AGE:
+                # Komprese nového segmentu retenci spustí sama
+                self._rotate()
+                self._last_retention = now
+            elif now - self._last_retention >= RETENTION_CHECK_INTERVAL:
+                self._last_retention = now
+                _compress_executor.submit(self._apply_retention)
+
+    def flush(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        segment_path = os.path.join(
+            self.directory, f"segment-{self._active_first_seq:012d}-{self.last_seq:012d}.log"
+        )
+        os.replace(self.active_path, segment_path)
+        self._active_size = 0
+        self._active_first_seq = None
+        self._active_started = None
+        _compress_executor.submit(self._compress_segment, segment_path)
+
+    def _compress_segment(self, path):
+        try:
+            temp_path = path + ".gz.tmp"
+            with open(path, "rb") as source, gzip.open(temp_path, "wb", compresslevel=6) as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            # Stáří segmentu pro retenci = čas posledního zápisu, ne čas komprese
+            stat = os.stat(path)
+            os.utime(temp_path, (stat.st_atime, stat.st_mtime))
+            os.replace(temp_path, path + ".gz")
+            os.remove(path)
+            self._apply_retention()
+        except OSError as e:
+            print(f"[WARN] Nepodařilo se zkomprimovat záznam konzole {path}: {e}")
+
+    def _apply_retention(self):
+        segments = self._segments()
+        cutoff = time.time() - self.retention_days * 86400
+        sizes = []
+        for _, _, path in segments:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            sizes.append((path, stat.st_size, stat.st_mtime))
+        total = sum(size for _, size, _ in sizes)
+        # Nejstarší segmenty pryč, dokud platí limit stáří nebo celkové velikosti
+        for path, size, mtime in sizes:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                print(f"[WARN] Nepodařilo se smazat starý záznam konzole {path}: {e}")
+
+    # --- čtení -------------------------------------------------------------
+
+    @property
+    def first_seq(self):
+        """Nejstarší seq dostupné na disku (0 = nic)."""
+        segments = self._segments()
+        if segments:
+            return segments[0][0]
+        with self.lock:
+            return self._active_first_seq or 0
+
+    def read(self, start_seq, end_seq):
+        """Vrátí [(seq, text)] pro start_seq <= seq < end_seq (jen to, co na disku ještě je)."""
+        if end_seq <= start_seq:
+            return []
+        with self.lock:
+            if self._file is not None:
+                self._file.flush()
+            active_first_seq = self._active_first_seq
+            segments = self._segments()
+
+        records = []
+        for first_seq, last_seq, path in segments:
+            if last_seq < start_seq or first_seq >= end_seq:
+                continue
+            records.extend(self._read_segment(path, first_seq, start_seq, end_seq))
+        if active_first_seq is not None and active_first_seq < end_seq:
+            records.extend(_mmap_read(self.active_path, start_seq, end_seq))
+        return records
+
+    def read_before(self, before_seq, limit):
+        """Vrátí nejvýš `limit` posledních záznamů se seq < before_seq."""
+        return self.read(max(before_seq - limit, 1), before_seq)
+
+    @staticmethod
+    def _read_segment(path, first_seq, start_seq, end_seq):
+        if not path.endswith(".gz") and not os.path.exists(path):
+            # Segment se mezitím dokomprimoval
+            path += ".gz"
+        try:
+            if not path.endswith(".gz"):
+                return _mmap_read(path, start_seq, end_seq)
+            # Seq v segmentu jsou souvislé – řádek = seq - first_seq, stránku najde index s kontrolními body
+            offset = max(start_seq - first_seq, 0)
+            page = _segment_reader.read_page(path, offset=offset, limit=end_seq - first_seq - offset)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Nepodařilo se přečíst záznam konzole {path}: {e}")
+            return []
+        records = []
+        for line in page["lines"]:
+            seq, _, text = line.partition("\t")
+            if seq.isdigit() and start_seq <= int(seq) < end_seq:
+                records.append((int(seq), text))
+        return records
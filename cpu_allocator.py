@@ -0,0 +1,286 @@
+# cpu_allocator.py
+import glob
+import json
+import os
+import re
+import threading
+
+import psutil
+
+
+SYS_CPU_PATH = "/sys/devices/system/cpu"
+SYS_NODE_PATH = "/sys/devices/system/node"
+
+
+def parse_cpu_list(text):
+    """"0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="ascii") as sys_file:
+            return sys_file.read().strip()
+    except OSError:
+        return None
+
+
+class CpuTopology:
+    """
+    Rozložení logických CPU: fyzická jádra (SMT sourozenci) a NUMA uzly.
+
+    cores = {klíč jádra: [logická CPU]}, nodes = {uzel: [klíče jader]}.
+    """
+
+    def __init__(self, cpu_core, cpu_node):
+        self.cpu_core = cpu_core          # {cpu: (socket, core_id)}
+        self.cpu_node = cpu_node          # {cpu: numa uzel}
+        self.cores = {}
+        for cpu in sorted(cpu_core):
+            self.cores.setdefault(cpu_core[cpu], []).append(cpu)
+        self.nodes = {}
+        for core, cpus in self.cores.items():
+            node = cpu_node.get(cpus[0], 0)
+            self.nodes.setdefault(node, []).append(core)
+
+    @property
+    def cpu_count(self):
+        return len(self.cpu_core)
+
+    @property
+    def cpus(self):
+        return sorted(self.cpu_core)
+
+    @classmethod
+    def detect(cls):
+        """Topologie z /sys na Linuxu, jinak odhad z psutil (sourozenci SMT číslovaní za sebou)."""
+        available = cls._available_cpus()
+        if os.path.isdir(SYS_CPU_PATH):
+            topology = cls._from_sysfs(available)
+            if topology is not None:
+                return topology
+
+        logical = len(available)
+        physical = psutil.cpu_count(logical=False) or logical
+        threads = max(logical // physical, 1) if logical % physical == 0 else 1
+        # Windows čísluje hyperthready jednoho jádra za sebou (0-1 = jádro 0)
+        cpu_core = {cpu: (0, index // threads) for index, cpu in enumerate(available)}
+        return cls(cpu_core, {cpu: 0 for cpu in available})
+
+    @staticmethod
+    def _available_cpus():
+        # V kontejneru / cpusetu smíme použít jen část CPU
+        if hasattr(os, "sched_getaffinity"):
+            return sorted(os.sched_getaffinity(0))
+        try:
+            return sorted(psutil.Process().cpu_affinity())
+        except (psutil.Error, AttributeError):
+            return list(range(psutil.cpu_count(logical=True) or 1))
+
+    @classmethod
+    def _from_sysfs(cls, available):
+        cpu_core = {}
+        for cpu in available:
+            topology_dir = os.path.join(SYS_CPU_PATH, f"cpu{cpu}", "topology")
+            core_id = _read(os.path.join(topology_dir, "core_id"))
+            package_id = _read(os.path.join(topology_dir, "physical_package_id"))
+            if core_id is None:
+                return None
+            cpu_core[cpu] = (int(package_id or 0), int(core_id))
+
+        cpu_node = {}
+        for node_dir in glob.glob(os.path.join(SYS_NODE_PATH, "node[0-9]*")):
+            node = int(re.search(r"(\d+)$", node_dir).group(1))
+            for cpu in parse_cpu_list(_read(os.path.join(node_dir, "cpulist")) or ""):
+                cpu_node[cpu] = node
+        return cls(cpu_core, cpu_node)
+
+    def describe(self, cpu):
+        """{"cpu", "node", "core"} pro přehled v administraci"""
+        core = self.cpu_core.get(cpu)
+        return {"cpu": cpu, "node": self.cpu_node.get(cpu, 0), "core": f"{core[0]}:{core[1]}" if core else None}
+
+
+class CoreAllocator:
+    """
+    Přidělování CPU serverům s ohledem na topologii.
+
+    - dedikované servery (premium) dostanou celá fyzická jádra včetně SMT sourozenců,
+      vše na jednom NUMA uzlu,
+    - ostatní jeden uzel a přednostně jádra, na kterých ještě nic neběží.
+    Vedle toho drží sdílený pool jader pro nečinné servery (viz CpuRebalancer).
+    Přidělení se ukládají na disk a po restartu se srovnají s afinitou běžících JVM.
+    """
+
+    def __init__(self, topology, storage_path):
+        self.topology = topology
+        self.storage_path = storage_path
+        self.lock = threading.Lock()
+        self._allocations = {}            # {server_id: [cpu]}
+        self._shared = []                 # sdílený pool nečinných serverů
+        self._load()
+
+    # --- přidělení ---------------------------------------------------------
+
+    def allocate(self, server_id, count, dedicated=False):
+        """Přidělí `count` logických CPU; vrací seznam CPU, nebo None, pokud se nevejdou."""
+        with self.lock:
+            if server_id in self._allocations:
+                return list(self._allocations[server_id])
+            used = self._used_cpus()
+            if dedicated:
+                cpus = self._pick_whole_cores(count, used)
+            else:
+                cpus = self._pick_shared(count, used)
+            if cpus is None:
+                return None
+            self._allocations[server_id] = cpus
+            self._save()
+            return list(cpus)
+
+    def adopt(self, server_id, cpus):
+        """
+        Zaznamená afinitu běžícího JVM (převzatého po restartu).
+
+        Vrací CPU, na kterých server běží – server na sdíleném poolu žádná vlastní nedrží.
+        """
+        cpus = sorted(cpu for cpu in cpus if cpu in self.topology.cpu_core)
+        with self.lock:
+            on_shared_pool = bool(cpus) and bool(self._shared) and set(cpus) <= set(self._shared)
+            if on_shared_pool or not cpus or len(cpus) >= self.topology.cpu_count:
+                # Proces bez omezené afinity (nebo na sdíleném poolu) žádná jádra nedrží
+                changed = self._allocations.pop(server_id, None) is not None
+            else:
+                changed = self._allocations.get(server_id) != cpus
+                self._allocations[server_id] = cpus
+            if changed:
+                self._save()
+        return cpus if on_shared_pool else self.get(server_id)
+
+    def release(self, server_id):
+        with self.lock:
+            if self._allocations.pop(server_id, None) is not None:
+                self._save()
+
+    def retain(self, server_ids):
+        """Zahodí přidělení serverů, které už neběží (po startu webu / supervisoru)."""
+        with self.lock:
+            stale = [server_id for server_id in self._allocations if server_id not in server_ids]
+            for server_id in stale:
+                del self._allocations[server_id]
+            if stale:
+                self._save()
+        return stale
+
+    def reserve_shared(self, count):
+        """Vyhradí (nebo vrátí již vyhrazený) sdílený pool `count` CPU; None, pokud se nevejde."""
+        with self.lock:
+            if self._shared:
+                return list(self._shared)
+            cpus = self._pick_shared(count, self._used_cpus())
+            if cpus is None:
+                return None
+            self._shared = cpus
+            self._save()
+            return list(cpus)
+
+    def release_shared(self):
+        with self.lock:
+            if self._shared:
+                self._shared = []
+                self._save()
+
+    def shared_cpus(self):
+        with self.lock:
+            return list(self._shared)
+
+    def get(self, server_id):
+        with self.lock:
+            return list(self._allocations.get(server_id, []))
+
+    def allocations(self):
+        with self.lock:
+            return {server_id: list(cpus) for server_id, cpus in self._allocations.items()}
+
+    # --- výběr CPU ---------------------------------------------------------
+
+    def _used_cpus(self):
+        used = {cpu for cpus in self._allocations.values() for cpu in cpus}
+        used.update(self._shared)
+        return used
+
+    def _node_order(self, used):
+        """Uzly seřazené od nejvolnějšího"""
+        free = {
+            node: sum(1 for core in cores for cpu in self.topology.cores[core] if cpu not in used)
+            for node, cores in self.topology.nodes.items()
+        }
+        return sorted(free, key=lambda node: (-free[node], node))
+
+    def _pick_whole_cores(self, count, used):
+        for node in self._node_order(used):
+            picked = []
+            for core in self.topology.nodes[node]:
+                cpus = self.topology.cores[core]
+                if any(cpu in used for cpu in cpus):
+                    continue
+                picked.extend(cpus)
+                if len(picked) >= count:
+                    return sorted(picked)
+        # Celá jádra na jednom uzlu nejsou – premium server nedostane sdílená jádra
+        return None
+
+    def _pick_shared(self, count, used):
+        nodes = self._node_order(used)
+        # Nejdřív zkusit jeden uzel, až pak přes více uzlů
+        for candidate_nodes in [[node] for node in nodes] + [nodes]:
+            cores = [core for node in candidate_nodes for core in self.topology.nodes[node]]
+            # Jádra, kde nic neběží, mají přednost; na každém nejdřív jeden hyperthread
+            cores.sort(key=lambda core: sum(1 for cpu in self.topology.cores[core] if cpu in used))
+            rounds = max((len(self.topology.cores[core]) for core in cores), default=0)
+            picked = []
+            for thread_index in range(rounds):
+                for core in cores:
+                    cpus = self.topology.cores[core]
+                    if thread_index < len(cpus) and cpus[thread_index] not in used:
+                        picked.append(cpus[thread_index])
+                        if len(picked) >= count:
+                            return sorted(picked)
+        return None
+
+    # --- persistence -------------------------------------------------------
+
+    def _load(self):
+        if not os.path.exists(self.storage_path):
+            return
+        try:
+            with open(self.storage_path, "r", encoding="utf-8") as allocations_file:
+                data = json.load(allocations_file)
+            if "servers" not in data:
+                # Starší formát: jen {server_id: [cpu]}
+                data = {"servers": data, "shared": []}
+            self._allocations = {
+                int(server_id): [int(cpu) for cpu in cpus] for server_id, cpus in data["servers"].items()
+            }
+            self._shared = [int(cpu) for cpu in data.get("shared") or []]
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"[WARN] Nepodařilo se načíst přidělení jader: {e}")
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
+            temp_path = self.storage_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as allocations_file:
+                json.dump({
+                    "servers": {str(server_id): cpus for server_id, cpus in self._allocations.items()},
+                    "shared": self._shared,
+                }, allocations_file)
+            os.replace(temp_path, self.storage_path)
+        except OSError as e:
+            print(f"[WARN] Nepodařilo se uložit přidělení jader: {e}")
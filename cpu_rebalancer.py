@@ -0,0 +1,162 @@
+# cpu_rebalancer.py
+import threading
+import time
+
+import psutil
+
+
+# Priorita procesu na sdíleném poolu / s vlastními jádry
+if hasattr(psutil, "BELOW_NORMAL_PRIORITY_CLASS"):
+    IDLE_PRIORITY = psutil.BELOW_NORMAL_PRIORITY_CLASS
+    NORMAL_PRIORITY = psutil.NORMAL_PRIORITY_CLASS
+else:
+    IDLE_PRIORITY = 10
+    NORMAL_PRIORITY = 0
+
+# Váha nového vzorku v klouzavém průměru CPU
+CPU_SMOOTHING = 0.3
+
+
+class _ServerLoad:
+    __slots__ = ("cpu", "idle_since", "shared", "waiting")
+
+    def __init__(self, shared):
+        self.cpu = None
+        self.idle_since = None            # od kdy je server nečinný (monotonic)
+        self.shared = shared
+        self.waiting = False              # čeká na volná jádra (hlásí se jen jednou)
+
+
+class CpuRebalancer:
+    """
+    Přesouvá nečinné servery na sdílený pool jader s nižší prioritou a vytížené vrací
+    na vlastní jádra podle tarifu.
+
+    Hystereze: na pool jde server až po `idle_seconds` bez hráčů a pod `idle_cpu` %,
+    zpět hned, jakmile se připojí hráč nebo CPU přeleze `busy_cpu` %. Pásmo mezi
+    prahy stav nemění, takže server nepřeskakuje tam a zpět.
+    """
+
+    def __init__(self, allocator, interval=30, idle_seconds=600, idle_cpu=10, busy_cpu=60, shared_cores=2):
+        self.allocator = allocator
+        self.interval = max(float(interval), 1)
+        self.idle_seconds = idle_seconds
+        self.idle_cpu = idle_cpu
+        self.busy_cpu = busy_cpu
+        self.shared_cores = shared_cores
+        # targets_provider() -> {server_id: {"proc", "cpu_percent", "players", "ready", "cores", "dedicated", "cpus"}}
+        self.targets_provider = None
+        self.on_change = None             # callback(server_id, cpus, shared)
+        self._state = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="cpu-rebalancer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def is_shared(self, server_id):
+        with self._lock:
+            state = self._state.get(server_id)
+            return state is not None and state.shared
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.rebalance_once()
+            except Exception as e:
+                print(f"[WARN] Přerozdělení jader selhalo: {e}")
+
+    def rebalance_once(self, now=None):
+        now = time.monotonic() if now is None else now
+        targets = self.targets_provider() or {}
+        shared_pool = set(self.allocator.shared_cpus())
+
+        with self._lock:
+            for server_id in set(self._state) - set(targets):
+                del self._state[server_id]
+
+            for server_id, target in targets.items():
+                state = self._state.get(server_id)
+                if state is None:
+                    # Po restartu poznáme server na poolu podle jeho afinity
+                    cpus = set(target["cpus"] or [])
+                    state = self._state[server_id] = _ServerLoad(bool(cpus) and cpus <= shared_pool)
+                cpu = target["cpu_percent"]
+                state.cpu = cpu if state.cpu is None else state.cpu * (1 - CPU_SMOOTHING) + cpu * CPU_SMOOTHING
+
+                busy = target["players"] > 0 or state.cpu >= self.busy_cpu or not target["ready"]
+                if busy:
+                    state.idle_since = None
+                elif state.cpu < self.idle_cpu and state.idle_since is None:
+                    state.idle_since = now
+
+                if state.shared and busy:
+                    self._grant(server_id, target, state)
+                elif not state.shared and state.idle_since is not None \
+                        and now - state.idle_since >= self.idle_seconds:
+                    self._share(server_id, target, state)
+
+            if shared_pool and not any(state.shared for state in self._state.values()):
+                # Pool nikdo nepoužívá – jádra patří zpět do volných
+                self.allocator.release_shared()
+
+    def _share(self, server_id, target, state):
+        pool = self.allocator.reserve_shared(self.shared_cores)
+        if not pool:
+            return
+        if not self._apply(target["proc"], pool, IDLE_PRIORITY):
+            return
+        self.allocator.release(server_id)
+        state.shared = True
+        state.idle_since = None
+        print(f"[INFO] Server {server_id} je nečinný, přesunut na sdílená jádra {pool}")
+        self._notify(server_id, pool, True)
+
+    def _grant(self, server_id, target, state):
+        cpus = self.allocator.allocate(server_id, target["cores"], dedicated=target["dedicated"])
+        if cpus is None:
+            if not state.waiting:
+                print(f"[WARN] Server {server_id} je vytížený, ale volná jádra nejsou – zůstává na sdíleném poolu")
+                state.waiting = True
+            return
+        if not self._apply(target["proc"], cpus, NORMAL_PRIORITY):
+            self.allocator.release(server_id)
+            return
+        state.shared = False
+        state.waiting = False
+        print(f"[INFO] Server {server_id} je vytížený, vrácena vlastní jádra {cpus}")
+        self._notify(server_id, cpus, False)
+
+    @staticmethod
+    def _apply(proc, cpus, priority):
+        try:
+            proc.cpu_affinity(cpus)
+        except (psutil.Error, AttributeError, OSError) as e:
+            print(f"[WARN] Nepodařilo se změnit afinitu procesu {proc.pid}: {e}")
+            return False
+        try:
+            proc.nice(priority)
+        except (psutil.Error, OSError):
+            # Zvýšit prioritu zpět smí na Linuxu jen root – afinita stačí
+            pass
+        return True
+
+    def _notify(self, server_id, cpus, shared):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(server_id, cpus, shared)
+        except Exception as e:
+            print(f"[WARN] Callback přerozdělení jader selhal pro server {server_id}: {e}")
@@ -0,0 +1,130 @@
+# crash_watchdog.py
+import glob
+import os
+import threading
+import time
+
+
+# Řádek, který server vypíše při řádném vypnutí (i příkazem /stop ze hry)
+STOPPING_MARKERS = ("Stopping server", "Stopping the server")
+
+ACTION_RESTART = "restart"
+ACTION_CIRCUIT_OPEN = "circuit_open"
+ACTION_DISABLED = "disabled"
+
+
+def is_stopping_line(line):
+    return any(marker in line for marker in STOPPING_MARKERS)
+
+
+def find_crash_report(server_path, since):
+    """Nejnovější soubor v crash-reports/ vytvořený od `since` (time.time()), nebo None."""
+    reports = []
+    for path in glob.glob(os.path.join(server_path, "crash-reports", "*.txt")):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        if mtime >= since:
+            reports.append((mtime, path))
+    return max(reports)[1] if reports else None
+
+
+def classify_exit(exit_code, stopping_requested, saw_stopping_line, crash_report):
+    """
+    Rozliší řádné vypnutí od pádu; vrací None (řádné vypnutí) nebo popis pádu.
+
+    Řádné vypnutí = stop z webu, nebo server sám vypsal "Stopping server" a skončil s kódem 0.
+    Crash report má jinak přednost – server ho zapíše, i když se pak ukončí s kódem 0.
+    """
+    if stopping_requested:
+        return None
+    if crash_report:
+        return f"Crash report {os.path.basename(crash_report)}"
+    if exit_code == 0 and saw_stopping_line:
+        return None
+    if exit_code == 0:
+        return "Server skončil bez hlášky o vypnutí"
+    return f"Proces skončil s kódem {exit_code}"
+
+
+class CrashWatchdog:
+    """
+    Automatický restart spadlých serverů s exponenciálním odstupem a pojistkou proti smyčce pádů.
+
+    Každý pád v okně `window` sekund zdvojnásobí čekání před restartem (base_delay, 2×, 4×…
+    až max_delay). Po `max_crashes` pádech v okně se pojistka rozpojí a server zůstane
+    vypnutý, dokud ho někdo nespustí ručně (reset).
+    """
+
+    def __init__(self, base_delay=10, max_delay=300, window=900, max_crashes=5, enabled=True):
+        self.base_delay = max(base_delay, 0)
+        self.max_delay = max(max_delay, self.base_delay)
+        self.window = window
+        self.max_crashes = max_crashes
+        self.enabled = enabled
+        self.on_restart = None            # callback(server_id) – naplánuje start
+        self._crashes = {}                # {server_id: [time.time() pádů v okně]}
+        self._tripped = set()
+        self._timers = {}                 # {server_id: (threading.Timer, čas restartu)}
+        self._lock = threading.Lock()
+
+    def record_crash(self, server_id, now=None):
+        """Zaznamená pád a naplánuje restart; vrací (akce, odstup v sekundách nebo None)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            crashes = [at for at in self._crashes.get(server_id, []) if now - at < self.window]
+            crashes.append(now)
+            self._crashes[server_id] = crashes
+            if not self.enabled:
+                return ACTION_DISABLED, None
+            if server_id in self._tripped or len(crashes) >= self.max_crashes:
+                self._tripped.add(server_id)
+                self._cancel_locked(server_id)
+                return ACTION_CIRCUIT_OPEN, None
+            delay = min(self.base_delay * 2 ** (len(crashes) - 1), self.max_delay)
+            self._cancel_locked(server_id)
+            timer = threading.Timer(delay, self._restart, args=(server_id,))
+            timer.daemon = True
+            self._timers[server_id] = (timer, now + delay)
+            timer.start()
+            return ACTION_RESTART, delay
+
+    def _restart(self, server_id):
+        with self._lock:
+            self._timers.pop(server_id, None)
+            if server_id in self._tripped:
+                return
+        print(f"[INFO] Automatický restart spadlého serveru {server_id}")
+        try:
+            self.on_restart(server_id)
+        except Exception as e:
+            print(f"[WARN] Automatický restart serveru {server_id} selhal: {e}")
+
+    def cancel(self, server_id):
+        """Zruší naplánovaný restart (server někdo vypnul nebo spustil ručně)."""
+        with self._lock:
+            self._cancel_locked(server_id)
+
+    def _cancel_locked(self, server_id):
+        entry = self._timers.pop(server_id, None)
+        if entry is not None:
+            entry[0].cancel()
+
+    def reset(self, server_id):
+        """Ruční zásah: zapomene pády a spojí pojistku."""
+        with self._lock:
+            self._cancel_locked(server_id)
+            self._crashes.pop(server_id, None)
+            self._tripped.discard(server_id)
+
+    def state(self, server_id, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            crashes = [at for at in self._crashes.get(server_id, []) if now - at < self.window]
+            entry = self._timers.get(server_id)
+            return {
+                "recent_crashes": len(crashes),
+                "circuit_open": server_id in self._tripped,
+                "restart_at": entry[1] if entry else None,
+            }
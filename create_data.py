@@ -10,6 +10,7 @@ import json
 from pathlib import Path
 from models import db, User, Server, BuildType, BuildVersion
 from server_configs import update_server_ports
+from server_creator import write_start_scripts
 from mc_server import BASE_SERVERS_PATH, BASE_BUILD_PATH, get_server_status
 
 class ServerCreatorApp:
@@ -233,41 +234,8 @@ class ServerCreatorApp:
             raise Exception(f"Chyba při kopírování Forge souborů: {str(e)}")
 
     def create_start_bat(self, server_path: str, server_id: int, build_type: str):
-        """Vytvoří startovací batch soubor pro server"""
-        jar_filename = f"server_{server_id}.jar"
-        
-        # SPECIÁLNÍ NASTAVENÍ PRO FORGE
-        if build_type.upper() == "FORGE":
-            bat_content = f"""@echo off
-    title Minecraft Forge Server {server_id}
-    echo Starting Minecraft Forge Server {server_id}...
-
-    set JAVA_HOME=java
-    set MAX_RAM=4G
-    set MIN_RAM=2G
-
-    java -Xmx%MAX_RAM% -Xms%MIN_RAM% -jar "{jar_filename}" nogui
-
-    pause
-    """
-        else:
-            # Původní nastavení pro ostatní buildy
-            bat_content = f"""@echo off
-    title Minecraft Server {server_id}
-    echo Starting Minecraft Server {server_id}...
-
-    set JAVA_HOME=java
-    set MAX_RAM=2G
-    set MIN_RAM=1G
-
-    java -Xmx%MAX_RAM% -Xms%MIN_RAM% -jar "{jar_filename}" nogui
-
-    pause
-    """
-        
-        bat_path = os.path.join(server_path, "start.bat")
-        with open(bat_path, 'w', encoding='utf-8') as bat_file:
-            bat_file.write(bat_content)
+        """Vytvoří startovací skripty pro server (stejné parametry JVM jako webový launcher)"""
+        write_start_scripts(server_path, server_id, build_type, int(self.service_var.get()))
 
     def configure_server_properties(self, server_path: str, server_port: int, query_port: int):
         """Konfiguruje server.properties soubor s příslušnými porty"""
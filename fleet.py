@@ -0,0 +1,212 @@
+# fleet.py
+"""
+Hromadný start a vypnutí serverů (po restartu hostitele nebo před údržbou).
+
+Start jde podle priority tarifu (Premium první) a najednou startuje nejvýš `concurrency`
+serverů – další se spustí, až některý z nich nahlásí "Done" (nebo selže). Vypnutí pošle
+`stop` všem serverům paralelně a co do společného časového limitu neskončí, ukončí násilně.
+
+Použití (se supervisorem běží operace v něm, jinak v tomto procesu):
+    python fleet.py boot                       # všechny zastavené servery
+    python fleet.py boot --level 3 --concurrency 2
+    python fleet.py shutdown --budget 90
+    python fleet.py shutdown --server 4 --server 7
+"""
+import argparse
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+ACTION_BOOT = "boot"
+ACTION_SHUTDOWN = "shutdown"
+
+RUN_RUNNING = "running"
+RUN_FINISHED = "finished"
+
+RUNS_KEPT = 20
+
+
+def boot_order(servers):
+    """Servery seřazené pro start: vyšší tarif dřív, v rámci tarifu podle ID."""
+    return sorted(servers, key=lambda server: (-(server.service_level or 1), server.id))
+
+
+class FleetRun:
+    """Jeden hromadný start nebo vypnutí a výsledek pro každý server."""
+
+    def __init__(self, action, server_ids, **options):
+        self.id = uuid.uuid4().hex[:12]
+        self.action = action
+        self.options = options
+        self.status = RUN_RUNNING
+        self.servers = OrderedDict(
+            (server_id, {"status": "pending", "error": None, "seconds": None}) for server_id in server_ids
+        )
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update(self, server_id, **values):
+        with self._lock:
+            self.servers[server_id].update(values)
+
+    def to_dict(self):
+        with self._lock:
+            servers = [{"server_id": server_id, **entry} for server_id, entry in self.servers.items()]
+        counts = {}
+        for entry in servers:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return {
+            "id": self.id,
+            "action": self.action,
+            "status": self.status,
+            "options": dict(self.options),
+            "servers": servers,
+            "counts": counts,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class FleetOrchestrator:
+    """
+    Spouští hromadné operace na pozadí; najednou běží nejvýš jedna.
+
+    start_server(server_id) -> (success, error) spustí server a vrátí se až po "Done" nebo pádu,
+    stop_server(server_id, timeout) -> (success, error) pošle stop a po timeoutu proces ukončí.
+    Obě se volají v app contextu.
+    """
+
+    def __init__(self, start_server, stop_server, keep=RUNS_KEPT):
+        self.start_server = start_server
+        self.stop_server = stop_server
+        self.keep = keep
+        self._runs = OrderedDict()
+        self._active = None
+        self._lock = threading.Lock()
+
+    def boot(self, server_ids, concurrency, app):
+        """Vrátí (run, created) – created je False, pokud už jiná hromadná operace běží."""
+        concurrency = max(int(concurrency), 1)
+        return self._submit(ACTION_BOOT, server_ids, self._boot, app, concurrency=concurrency)
+
+    def shutdown(self, server_ids, budget_seconds, app):
+        budget_seconds = max(float(budget_seconds), 1)
+        return self._submit(ACTION_SHUTDOWN, server_ids, self._shutdown, app, budget_seconds=budget_seconds)
+
+    def get(self, run_id):
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def latest(self):
+        with self._lock:
+            return next(reversed(self._runs.values()), None)
+
+    def _submit(self, action, server_ids, func, app, **options):
+        with self._lock:
+            if self._active is not None and self._active.status == RUN_RUNNING:
+                return self._active, False
+            run = FleetRun(action, server_ids, **options)
+            self._runs[run.id] = run
+            self._active = run
+            while len(self._runs) > self.keep:
+                self._runs.popitem(last=False)
+        threading.Thread(target=self._run, args=(run, func, app), name=f"fleet-{action}", daemon=True).start()
+        return run, True
+
+    def _run(self, run, func, app):
+        try:
+            func(run, app)
+        except Exception as e:
+            print(f"[ERROR] Hromadná operace {run.action} selhala: {e}")
+        run.finished_at = time.time()
+        run.status = RUN_FINISHED
+        counts = run.to_dict()["counts"]
+        print(f"[INFO] Hromadná operace {run.action} dokončena: {counts}")
+
+    def _call(self, server_id, app, func, *args):
+        started = time.monotonic()
+        try:
+            with app.app_context():
+                success, error = func(server_id, *args)
+        except Exception as e:
+            success, error = False, str(e)
+        return success, error, round(time.monotonic() - started, 1)
+
+    def _boot(self, run, app):
+        concurrency = run.options["concurrency"]
+
+        def boot_one(server_id):
+            run.update(server_id, status="starting")
+            success, error, seconds = self._call(server_id, app, self.start_server)
+            run.update(server_id, status="ready" if success else "failed", error=error, seconds=seconds)
+
+        # Pool s `concurrency` vlákny: další server startuje, až předchozí dostartuje (pořadí = priorita)
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fleet-boot") as executor:
+            list(executor.map(boot_one, list(run.servers)))
+
+    def _shutdown(self, run, app):
+        deadline = time.monotonic() + run.options["budget_seconds"]
+
+        def stop_one(server_id):
+            run.update(server_id, status="stopping")
+            timeout = max(deadline - time.monotonic(), 1)
+            success, error, seconds = self._call(server_id, app, self.stop_server, timeout)
+            # stop_server se po vypršení limitu vrací až po násilném ukončení procesu
+            status = "failed" if not success else ("killed" if seconds >= timeout else "stopped")
+            run.update(server_id, status=status, error=error, seconds=seconds)
+
+        with ThreadPoolExecutor(max_workers=max(len(run.servers), 1), thread_name_prefix="fleet-stop") as executor:
+            list(executor.map(stop_one, list(run.servers)))
+
+
+def _print_progress(run, printed):
+    for entry in run["servers"]:
+        key = (entry["server_id"], entry["status"])
+        if key in printed or entry["status"] == "pending":
+            continue
+        printed.add(key)
+        line = f"[INFO] Server {entry['server_id']}: {entry['status']}"
+        if entry["seconds"] is not None:
+            line += f" ({entry['seconds']} s)"
+        if entry["error"]:
+            line += f" – {entry['error']}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hromadný start a vypnutí Minecraft serverů.")
+    parser.add_argument("action", choices=(ACTION_BOOT, ACTION_SHUTDOWN))
+    parser.add_argument("--server", type=int, action="append", help="ID serveru (lze opakovat)")
+    parser.add_argument("--level", type=int, action="append", help="jen servery této úrovně služby (lze opakovat)")
+    parser.add_argument("--concurrency", type=int, help="kolik serverů startuje najednou")
+    parser.add_argument("--budget", type=float, help="společný limit pro vypnutí všech serverů (s)")
+    args = parser.parse_args(argv)
+
+    from app import app
+    from mc_server import get_fleet_run, submit_fleet_boot, submit_fleet_shutdown
+
+    with app.app_context():
+        if args.action == ACTION_BOOT:
+            run, created = submit_fleet_boot(args.server, args.level, args.concurrency)
+        else:
+            run, created = submit_fleet_shutdown(args.server, args.level, args.budget)
+        if not created:
+            print(f"[ERROR] Už běží jiná hromadná operace ({run['action']}, {run['id']})")
+            return 1
+        print(f"[INFO] {run['action']}: {len(run['servers'])} serverů")
+        printed = set()
+        while run["status"] == RUN_RUNNING:
+            time.sleep(1)
+            run = get_fleet_run(run["id"])
+            _print_progress(run, printed)
+    failed = run["counts"].get("failed", 0)
+    print(f"[INFO] Hotovo: {run['counts']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
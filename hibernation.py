@@ -0,0 +1,372 @@
+# hibernation.py
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+
+# Klient, který do té doby nic nepošle, se odpojí
+CLIENT_TIMEOUT = 5.0
+MAX_PACKET_BYTES = 32 * 1024
+
+NEXT_STATE_STATUS = 1
+NEXT_STATE_LOGIN = 2
+NEXT_STATE_TRANSFER = 3
+
+
+class _ProtocolError(Exception):
+    pass
+
+
+def _read_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise _ProtocolError("Klient uzavřel spojení")
+        data += chunk
+    return bytes(data)
+
+
+def _read_varint_sock(sock, first=None):
+    value = 0
+    for position in range(5):
+        byte = first if position == 0 and first is not None else _read_exact(sock, 1)[0]
+        value |= (byte & 0x7F) << (7 * position)
+        if not byte & 0x80:
+            return value
+    raise _ProtocolError("Příliš dlouhý VarInt")
+
+
+def _read_varint(data, offset):
+    value = 0
+    for position in range(5):
+        if offset >= len(data):
+            raise _ProtocolError("Neúplný paket")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << (7 * position)
+        if not byte & 0x80:
+            return value, offset
+    raise _ProtocolError("Příliš dlouhý VarInt")
+
+
+def _varint(value):
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _string(text):
+    data = text.encode("utf-8")
+    return _varint(len(data)) + data
+
+
+def _packet(packet_id, payload=b""):
+    body = _varint(packet_id) + payload
+    return _varint(len(body)) + body
+
+
+def _read_packet(sock, first=None):
+    length = _read_varint_sock(sock, first)
+    if length <= 0 or length > MAX_PACKET_BYTES:
+        raise _ProtocolError(f"Neplatná délka paketu {length}")
+    data = _read_exact(sock, length)
+    packet_id, offset = _read_varint(data, 0)
+    return packet_id, data[offset:]
+
+
+def parse_handshake(payload):
+    """(protocol, adresa, port, next_state) z těla handshake paketu"""
+    protocol, offset = _read_varint(payload, 0)
+    address_length, offset = _read_varint(payload, offset)
+    address = payload[offset:offset + address_length].decode("utf-8", errors="replace")
+    offset += address_length
+    port = struct.unpack(">H", payload[offset:offset + 2])[0]
+    next_state, _ = _read_varint(payload, offset + 2)
+    return protocol, address, port, next_state
+
+
+class SleepListener:
+    """
+    Zástupce uspaného serveru na jeho herním portu.
+
+    Na status ping odpoví MOTD "spí", na pokus o přihlášení hráče odpojí se zprávou,
+    že se server probouzí, a zavolá on_wake(server_id). Po probuzení port uvolní
+    až start serveru (close()), takže mezitím vidí hráči stav "probouzí se".
+    """
+
+    def __init__(self, server_id, port, motd="", max_players=20, on_wake=None, host=""):
+        self.server_id = server_id
+        self.port = port
+        self.motd = motd
+        self.max_players = max_players
+        self.on_wake = on_wake
+        self.waking = False
+        self._closed = False
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if os.name != "nt":
+            # Na Windows by SO_REUSEADDR dovolilo obsadit port dvakrát (i JVM vedle zástupce)
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self._sock.bind((host, port))
+            self._sock.listen(16)
+        except OSError:
+            self._sock.close()
+            raise
+        self._thread = threading.Thread(target=self._accept_loop, name=f"hibernate-{port}", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._closed = True
+        try:
+            # Bez shutdown by na Linuxu blokující accept() držel port obsazený i po close()
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        try:
+            conn.settimeout(CLIENT_TIMEOUT)
+            first = _read_exact(conn, 1)[0]
+            if first == 0xFE:
+                # Legacy ping (klienti < 1.7) – neodpovídáme
+                return
+            packet_id, payload = _read_packet(conn, first)
+            if packet_id != 0x00:
+                return
+            protocol, _, _, next_state = parse_handshake(payload)
+            if next_state == NEXT_STATE_STATUS:
+                self._status(conn, protocol)
+            elif next_state in (NEXT_STATE_LOGIN, NEXT_STATE_TRANSFER):
+                self._login(conn)
+        except (OSError, _ProtocolError, struct.error):
+            pass
+        finally:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _status(self, conn, protocol):
+        packet_id, _ = _read_packet(conn)
+        if packet_id != 0x00:
+            return
+        if self.waking:
+            description = f"§e⏳ Server se probouzí, za chvíli bude online\n§7{self.motd}"
+            version = "Probouzí se"
+        else:
+            description = f"§7💤 {self.motd}\n§8Server spí – připoj se a probudí se"
+            version = "Spí"
+        status = {
+            # Stejný protokol jako klient, ať seznam serverů nehlásí nekompatibilní verzi
+            "version": {"name": version, "protocol": protocol},
+            "players": {"max": self.max_players, "online": 0, "sample": []},
+            "description": {"text": description},
+        }
+        conn.sendall(_packet(0x00, _string(json.dumps(status, ensure_ascii=False))))
+        packet_id, payload = _read_packet(conn)
+        if packet_id == 0x01:
+            conn.sendall(_packet(0x01, payload[:8]))
+
+    def _login(self, conn):
+        if self.waking:
+            message = "Server se právě probouzí, připoj se znovu za chvíli."
+        else:
+            message = "Server spal a právě se probouzí. Připoj se znovu za chvíli."
+        conn.sendall(_packet(0x00, _string(json.dumps({"text": message}, ensure_ascii=False))))
+        if self.waking or self._closed:
+            return
+        self.waking = True
+        print(f"[INFO] Hráč se připojuje na uspaný server {self.server_id}, probouzím")
+        if self.on_wake is not None:
+            try:
+                self.on_wake(self.server_id)
+            except Exception as e:
+                self.waking = False
+                print(f"[WARN] Probuzení serveru {self.server_id} selhalo: {e}")
+
+
+class HibernationManager:
+    """
+    Uspává servery bez hráčů a budí je při pokusu o připojení.
+
+    Server, který je `idle_seconds` připravený a bez hráčů, se zastaví (on_idle) a na
+    jeho port se postaví SleepListener. Uspané servery se ukládají na disk, takže se
+    zástupci po restartu webu obnoví (restore).
+    """
+
+    def __init__(self, storage_path, idle_seconds=1800, interval=60):
+        self.storage_path = storage_path
+        self.idle_seconds = idle_seconds
+        self.interval = max(float(interval), 1)
+        # targets_provider() -> {server_id: {"players": int, "ready": bool, "allowed": bool}}
+        self.targets_provider = None
+        self.on_idle = None               # callback(server_id) – naplánuje uspání
+        self.on_wake = None               # callback(server_id) – naplánuje start
+        self._idle_since = {}
+        self._sleeping = {}               # {server_id: {"port", "motd", "max_players"}}
+        self._listeners = {}              # {server_id: SleepListener}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._load()
+
+    def ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="hibernation", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                print(f"[WARN] Kontrola nečinných serverů selhala: {e}")
+
+    def check_once(self, now=None):
+        now = time.monotonic() if now is None else now
+        targets = self.targets_provider() or {}
+        idle = []
+        with self._lock:
+            for server_id in set(self._idle_since) - set(targets):
+                del self._idle_since[server_id]
+            for server_id, target in targets.items():
+                if not target["allowed"] or not target["ready"] or target["players"] > 0:
+                    self._idle_since.pop(server_id, None)
+                    continue
+                since = self._idle_since.setdefault(server_id, now)
+                if now - since >= self.idle_seconds:
+                    idle.append(server_id)
+                    del self._idle_since[server_id]
+        for server_id in idle:
+            print(f"[INFO] Server {server_id} je {self.idle_seconds // 60} min bez hráčů, uspávám")
+            if self.on_idle is not None:
+                self.on_idle(server_id)
+
+    # --- uspané servery ----------------------------------------------------
+
+    def sleep(self, server_id, port, motd="", max_players=20):
+        """Postaví zástupce na port zastaveného serveru; vrací False, pokud port nejde obsadit."""
+        entry = {"port": port, "motd": motd, "max_players": max_players}
+        if not self._open_listener(server_id, entry):
+            return False
+        with self._lock:
+            self._sleeping[server_id] = entry
+            self._save()
+        return True
+
+    def release(self, server_id):
+        """Zavře zástupce (před startem serveru nebo při ručním vypnutí); vrací True, pokud server spal."""
+        with self._lock:
+            listener = self._listeners.pop(server_id, None)
+            was_sleeping = self._sleeping.pop(server_id, None) is not None
+            if was_sleeping:
+                self._save()
+        if listener is not None:
+            listener.close()
+        return was_sleeping
+
+    def is_sleeping(self, server_id):
+        with self._lock:
+            return server_id in self._sleeping
+
+    def wake_failed(self, server_id):
+        """Start po probuzení selhal – zástupce znovu hlásí "spí" a další připojení zkusí start."""
+        with self._lock:
+            listener = self._listeners.get(server_id)
+        if listener is not None:
+            listener.waking = False
+
+    def is_waking(self, server_id):
+        with self._lock:
+            listener = self._listeners.get(server_id)
+        return listener is not None and listener.waking
+
+    def restore(self, running_ids=()):
+        """
+        Po startu webu obnoví zástupce uspaných serverů (běžící servery ze seznamu vyřadí).
+
+        Port, který nejde obsadit (např. ho drží jiný proces webu), záznam nemaže – server
+        zůstává uspaný a zástupce se obnoví při příštím restore.
+        """
+        with self._lock:
+            entries = dict(self._sleeping)
+        for server_id, entry in entries.items():
+            if server_id in running_ids:
+                self.release(server_id)
+            elif server_id not in self._listeners and not self._open_listener(server_id, entry):
+                print(f"[WARN] Uspaný server {server_id} zatím nemá zástupce, záznam zůstává uložen")
+
+    def _open_listener(self, server_id, entry):
+        try:
+            listener = SleepListener(
+                server_id, entry["port"], entry.get("motd") or "", entry.get("max_players") or 20,
+                on_wake=self._wake
+            )
+        except OSError as e:
+            print(f"[WARN] Nelze obsadit port {entry['port']} uspaného serveru {server_id}: {e}")
+            return False
+        with self._lock:
+            previous = self._listeners.pop(server_id, None)
+            self._listeners[server_id] = listener
+        if previous is not None:
+            previous.close()
+        return True
+
+    def _wake(self, server_id):
+        if self.on_wake is None:
+            raise RuntimeError("Není nastaven callback pro probuzení")
+        self.on_wake(server_id)
+
+    # --- persistence -------------------------------------------------------
+
+    def _load(self):
+        if not os.path.exists(self.storage_path):
+            return
+        try:
+            with open(self.storage_path, "r", encoding="utf-8") as storage_file:
+                data = json.load(storage_file)
+            self._sleeping = {int(server_id): entry for server_id, entry in data.items()}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"[WARN] Nepodařilo se načíst uspané servery: {e}")
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
+            temp_path = self.storage_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as storage_file:
+                json.dump({str(server_id): entry for server_id, entry in self._sleeping.items()}, storage_file)
+            os.replace(temp_path, self.storage_path)
+        except OSError as e:
+            print(f"[WARN] Nepodařilo se uložit uspané servery: {e}")
@@ -0,0 +1,106 @@
+# jvm_profiles.py
+import os
+
+from app_config import JVM_LARGE_PAGES, JVM_ZGC_MIN_HEAP_MB
+
+
+# Výchozí profil se volí podle velikosti haldy (viz resolve_profile)
+PROFILE_AUTO = "auto"
+
+# Aikarovy G1 příznaky (https://docs.papermc.io/paper/aikars-flags) – osvědčené pro MC servery
+_AIKAR_COMMON = [
+    "-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled", "-XX:MaxGCPauseMillis=200",
+    "-XX:+UnlockExperimentalVMOptions", "-XX:+DisableExplicitGC", "-XX:+AlwaysPreTouch",
+    "-XX:G1HeapWastePercent=5", "-XX:G1MixedGCCountTarget=4", "-XX:G1MixedGCLiveThresholdPercent=90",
+    "-XX:G1RSetUpdatingPauseTimePercent=5", "-XX:SurvivorRatio=32", "-XX:+PerfDisableSharedMem",
+    "-XX:MaxTenuringThreshold=1",
+    "-Dusing.aikars.flags=https://mcflags.emc.gs", "-Daikars.new.flags=true",
+]
+# Nad 12 GB haldy doporučuje Aikar větší mladou generaci a regiony
+_AIKAR_SMALL = [
+    "-XX:G1NewSizePercent=30", "-XX:G1MaxNewSizePercent=40", "-XX:G1HeapRegionSize=8M",
+    "-XX:G1ReservePercent=20", "-XX:InitiatingHeapOccupancyPercent=15",
+]
+_AIKAR_LARGE = [
+    "-XX:G1NewSizePercent=40", "-XX:G1MaxNewSizePercent=50", "-XX:G1HeapRegionSize=16M",
+    "-XX:G1ReservePercent=15", "-XX:InitiatingHeapOccupancyPercent=20",
+]
+_AIKAR_LARGE_HEAP_MB = 12 * 1024
+
+# ZGC drží pauzy pod milisekundou i u velkých hald (vyžaduje Javu 17+)
+_ZGC = [
+    "-XX:+UseZGC", "-XX:+AlwaysPreTouch", "-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem",
+]
+
+PROFILES = {
+    PROFILE_AUTO: {"label": "Automaticky podle tarifu"},
+    "aikar": {"label": "G1 (Aikar)"},
+    "zgc": {"label": "ZGC (velké haldy)"},
+}
+
+# Doplňkové vlastnosti podle typu buildu
+BUILD_TYPE_PROPERTIES = {
+    # Modpacky se synchronizují s klientem déle než výchozích 30 s
+    "FORGE": ["-Dfml.readTimeout=180"],
+    "NEOFORGE": ["-Dfml.readTimeout=180"],
+}
+
+_large_pages_flags = None
+
+
+def resolve_profile(profile, heap_mb):
+    """Konkrétní profil ("aikar"/"zgc") pro uložený profil serveru (None = auto)."""
+    if profile in PROFILES and profile != PROFILE_AUTO:
+        return profile
+    return "zgc" if JVM_ZGC_MIN_HEAP_MB and heap_mb >= JVM_ZGC_MIN_HEAP_MB else "aikar"
+
+
+def large_pages_flags():
+    """Příznaky pro velké stránky, pokud je systém nabízí (výsledek se cachuje)."""
+    global _large_pages_flags
+    if _large_pages_flags is None:
+        _large_pages_flags = _detect_large_pages()
+    return list(_large_pages_flags)
+
+
+def _detect_large_pages():
+    setting = (JVM_LARGE_PAGES or "auto").strip().lower()
+    if setting in ("0", "false", "no", "off"):
+        return []
+    if setting in ("1", "true", "yes", "on"):
+        # Na Windows vyžaduje oprávnění "Lock pages in memory" pro účet serveru
+        return ["-XX:+UseLargePages"]
+    if not os.path.exists("/proc/meminfo"):
+        return []
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as meminfo:
+            for line in meminfo:
+                if line.startswith("HugePages_Total:") and int(line.split()[1]) > 0:
+                    # Vyhrazené huge pages (vm.nr_hugepages)
+                    return ["-XX:+UseLargePages"]
+        with open("/sys/kernel/mm/transparent_hugepage/enabled", "r", encoding="ascii") as thp:
+            if "[never]" not in thp.read():
+                return ["-XX:+UseTransparentHugePages"]
+    except (OSError, ValueError):
+        pass
+    return []
+
+
+def jvm_flags(level, build_type, profile=None):
+    """Parametry JVM (bez java a -jar) pro úroveň služby, typ buildu a profil serveru."""
+    heap_mb = level["heap_mb"]
+    resolved = resolve_profile(profile, heap_mb)
+    # Xms = Xmx: halda se alokuje (a s AlwaysPreTouch i namapuje) hned při startu
+    flags = [f"-Xms{heap_mb}M", f"-Xmx{heap_mb}M"]
+    if resolved == "zgc":
+        flags += _ZGC
+    else:
+        flags += _AIKAR_COMMON + (_AIKAR_LARGE if heap_mb >= _AIKAR_LARGE_HEAP_MB else _AIKAR_SMALL)
+    flags += large_pages_flags()
+    flags += BUILD_TYPE_PROPERTIES.get((build_type or "").upper(), [])
+    return flags
+
+
+def java_command(java_executable, server_jar, level, build_type, profile=None, extra_flags=()):
+    """Celý příkaz pro spuštění serveru – stejný pro launcher i generované skripty."""
+    return [java_executable] + jvm_flags(level, build_type, profile) + list(extra_flags) + ["-jar", server_jar, "nogui"]
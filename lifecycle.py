@@ -0,0 +1,168 @@
+# lifecycle.py
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Stavy serveru
+STATE_STOPPED = "stopped"
+STATE_STARTING = "starting"
+STATE_READY = "ready"
+STATE_STOPPING = "stopping"
+STATE_CRASHED = "crashed"
+
+# Stavy jobu
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Řádek připravenosti: "Done (12.345s)! For help, type "help"" (některé locale používají čárku)
+DONE_RE = re.compile(r"Done \((\d+(?:[.,]\d+)?)s\)!")
+
+JOBS_KEPT = 500
+
+
+def parse_ready_line(line):
+    """Vrátí dobu startu v sekundách, pokud je řádek hláškou o dokončení startu, jinak None."""
+    if "Done (" not in line:
+        return None
+    match = DONE_RE.search(line)
+    if not match:
+        return None
+    return float(match.group(1).replace(",", "."))
+
+
+class ServerState:
+    """
+    Stavový automat jednoho serveru: starting -> ready -> stopping -> stopped / crashed.
+
+    Přechody nastavují události (spuštění procesu, řádek "Done", konec procesu),
+    jobs na ně čekají přes Condition místo pevných sleepů.
+    """
+
+    def __init__(self):
+        self.state = STATE_STOPPED
+        self.changed_at = time.time()
+        self.startup_seconds = None       # doba startu podle hlášky "Done (x s)!"
+        self.exit_code = None
+        self._condition = threading.Condition()
+
+    def set(self, state, **info):
+        with self._condition:
+            self.state = state
+            self.changed_at = time.time()
+            if state == STATE_STARTING:
+                self.startup_seconds = None
+                self.exit_code = None
+            for key, value in info.items():
+                setattr(self, key, value)
+            self._condition.notify_all()
+
+    def transition(self, from_states, state, **info):
+        """Nastaví stav jen pokud je aktuální stav v from_states; vrací True při změně."""
+        with self._condition:
+            if self.state not in from_states:
+                return False
+            self.set(state, **info)
+            return True
+
+    def wait_for(self, states, timeout):
+        """Počká, až server dosáhne některého ze stavů; vrací aktuální stav (i po timeoutu)."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.state in states, timeout)
+            return self.state
+
+    def to_dict(self):
+        return {
+            "state": self.state,
+            "changed_at": self.changed_at,
+            "startup_seconds": self.startup_seconds,
+            "exit_code": self.exit_code,
+        }
+
+
+class LifecycleJob:
+    """Jedna operace start / stop / restart běžící na pozadí."""
+
+    def __init__(self, server_id, action):
+        self.id = uuid.uuid4().hex[:12]
+        self.server_id = server_id
+        self.action = action
+        self.status = JOB_QUEUED
+        self.error = None
+        self.result = {}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def active(self):
+        return self.status in (JOB_QUEUED, JOB_RUNNING)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "server_id": self.server_id,
+            "action": self.action,
+            "status": self.status,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRunner:
+    """
+    Spouští lifecycle operace mimo WSGI vlákna.
+
+    Na jeden server běží nejvýš jeden job; další požadavek dostane ten aktivní.
+    Operace se volá jako func(job) v app contextu a vrací (success, error).
+    """
+
+    def __init__(self, max_workers=4, keep=JOBS_KEPT):
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lifecycle")
+        self._jobs = OrderedDict()
+        self._active = {}                 # {server_id: LifecycleJob}
+        self._lock = threading.Lock()
+
+    def submit(self, server_id, action, func, app):
+        """Vrátí (job, created) – created je False, pokud už pro server jiný job běží."""
+        with self._lock:
+            active = self._active.get(server_id)
+            if active is not None and active.active:
+                return active, False
+            job = LifecycleJob(server_id, action)
+            self._jobs[job.id] = job
+            self._active[server_id] = job
+            while len(self._jobs) > self.keep:
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._run, job, func, app)
+        return job, True
+
+    def _run(self, job, func, app):
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        try:
+            with app.app_context():
+                success, error = func(job)
+        except Exception as e:
+            print(f"[ERROR] Job {job.action} serveru {job.server_id} selhal: {e}")
+            success, error = False, str(e)
+        job.error = error
+        job.finished_at = time.time()
+        job.status = JOB_SUCCEEDED if success else JOB_FAILED
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self, server_id):
+        with self._lock:
+            return self._active.get(server_id)
@@ -0,0 +1,214 @@
+# log_reader.py
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+
+# Kontrolní bod u prostých logů každých N řádků (jen dvojice čísel – levné)
+PLAIN_CHECKPOINT_LINES = 1000
+# Kontrolní bod u .gz po každých N bajtech dekomprimovaného textu (drží kopii stavu zlib ~ desítky kB)
+GZIP_CHECKPOINT_BYTES = 4 * 1024 * 1024
+READ_CHUNK = 64 * 1024
+# Kolik indexů držet v paměti (LRU)
+INDEX_CACHE_SIZE = 16
+
+
+class _Checkpoint:
+    __slots__ = ("line_no", "offset", "decompressor", "carry")
+
+    def __init__(self, line_no, offset, decompressor=None, carry=b""):
+        self.line_no = line_no            # číslo řádku, který začíná v tomto bodě
+        self.offset = offset              # bajtový offset v souboru (u .gz komprimovaný)
+        self.decompressor = decompressor  # kopie zlib stavu v `offset` (jen .gz)
+        self.carry = carry                # začátek řádku `line_no` dekomprimovaný před `offset` (jen .gz)
+
+
+class LogIndex:
+    """
+    Řídký index řádků jednoho logu.
+
+    U prostého souboru jsou to bajtové offsety každého N-tého řádku, u .log.gz
+    kopie stavu dekompresoru v pravidelných bodech – stránka uprostřed nebo konec
+    logu se pak čte od nejbližšího bodu, ne od začátku souboru.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.is_gzip = path.endswith(".gz")
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.size = 0
+        self.mtime = 0
+        self.inode = None
+        self.total_lines = 0
+        self.checkpoints = [_Checkpoint(0, 0, zlib.decompressobj(31) if self.is_gzip else None)]
+        self._scanned = 0                 # kam až je prostý soubor zaindexovaný
+        self._last_line_start = 0
+        self._ends_with_newline = True
+
+    def is_current(self, stat):
+        return stat.st_size == self.size and stat.st_mtime == self.mtime and stat.st_ino == self.inode
+
+    def build(self, stat):
+        if self.is_gzip:
+            self._reset()
+            self._build_gzip()
+        else:
+            # Přepsaný / zkrácený soubor indexujeme znovu, rostoucí (latest.log) jen doindexujeme
+            if stat.st_ino != self.inode or stat.st_size < self._scanned:
+                self._reset()
+            self._extend_plain()
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.inode = stat.st_ino
+
+    def _extend_plain(self):
+        line_no = self.total_lines
+        offset = self._scanned
+        if not self._ends_with_newline:
+            # Poslední řádek nebyl dopsaný – načteme ho znovu celý
+            line_no -= 1
+            offset = self._last_line_start
+        with open(self.path, "rb") as log_file:
+            log_file.seek(offset)
+            for line in log_file:
+                if line_no % PLAIN_CHECKPOINT_LINES == 0 and line_no > self.checkpoints[-1].line_no:
+                    self.checkpoints.append(_Checkpoint(line_no, offset))
+                self._last_line_start = offset
+                self._ends_with_newline = line.endswith(b"\n")
+                offset += len(line)
+                line_no += 1
+        self._scanned = offset
+        self.total_lines = line_no
+
+    def _build_gzip(self):
+        line_no = 0
+        carry = b""
+        since_checkpoint = 0
+        for offset, decompressor, data in _iter_gzip(self.path, self.checkpoints[0]):
+            line_no += data.count(b"\n")
+            last_newline = data.rfind(b"\n")
+            carry = data[last_newline + 1:] if last_newline >= 0 else carry + data
+            since_checkpoint += len(data)
+            if since_checkpoint >= GZIP_CHECKPOINT_BYTES and decompressor is not None:
+                self.checkpoints.append(_Checkpoint(line_no, offset, decompressor.copy(), carry))
+                since_checkpoint = 0
+        self.total_lines = line_no + (1 if carry else 0)
+
+    def read(self, offset, limit):
+        """Vrátí seznam řádků [offset, offset + limit)."""
+        offset = max(offset, 0)
+        if limit <= 0 or offset >= self.total_lines:
+            return []
+        checkpoint = self.checkpoints[0]
+        for candidate in self.checkpoints:
+            if candidate.line_no > offset:
+                break
+            checkpoint = candidate
+
+        lines = []
+        line_no = checkpoint.line_no
+        for raw_line in self._iter_lines(checkpoint):
+            if line_no >= offset:
+                lines.append(raw_line.rstrip(b"\r").decode("utf-8", errors="replace"))
+                if len(lines) >= limit:
+                    break
+            line_no += 1
+        return lines
+
+    def _iter_lines(self, checkpoint):
+        if not self.is_gzip:
+            with open(self.path, "rb") as log_file:
+                log_file.seek(checkpoint.offset)
+                for line in log_file:
+                    yield line.rstrip(b"\n")
+            return
+
+        carry = checkpoint.carry
+        for _, _, data in _iter_gzip(self.path, checkpoint):
+            if not data:
+                continue
+            parts = (carry + data).split(b"\n")
+            carry = parts.pop()
+            yield from parts
+        if carry:
+            yield carry
+
+
+def _iter_gzip(path, checkpoint):
+    """
+    Streamově dekomprimuje .gz od kontrolního bodu (zvládá i vícečlenné gzip soubory).
+
+    Pro každý načtený blok vrací (offset, dekompresor, data), kde `offset` a
+    `dekompresor` popisují stav PO zpracování bloku – lze je uložit jako kontrolní bod.
+    """
+    decompressor = checkpoint.decompressor.copy()
+    offset = checkpoint.offset
+    with open(path, "rb") as gz_file:
+        gz_file.seek(offset)
+        while True:
+            chunk = gz_file.read(READ_CHUNK)
+            if not chunk:
+                return
+            offset += len(chunk)
+            data = b""
+            while chunk:
+                if decompressor.eof:
+                    decompressor = zlib.decompressobj(31)
+                try:
+                    data += decompressor.decompress(chunk)
+                except zlib.error:
+                    # Poškozený konec nebo padding za posledním členem – dál nečteme
+                    yield offset, None, data
+                    return
+                chunk = decompressor.unused_data if decompressor.eof else b""
+            yield offset, decompressor, data
+
+
+class LogReader:
+    """Stránkované čtení logů se sdílenou LRU cache indexů."""
+
+    def __init__(self, cache_size=INDEX_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_index(self, path):
+        with self._lock:
+            index = self._indexes.get(path)
+            if index is None:
+                index = LogIndex(path)
+                self._indexes[path] = index
+            self._indexes.move_to_end(path)
+            while len(self._indexes) > self.cache_size:
+                self._indexes.popitem(last=False)
+            return index
+
+    def read_page(self, path, offset=0, limit=1000, tail=None):
+        """
+        Vrátí stránku logu jako slovník.
+
+        `tail` (počet řádků od konce) má přednost před `offset`.
+        """
+        index = self._get_index(path)
+        # Zámek jen nad jedním souborem – indexace velkého .gz neblokuje ostatní logy
+        with index.lock:
+            stat = os.stat(path)
+            if not index.is_current(stat):
+                index.build(stat)
+            total = index.total_lines
+            if tail is not None:
+                offset = max(total - tail, 0)
+                limit = min(limit, tail)
+            lines = index.read(offset, limit)
+        return {
+            "offset": offset,
+            "limit": limit,
+            "total_lines": total,
+            "lines": lines,
+            "has_more_before": offset > 0,
+            "has_more_after": offset + len(lines) < total,
+        }
@@ -0,0 +1,329 @@
+# log_search.py
+import gzip
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+
+# Kolik řádků vložit v jedné transakci při indexaci
+INSERT_BATCH = 5000
+DEFAULT_HIT_LIMIT = 200
+
+# Začátek řádku: vanilla/Paper "[12:34:56] [Server thread/INFO]", Paper konzole "[12:34:56 INFO]",
+# Forge "[12Mar2024 12:34:56.789] [Server thread/INFO]"
+_TIME_RE = re.compile(r"^\[(?:\d{2}[A-Za-z]{3}\d{4} )?(\d{2}):(\d{2}):(\d{2})")
+_LEVEL_RE = re.compile(r"[/\s\[](TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|SEVERE)\]")
+# Archivované logy se jmenují podle data: 2024-03-12-1.log.gz
+_FILE_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-\d+\.log(?:\.gz)?$")
+
+LEVELS = ("TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL")
+_LEVEL_ALIASES = {"WARNING": "WARN", "SEVERE": "ERROR"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    inode INTEGER,
+    size INTEGER,
+    mtime REAL,
+    offset INTEGER,         -- kolik bajtů je zaindexováno (jen prosté logy)
+    lines INTEGER,
+    day TEXT,               -- den posledního řádku (YYYY-MM-DD), odsud indexace pokračuje
+    last_tod INTEGER,       -- čas posledního řádku v s od půlnoci (kvůli přechodu přes půlnoc)
+    last_ts INTEGER,
+    last_level TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    line_no INTEGER NOT NULL,
+    ts INTEGER,
+    level TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_file ON entries(file);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    text, content='entries', content_rowid='id'
+);
+"""
+
+
+def parse_level(line):
+    match = _LEVEL_RE.search(line, 0, 120)
+    if not match:
+        return None
+    level = match.group(1)
+    return _LEVEL_ALIASES.get(level, level)
+
+
+def build_match_query(query):
+    """Převede uživatelský dotaz na bezpečný FTS5 výraz (všechna slova musí být v řádku, `slovo*` = prefix)."""
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class _LineParser:
+    """Přiřazuje řádkům čas a úroveň; řádky bez hlavičky (stack trace) dědí hodnoty předchozího řádku."""
+
+    def __init__(self, day, last_tod=None, last_ts=None, last_level=None):
+        self.day = day
+        self.last_tod = last_tod
+        self.last_ts = last_ts
+        self.last_level = last_level
+
+    def parse(self, line):
+        match = _TIME_RE.match(line)
+        if match:
+            hours, minutes, seconds = (int(value) for value in match.groups())
+            tod = hours * 3600 + minutes * 60 + seconds
+            if self.last_tod is not None and tod < self.last_tod - 3600:
+                # Čas skočil dozadu -> přechod přes půlnoc
+                self.day += timedelta(days=1)
+            self.last_tod = tod
+            self.last_ts = int(time.mktime(self.day.timetuple())) + tod
+            self.last_level = parse_level(line) or self.last_level
+        return self.last_ts, self.last_level
+
+
+class ServerLogIndex:
+    """
+    Fulltextový index logů jednoho serveru (SQLite FTS5).
+
+    Archivované .log.gz se zaindexují jednou, latest.log se doindexovává od
+    posledního offsetu. Po rotaci (jiný inode / menší velikost) se záznamy
+    latest.log zahodí – jejich obsah mezitím přibude jako nový .log.gz.
+    """
+
+    def __init__(self, db_path, logs_dir):
+        self.db_path = db_path
+        self.logs_dir = logs_dir
+        self.sync_lock = threading.Lock()
+        self.synced_at = None             # time.time() poslední dokončené indexace v tomto procesu
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def sync(self, blocking=True):
+        """Doindexuje nové a změněné logy. Vrací False, pokud indexace už běží jinde."""
+        if not self.sync_lock.acquire(blocking=blocking):
+            return False
+        try:
+            if not os.path.isdir(self.logs_dir):
+                return True
+            current = {}
+            for name in os.listdir(self.logs_dir):
+                if name.endswith((".log", ".log.gz")):
+                    try:
+                        current[name] = os.stat(os.path.join(self.logs_dir, name))
+                    except OSError:
+                        continue
+
+            with closing(self._connect()) as conn:
+                known = {row[0]: row for row in conn.execute(
+                    "SELECT name, inode, size, mtime, offset, lines, day, last_tod, last_ts, last_level FROM files"
+                )}
+                for name in set(known) - set(current):
+                    self._drop_file(conn, name)
+                # Od nejstarších, aby se přechod přes půlnoc a pořadí zásahů chovaly přirozeně
+                for name in sorted(current):
+                    self._sync_file(conn, name, current[name], known.get(name))
+            self.synced_at = time.time()
+            return True
+        finally:
+            self.sync_lock.release()
+
+    @property
+    def up_to_date(self):
+        """Index prošla aspoň jedna indexace a právě žádná neběží (hledání jen čte, nic nedoindexuje)."""
+        return self.synced_at is not None and not self.sync_lock.locked()
+
+    def _drop_file(self, conn, name):
+        with conn:
+            conn.execute(
+                "INSERT INTO entries_fts(entries_fts, rowid, text) "
+                "SELECT 'delete', id, text FROM entries WHERE file = ?", (name,)
+            )
+            conn.execute("DELETE FROM entries WHERE file = ?", (name,))
+            conn.execute("DELETE FROM files WHERE name = ?", (name,))
+
+    def _sync_file(self, conn, name, stat, known):
+        is_gzip = name.endswith(".gz")
+        if known:
+            _, inode, size, mtime, offset, lines, day, last_tod, last_ts, last_level = known
+            if size == stat.st_size and mtime == stat.st_mtime and inode == stat.st_ino:
+                return
+            if is_gzip or inode != stat.st_ino or stat.st_size < offset:
+                # Přepsaný archiv nebo zrotovaný latest.log -> indexujeme znovu
+                self._drop_file(conn, name)
+                known = None
+
+        if known:
+            parser = _LineParser(datetime.strptime(day, "%Y-%m-%d"), last_tod, last_ts, last_level)
+            line_no = lines
+        else:
+            parser = _LineParser(self._file_day(name, stat))
+            offset = 0
+            line_no = 0
+
+        path = os.path.join(self.logs_dir, name)
+        try:
+            if is_gzip:
+                log_file = gzip.open(path, "rb")
+            else:
+                log_file = open(path, "rb")
+                log_file.seek(offset)
+        except OSError as e:
+            print(f"[WARN] Nelze otevřít log {path} pro indexaci: {e}")
+            return
+
+        batch = []
+        with log_file:
+            try:
+                for raw_line in log_file:
+                    if not is_gzip and not raw_line.endswith(b"\n"):
+                        # Rozepsaný řádek latest.log doindexujeme až příště
+                        break
+                    offset += len(raw_line)
+                    line_no += 1
+                    text = raw_line.rstrip(b"\r\n").decode("utf-8", errors="replace")
+                    if not text:
+                        continue
+                    ts, level = parser.parse(text)
+                    batch.append((name, line_no, ts, level, text))
+                    if len(batch) >= INSERT_BATCH:
+                        self._insert(conn, batch)
+                        batch = []
+            except (OSError, EOFError, gzip.BadGzipFile) as e:
+                print(f"[WARN] Log {path} je poškozený, indexuji jen čitelnou část: {e}")
+        self._insert(conn, batch)
+
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO files (name, inode, size, mtime, offset, lines, day, last_tod, last_ts, last_level) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, stat.st_ino, stat.st_size, stat.st_mtime, offset, line_no,
+                 parser.day.strftime("%Y-%m-%d"), parser.last_tod, parser.last_ts, parser.last_level)
+            )
+
+    @staticmethod
+    def _insert(conn, batch):
+        if not batch:
+            return
+        # Id přiděluje SQLite – souběžné synchronizace (hledání + vlákno na pozadí)
+        # by se při MAX(id)+1 počítaném v Pythonu trefily do stejného id
+        fts_rows = []
+        with conn:
+            for row in batch:
+                cursor = conn.execute(
+                    "INSERT INTO entries (file, line_no, ts, level, text) VALUES (?, ?, ?, ?, ?)", row
+                )
+                fts_rows.append((cursor.lastrowid, row[4]))
+            conn.executemany("INSERT INTO entries_fts (rowid, text) VALUES (?, ?)", fts_rows)
+
+    @staticmethod
+    def _file_day(name, stat):
+        match = _FILE_DATE_RE.match(name)
+        if match:
+            return datetime.strptime(match.group(1), "%Y-%m-%d")
+        # latest.log: den posledního zápisu (přesnější datum v souboru není)
+        modified = datetime.fromtimestamp(stat.st_mtime)
+        return datetime(modified.year, modified.month, modified.day)
+
+    def search(self, query, levels=None, since=None, until=None, limit=DEFAULT_HIT_LIMIT):
+        """Vrátí seznam zásahů {file, line, time, level, text} seřazený podle času."""
+        match = build_match_query(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT e.file, e.line_no, e.ts, e.level, e.text FROM entries_fts "
+            "JOIN entries e ON e.id = entries_fts.rowid WHERE entries_fts MATCH ?"
+        )
+        params = [match]
+        if levels:
+            sql += f" AND e.level IN ({', '.join('?' * len(levels))})"
+            params.extend(levels)
+        if since is not None:
+            sql += " AND e.ts >= ?"
+            params.append(int(since))
+        if until is not None:
+            sql += " AND e.ts <= ?"
+            params.append(int(until))
+        sql += " ORDER BY e.ts, e.id LIMIT ?"
+        params.append(limit)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [
+            {"file": file, "line": line_no, "time": ts, "level": row_level, "text": text}
+            for file, line_no, ts, row_level, text in rows
+        ]
+
+
+class LogSearchService:
+    """
+    Správa indexů všech serverů a background vlákno, které je průběžně doplňuje.
+
+    logs_provider() -> {server_id: cesta ke složce logs}
+    """
+
+    def __init__(self, storage_path, logs_provider, interval=60):
+        self.storage_path = storage_path
+        self.logs_provider = logs_provider
+        self.interval = max(float(interval), 5)
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def get_index(self, server_id, logs_dir):
+        with self._lock:
+            index = self._indexes.get(server_id)
+            if index is None or index.logs_dir != logs_dir:
+                index = ServerLogIndex(
+                    os.path.join(self.storage_path, f"server_{server_id}.sqlite3"), logs_dir
+                )
+                self._indexes[server_id] = index
+            return index
+
+    def ensure_started(self):
+        # Bez zdroje logů (proces, který nevlastní běhový stav) není co indexovat
+        if self.logs_provider is None or (self._thread and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="log-indexer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                for server_id, logs_dir in (self.logs_provider() or {}).items():
+                    if self._stop_event.is_set():
+                        break
+                    try:
+                        self.get_index(server_id, logs_dir).sync()
+                    except (OSError, sqlite3.Error) as e:
+                        print(f"[WARN] Indexace logů serveru {server_id} selhala: {e}")
+            except Exception as e:
+                print(f"[WARN] Indexace logů selhala: {e}")
+            self._stop_event.wait(self.interval)
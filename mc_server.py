@@ -1,4 +1,7 @@
-﻿import os
+﻿import atexit
+import functools
+import os
+import re
 import subprocess
 import psutil
 import shutil
@@ -8,31 +11,151 @@ import signal
 from datetime import datetime, timedelta
 import time
 import threading
-from flask import Blueprint, request, jsonify, current_app, abort, send_file, redirect
+from concurrent.futures import ThreadPoolExecutor, wait
+import json
+from flask import Blueprint, Response, request, jsonify, current_app, abort, send_file, redirect
 from flask_login import login_required, current_user
-from models import db, User, Plugin, Server, PluginConfig, PluginUpdateLog, server_plugins, PlayerAccessCode, PlayerServerAccess, PlayerNotice,  Mod, ModPack
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from models import db, User, BuildVersion, CrashEvent, Plugin, Server, ServerStartup, StartupComponent, PluginConfig, PluginUpdateLog, server_plugins, PlayerAccessCode, PlayerServerAccess, PlayerNotice,  Mod, ModPack
 from plugin_instaler_modrinth import extract_slug_from_url, get_modrinth_plugin_info, get_download_url, handle_web_request
 from port_manager import ensure_ports_open, ensure_ports_closed
 import requests
-from ansi2html import Ansi2HTMLConverter
+from admission import AdmissionController
+from cgroups import CgroupManager, memory_limit_mb
+from console_buffer import ConsoleBuffer, ConsoleLine, render_ansi_line
+from console_capture import ConsoleCapture
+from crash_watchdog import ACTION_RESTART, CrashWatchdog, classify_exit, find_crash_report, is_stopping_line
+from cpu_allocator import CoreAllocator, CpuTopology
+from cpu_rebalancer import CpuRebalancer
+from lifecycle import (
+    STATE_CRASHED,
+    STATE_READY,
+    STATE_STARTING,
+    STATE_STOPPED,
+    STATE_STOPPING,
+    JobRunner,
+    ServerState,
+    parse_ready_line,
+)
+from app_cds import find_archive as find_app_cds_archive, prepare_launch_jar as prepare_app_cds_jar
+from fleet import FleetOrchestrator, boot_order
+from hibernation import HibernationManager
+from jvm_profiles import java_command, jvm_flags
+from log_reader import LogReader
+from log_search import LEVELS as LOG_LEVELS, LogSearchService
 import yaml
-from mcstatus import JavaServer
 from app_config import (
+    ADMISSION_MAX_PRESSURE,
+    ADMISSION_OVERCOMMIT_PERCENT,
+    ADMISSION_QUEUE_SECONDS,
+    ADMISSION_RESERVE_MB,
     BASE_BUILD_PATH,
     BASE_MODS_PATH,
     BASE_PLUGIN_PATH,
     BASE_SERVERS_PATH,
+    CGROUP_ENABLED,
+    CGROUP_PARENT,
+    CONSOLE_CAPTURE_MAX_MB,
+    CONSOLE_CAPTURE_RETENTION_DAYS,
+    CONSOLE_CAPTURE_SEGMENT_MB,
+    CONSOLE_STREAM_MAX_SECONDS,
+    CONSOLE_STREAM_RETRY_MS,
+    CPU_BUSY_PERCENT,
+    CPU_IDLE_PERCENT,
+    CPU_IDLE_SECONDS,
+    CPU_REBALANCE_INTERVAL,
+    CPU_SHARED_POOL_CORES,
+    CRASH_BACKOFF_BASE,
+    CRASH_BACKOFF_MAX,
+    CRASH_LOOP_MAX,
+    CRASH_LOOP_WINDOW,
+    CRASH_RESTART_ENABLED,
+    FLEET_BOOT_CONCURRENCY,
+    FLEET_SHUTDOWN_BUDGET,
+    HIBERNATE_CHECK_INTERVAL,
+    HIBERNATE_IDLE_MINUTES,
+    LIFECYCLE_START_TIMEOUT,
+    LIFECYCLE_STOP_TIMEOUT,
+    LIFECYCLE_WORKERS,
+    LOG_INDEX_INTERVAL,
+    METRICS_SAMPLE_INTERVAL,
     MINECRAFT_JAVA_PATH,
+    PLAYER_CACHE_TTL,
+    PLAYER_POLL_INTERVAL,
+    PLAYER_RECONCILE_INTERVAL,
+    RCON_PORT_OFFSET,
+    PLAYER_PROBE_TIMEOUT_MS,
+    RCON_BULK_WORKERS,
+    RCON_TIMEOUT_MS,
+    RUNTIME_DATA_PATH,
+    SECRET_KEY,
+    STATUS_BATCH_DEADLINE_MS,
+    STATUS_BATCH_WORKERS,
+    SUPERVISOR_ADDRESS,
+    SUPERVISOR_AUTHKEY,
+    SUPERVISOR_TIMEOUT,
 )
+from metrics_store import RANGES as METRICS_RANGES, MetricsStore
+from pid_registry import PidRegistry
+from player_events import PlayerTracker
+from player_poller import PlayerPoller
+from rcon_client import RconError, RconPool
+from server_creator import SERVICE_LEVELS, build_source_path, rcon_properties
+from server_metrics import MetricsSampler
+from startup_profiler import StartupProfiler
+from supervisor import SupervisorClient, SupervisorUnavailable, check_authkey
 
 
 
 # Base directory where all server folders will be stored
 JAVA_EXECUTABLE = MINECRAFT_JAVA_PATH or "java"
 #BASE_SERVERS_PATH = r"D:\\"
-#seznam aktuálně využitých jader
-USED_CPU = []
-total_cores = psutil.cpu_count(logical=True)  # fyzická jádra, nebo True pro logická
+# Topologie CPU (SMT, NUMA) a přidělení jader serverům – ukládá se na disk, viz reconcile_pid_registry
+cpu_topology = CpuTopology.detect()
+cpu_allocator = CoreAllocator(cpu_topology, os.path.join(RUNTIME_DATA_PATH, "cpu_allocations.json"))
+total_cores = cpu_topology.cpu_count
+# Nečinné servery na sdílený pool, vytížené zpět na vlastní jádra (viz init_server_runtime)
+cpu_rebalancer = CpuRebalancer(
+    cpu_allocator,
+    interval=CPU_REBALANCE_INTERVAL or 30,
+    idle_seconds=CPU_IDLE_SECONDS,
+    idle_cpu=CPU_IDLE_PERCENT,
+    busy_cpu=CPU_BUSY_PERCENT,
+    shared_cores=CPU_SHARED_POOL_CORES
+)
+# Limity CPU/paměti/IO každého JVM ve vlastní cgroup v2 (bez cgroup v2 se nevynucují)
+cgroup_manager = CgroupManager(CGROUP_PARENT, enabled=CGROUP_ENABLED)
+# Přidělená paměť serverů vs. RAM hostitele – start, na který není paměť, čeká nebo se odmítne
+admission = AdmissionController(
+    reserve_mb=ADMISSION_RESERVE_MB,
+    overcommit_percent=ADMISSION_OVERCOMMIT_PERCENT,
+    max_pressure=ADMISSION_MAX_PRESSURE
+)
+# Uspávání serverů bez hráčů a probouzení při připojení (viz init_server_runtime)
+hibernation = HibernationManager(
+    os.path.join(RUNTIME_DATA_PATH, "hibernation.json"),
+    idle_seconds=HIBERNATE_IDLE_MINUTES * 60,
+    interval=HIBERNATE_CHECK_INTERVAL
+)
+# Restart spadlých serverů s exponenciálním odstupem a pojistkou proti smyčce pádů
+crash_watchdog = CrashWatchdog(
+    base_delay=CRASH_BACKOFF_BASE,
+    max_delay=CRASH_BACKOFF_MAX,
+    window=CRASH_LOOP_WINDOW,
+    max_crashes=CRASH_LOOP_MAX,
+    enabled=CRASH_RESTART_ENABLED
+)
+# Registr PID spuštěných JVM – přežije restart webu
+pid_registry = PidRegistry(os.path.join(RUNTIME_DATA_PATH, "pid_registry.json"))
+# Hráči online a odehraný čas podle událostí z konzole
+player_tracker = PlayerTracker(os.path.join(RUNTIME_DATA_PATH, "playtime"))
+# Stránkované čtení archivovaných logů (sdílená cache indexů)
+log_reader = LogReader()
+OLD_LOG_PAGE_LINES = 1000
+OLD_LOG_MAX_PAGE_LINES = 5000
+BULK_COMMANDS_MAX = 50
+CRASH_EVENT_LINES = 100
 
 
 
@@ -42,16 +165,24 @@ def get_server_paths(server_id):
     if not server:
         return None
     
-    server_name = server.name.replace(' ', '_').lower()
-    server_dir = os.path.join(BASE_SERVERS_PATH, server_name)
+    server_dir = _server_dir(server)
     
     return {
         'server_path': os.path.join(server_dir, "minecraft-server"),
         'backup_path': os.path.join(server_dir, "mcbackups"),
-        'server_jar': f"server_{server_id}.jar"  # Unikátní název podle server_id
+        'server_jar': _server_jar_name(server_id)
     }
 
 
+def _server_dir(server):
+    server_name = server.name.replace(' ', '_').lower()
+    return os.path.join(BASE_SERVERS_PATH, server_name)
+
+
+def _server_jar_name(server_id):
+    return f"server_{server_id}.jar"  # Unikátní název podle server_id
+
+
 SERVER_PROPERTIES_FIELDS = {
     "motd": {"type": "text", "default": "Minecraft Server"},
     "gamemode": {"type": "select", "choices": ["survival", "creative", "adventure", "spectator"], "default": "survival"},
@@ -173,9 +304,11 @@ def write_server_properties_file(properties_path, updates):
     if remaining:
         if new_lines and new_lines[-1].strip():
             new_lines.append("\n")
-        for key in SERVER_PROPERTIES_FIELDS:
-            if key in remaining:
-                new_lines.append(f"{key}={remaining[key]}\n")
+        # Pole formuláře v jeho pořadí, ostatní klíče (např. RCON) za nimi
+        ordered = [key for key in SERVER_PROPERTIES_FIELDS if key in remaining]
+        ordered += [key for key in remaining if key not in SERVER_PROPERTIES_FIELDS]
+        for key in ordered:
+            new_lines.append(f"{key}={remaining[key]}\n")
 
     temp_path = properties_path + ".tmp"
     with open(temp_path, "w", encoding="utf-8", newline="") as prop_file:
@@ -189,20 +322,81 @@ class ServerInstance:
         self.server_id = server_id
         self.process = None               # subprocess.Popen instance
         self.psutil_proc = None           # psutil.Process instance pro monitoring
-        self.console_output = []
+        # Celá historie konzole je na disku, v paměti jen malé horké okno pro živé zobrazení
+        self.console_capture = ConsoleCapture(
+            os.path.join(RUNTIME_DATA_PATH, "console", f"server_{server_id}"),
+            segment_bytes=CONSOLE_CAPTURE_SEGMENT_MB * 1024 * 1024,
+            retention_days=CONSOLE_CAPTURE_RETENTION_DAYS,
+            max_bytes=CONSOLE_CAPTURE_MAX_MB * 1024 * 1024
+        )
+        self.console_output = ConsoleBuffer(  # Kruhový buffer se sekvenčními čísly řádků
+            renderer=render_ansi_line,
+            start_seq=self.console_capture.last_seq + 1
+        )
         self.lock = threading.Lock()      # Pro thread-safe operace
+        self.stdin_lock = threading.Lock()  # Zápisy na stdin JVM z více vláken se nesmí prolínat
         self.assigned_cores = []
+        self.cgroup_path = None           # cgroup v2 s limity tarifu (None = nevynucuje se)
+        self.app_cds = False              # JVM startovalo s AppCDS archivem buildu
+        self.start_error = None           # důvod posledního odmítnutého startu
+        self.started_at = None            # time.time() spuštění JVM (pro crash-reports/)
+        self.saw_stopping = False         # server vypsal "Stopping server" (řádné vypnutí)
+        self.startup_profiler = None      # časová osa právě probíhajícího startu (do řádku "Done")
+        self.start_token = None           # značka posledního startu – konec dřívějšího JVM už nic neuklízí
+        self.starting = False             # start_server právě připravuje JVM (proces ještě není uložený)
+        self.lifecycle = ServerState()    # starting -> ready -> stopping -> stopped / crashed
         
     def add_output_line(self, line):
-        with self.lock:
-            self.console_output.append(line)
-            # Udržujeme maximálně 1000 řádků výstupu
-            if len(self.console_output) > 1000:
-                self.console_output.pop(0)
-    
+        seq = self.console_output.append(line)
+        player_tracker.feed(self.server_id, line)
+        try:
+            self.console_capture.append(seq, line)
+        except OSError as e:
+            print(f"[WARN] Nepodařilo se zapsat konzoli serveru {self.server_id} na disk: {e}")
+        return seq
+    
+    def write_stdin(self, line):
+        """Zapíše řádek na stdin JVM; False, pokud proces nespustil tento proces nebo už neběží"""
+        process = self.process
+        if not process or process.poll() is not None:
+            return False
+        with self.stdin_lock:
+            process.stdin.write(line + '\n')
+            process.stdin.flush()
+        return True
+
     def get_output(self, lines=50):
-        with self.lock:
-            return self.console_output[-lines:] if lines > 0 else self.console_output.copy()
+        return [entry.text for entry in self.console_output.tail(lines)]
+
+    def get_output_since(self, seq, limit=1000):
+        """
+        Vrátí ([ConsoleLine], reset) pro řádky novější než seq.
+
+        Řádky, které už z paměti vypadly, se doplní ze záznamu na disku.
+        """
+        entries, reset = self.console_output.since(seq, limit)
+        first_in_memory = entries[0].seq if entries else self.console_output.last_seq + 1
+        missing = first_in_memory - seq - 1
+        if seq <= 0 or missing <= 0 or missing + len(entries) > limit:
+            return entries, reset
+
+        older = self.console_capture.read(seq + 1, first_in_memory)
+        if len(older) != missing:
+            return entries, reset
+        return self._to_console_lines(older) + entries, False
+
+    def get_output_before(self, seq, limit=500):
+        """Vrátí [ConsoleLine] starší než seq ze záznamu na disku (pro načítání historie)."""
+        return self._to_console_lines(self.console_capture.read_before(seq, limit))
+
+    @staticmethod
+    def _to_console_lines(records):
+        return [ConsoleLine(seq, text, len(text) + 1) for seq, text in records]
+
+    def set_console_limit(self, service_level):
+        """Nastaví velikost bufferu konzole podle úrovně služby"""
+        level = SERVICE_LEVELS.get(service_level, SERVICE_LEVELS[1])
+        self.console_output.set_max_bytes(level["console_buffer_kb"] * 1024)
         
     # work with cores
     def set_assigned_cores(self, cores):
@@ -218,16 +412,24 @@ class ServerInstance:
     def release_cores(self):
         """Uvolní přiřazená jádra"""
         with self.lock:
-            for core in self.assigned_cores:
-                if core in USED_CPU:
-                    USED_CPU.remove(core)
             self.assigned_cores = []
+        cpu_allocator.release(self.server_id)
             
     def cleanup(self):
         """Vyčistí prostředky při zastavení serveru"""
         self.release_cores()
         self.psutil_proc = None
         self.process = None
+        pid_registry.unregister(self.server_id)
+        player_tracker.server_stopped(self.server_id)
+        rcon_pool.close(self.server_id)
+        self.console_capture.close()
+        # Cgroup (a s ní účtování a limity běhu) patří JVM, dokud v ní nějaký proces žije –
+        # smaže ji až úklid po jeho skutečném konci
+        if not cgroup_manager.populated(self.cgroup_path):
+            cgroup_path, self.cgroup_path = self.cgroup_path, None
+            cgroup_manager.remove(cgroup_path)
+        admission.release(self.server_id)
         
 class ServerManager:
     """Třída pro správu všech server instancí"""
@@ -248,6 +450,23 @@ class ServerManager:
             if server_id in self.instances:
                 del self.instances[server_id]
 
+    def close_console_captures(self):
+        """Zapíše rozepsané záznamy konzole všech serverů na disk"""
+        with self.instances_lock:
+            instances = list(self.instances.values())
+        for instance in instances:
+            instance.console_capture.close()
+
+    def get_tracked_processes(self):
+        """Vrátí {server_id: psutil.Process} pro všechny instance se známým JVM procesem"""
+        with self.instances_lock:
+            instances = list(self.instances.values())
+        return {
+            instance.server_id: instance.psutil_proc
+            for instance in instances
+            if instance.psutil_proc is not None
+        }
+
 
 
 class PluginManager:
@@ -595,41 +814,302 @@ class PluginManager:
 # Globální manager pro všechny servery
 server_manager = ServerManager()
 plugin_manager = PluginManager()
+metrics_sampler = MetricsSampler(server_manager.get_tracked_processes, METRICS_SAMPLE_INTERVAL)
+# Historie metrik se plní ze sampleru, requesty z ní jen čtou
+metrics_store = MetricsStore(os.path.join(RUNTIME_DATA_PATH, "metrics"))
+metrics_sampler.add_listener(metrics_store.on_sample)
+atexit.register(server_manager.close_console_captures)
+# Sdílený pool pro paralelní zjišťování stavů (hromadné endpointy)
+# Start/stop/restart běží jako joby mimo WSGI vlákna
+lifecycle_jobs = JobRunner(max_workers=LIFECYCLE_WORKERS)
+
+# Hráči online na běžících serverech (asyncio smyčka na pozadí, viz init_server_runtime)
+player_poller = PlayerPoller(
+    None,
+    interval=PLAYER_POLL_INTERVAL,
+    ttl=PLAYER_CACHE_TTL,
+    timeout=PLAYER_PROBE_TIMEOUT_MS / 1000
+)
 
-def get_server_status(server_id):
-    """Získá stav a statistiky Minecraft serveru"""
-    paths = get_server_paths(server_id)
-    if not paths:
-        return {'status': 'error', 'message': 'Server not found'}
+# Trvalá RCON spojení (příkazy s odpovědí, hromadné operace)
+rcon_pool = RconPool(timeout=RCON_TIMEOUT_MS / 1000)
+_rcon_settings_cache = {}             # {server_id: (mtime server.properties, (port, heslo) | None)}
+_command_executor = ThreadPoolExecutor(max_workers=RCON_BULK_WORKERS, thread_name_prefix="rcon-bulk")
 
-    jar_name = paths['server_jar']
-    server = Server.query.get(server_id)
-    if not server:
-        return {'status': 'error', 'message': 'Server config not found'}
+# Fulltextový index logů (plní se na pozadí, viz init_server_runtime)
+log_search = LogSearchService(os.path.join(RUNTIME_DATA_PATH, "log_index"), None, LOG_INDEX_INTERVAL)
+
+_status_executor = ThreadPoolExecutor(max_workers=STATUS_BATCH_WORKERS, thread_name_prefix="status-probe")
+
+# Běhový stav (JVM, konzole, jádra) vlastní buď tento proces, nebo samostatný supervisor (supervisor.py);
+# bez vlastního SUPERVISOR_AUTHKEY se web k supervisoru nepřipojí (check_authkey vyhodí SupervisorError)
+_supervisor_client = SupervisorClient(
+    SUPERVISOR_ADDRESS, check_authkey(SUPERVISOR_AUTHKEY, SECRET_KEY), timeout=SUPERVISOR_TIMEOUT
+) if SUPERVISOR_ADDRESS else None
+_supervised_functions = {}
 
-    # Build type
-    build_type = server.build_version.build_type.name.upper() if server.build_version else "VANILLA"
 
-    # Limit CPU podle service levelu
-    CPU_max_usage = {
-        1: '100 %',
-        2: '200 %',
-        3: '300 %'
-    }.get(server.service_level, '100 %')
+def supervised(func):
+    """Funkce nad běhovým stavem – při nastaveném SUPERVISOR_ADDRESS se volá v supervisoru přes RPC"""
+    _supervised_functions[func.__name__] = func
 
-    # Funkce pro rozpoznání Forge procesu
-    def is_forge_process(proc, jar_name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _supervisor_client is not None:
+            return _supervisor_client.call(func.__name__, *args, **kwargs)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def become_supervisor():
+    """Přepne proces do role supervisoru (volá supervisor.py před importem aplikace); vrací RPC funkce"""
+    global _supervisor_client
+    _supervisor_client = None
+    return dict(_supervised_functions)
+
+
+def _adopt_process(server_id, proc):
+    """Převezme již běžící JVM do manageru včetně jader podle jeho aktuální afinity"""
+    instance = server_manager.get_instance(server_id)
+    instance.psutil_proc = proc
+    # Konzoli převzatého procesu nevidíme – bereme ho jako připravený
+    instance.lifecycle.transition((STATE_STOPPED, STATE_CRASHED), STATE_READY)
+    try:
+        affinity = proc.cpu_affinity()
+    except (psutil.Error, AttributeError):
+        affinity = []
+    if affinity:
+        # Skutečná afinita JVM má přednost před uloženým přidělením
+        instance.set_assigned_cores(cpu_allocator.adopt(server_id, affinity))
+    if cgroup_manager.available:
+        instance.cgroup_path = cgroup_manager.path_of(proc.pid)
+    return instance
+
+
+def _seed_pid_registry_from_legacy_processes():
+    """Jednorázově (při startu) zaregistruje JVM spuštěné před zavedením PID registru"""
+    jar_pattern = re.compile(r"server_(\d+)\.jar")
+    registered = pid_registry.entries()
+    for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'cwd']):
         try:
-            cmdline = ' '.join(proc.cmdline()) if proc.cmdline() else ''
-            return (
-                'java' in proc.name().lower()
-                and (jar_name in cmdline
-                     or 'forge' in cmdline.lower()
-                     or any(f.endswith('.jar') and 'forge' in f.lower() for f in proc.cmdline()))
-            )
-        except Exception:
-            return False
+            cmdline = ' '.join(proc.info.get('cmdline') or [])
+            match = jar_pattern.search(cmdline)
+            if not match or 'java' not in (proc.info.get('name') or '').lower():
+                continue
+            server_id = int(match.group(1))
+            if server_id in registered:
+                continue
+            paths = get_server_paths(server_id)
+            cwd = proc.info.get('cwd')
+            if not paths or not cwd or os.path.normcase(os.path.abspath(cwd)) != os.path.normcase(os.path.abspath(paths['server_path'])):
+                continue
+            pid_registry.register(server_id, proc, paths['server_jar'], paths['server_path'])
+            print(f"[INFO] Server {server_id} (PID {proc.pid}) doplněn do PID registru")
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+
+
+def reconcile_pid_registry():
+    """Při startu webu ověří PID registr a převezme servery, které stále běží"""
+    _seed_pid_registry_from_legacy_processes()
+    running = set()
+    for server_id, entry in pid_registry.entries().items():
+        proc = PidRegistry.validate(entry)
+        if proc is None:
+            print(f"[INFO] Server {server_id} z PID registru již neběží, odstraňuji záznam")
+            pid_registry.unregister(server_id)
+            continue
+        _adopt_process(server_id, proc)
+        server = Server.query.get(server_id)
+        if server:
+            # Převzaté JVM už paměť drží – započítat ho, ať se nepřidělí podruhé
+            admission.commit(server_id, _admission_mb(server))
+            admission.settle(server_id)
+        running.add(server_id)
+        print(f"[INFO] Převzat běžící server {server_id} (PID {proc.pid})")
+    for server_id in cpu_allocator.retain(running):
+        print(f"[INFO] Uvolněna jádra serveru {server_id}, který již neběží")
+
+
+def init_server_runtime(app):
+    """
+    Inicializace běhového stavu při startu webové aplikace.
 
+    Volá se jen ze vstupního bodu webu nebo supervisoru (serve.py, app.py, supervisor.py),
+    nikdy při importu – CLI skripty s `from app import app` nesmí převzít JVM ani spouštět vlákna.
+    """
+    if _supervisor_client is not None:
+        print(f"[INFO] Servery spravuje supervisor na {SUPERVISOR_ADDRESS}")
+        return
+    with app.app_context():
+        try:
+            reconcile_pid_registry()
+        except Exception as e:
+            print(f"[ERROR] Synchronizace PID registru selhala: {e}")
+    metrics_sampler.ensure_started()
+    # Historii metrik na disk zapisuje jen proces, který je vzorkuje – CLI skript s importem
+    # mc_server by při ukončení přepsal soubory svým zastaralým obsahem
+    atexit.register(metrics_store.persist)
+    log_search.logs_provider = lambda: _log_index_targets(app)
+    log_search.ensure_started()
+    player_poller.target_provider = lambda: _player_poll_targets(app)
+    player_poller.add_listener(_reconcile_players)
+    player_poller.ensure_started()
+    if CPU_REBALANCE_INTERVAL > 0:
+        cpu_rebalancer.targets_provider = lambda: _rebalance_targets(app)
+        cpu_rebalancer.on_change = _on_cores_rebalanced
+        cpu_rebalancer.ensure_started()
+    # Zástupci uspaných serverů se obnoví vždy, i s vypnutým uspáváním – jinak by se nedaly probudit
+    hibernation.on_idle = lambda server_id: _submit_lifecycle_in_app(app, server_id, 'hibernate')
+    hibernation.on_wake = lambda server_id: _submit_lifecycle_in_app(app, server_id, 'start')
+    crash_watchdog.on_restart = lambda server_id: _submit_lifecycle_in_app(app, server_id, 'crash_restart')
+    hibernation.restore(running_ids=set(server_manager.get_tracked_processes()))
+    if HIBERNATE_IDLE_MINUTES > 0:
+        hibernation.targets_provider = lambda: _hibernation_targets(app)
+        hibernation.ensure_started()
+
+
+def _submit_lifecycle_in_app(app, server_id, action):
+    with app.app_context():
+        submit_lifecycle_job(server_id, action)
+
+
+def _hibernation_targets(app):
+    """Hráči a připravenost běžících serverů pro HibernationManager"""
+    tracked = server_manager.get_tracked_processes()
+    if not tracked:
+        return {}
+    with app.app_context():
+        levels = {
+            server.id: server.service_level
+            for server in Server.query.filter(Server.id.in_(list(tracked))).all()
+        }
+    return {
+        server_id: {
+            "players": get_online_player_info(server_id)["count"],
+            "ready": server_manager.get_instance(server_id).lifecycle.state == STATE_READY,
+            "allowed": SERVICE_LEVELS.get(level, SERVICE_LEVELS[1]).get("hibernate", False),
+        }
+        for server_id, level in levels.items()
+    }
+
+
+def _rebalance_targets(app):
+    """Zátěž, hráči a tarif běžících serverů pro CpuRebalancer"""
+    tracked = server_manager.get_tracked_processes()
+    if not tracked:
+        return {}
+    with app.app_context():
+        levels = {
+            server.id: server.service_level
+            for server in Server.query.filter(Server.id.in_(list(tracked))).all()
+        }
+    targets = {}
+    for server_id, proc in tracked.items():
+        sample = metrics_sampler.get(server_id)
+        if server_id not in levels or not sample or sample['pid'] != proc.pid:
+            continue
+        instance = server_manager.get_instance(server_id)
+        level = SERVICE_LEVELS.get(levels[server_id], SERVICE_LEVELS[1])
+        targets[server_id] = {
+            "proc": proc,
+            "cpu_percent": sample['cpu_percent'],
+            "players": get_online_player_info(server_id)["count"],
+            "ready": instance.lifecycle.state == STATE_READY,
+            "cores": level["cores"],
+            "dedicated": level.get("dedicated_cores", False),
+            "cpus": instance.get_assigned_cores(),
+        }
+    return targets
+
+
+def _on_cores_rebalanced(server_id, cpus, shared):
+    server_manager.get_instance(server_id).set_assigned_cores(cpus)
+
+
+def _player_poll_targets(app):
+    """Vrátí porty pro zjišťování hráčů všech běžících serverů"""
+    # Servery se čtenou konzolí jen jednou za PLAYER_RECONCILE_INTERVAL
+    server_ids = [
+        server_id for server_id in server_manager.get_tracked_processes()
+        if player_tracker.needs_reconcile(server_id, PLAYER_RECONCILE_INTERVAL)
+    ]
+    if not server_ids:
+        return {}
+    with app.app_context():
+        return {
+            server.id: {
+                "query_port": server.query_port,
+                "server_port": server.server_port,
+                "diagnostic_port": server.diagnostic_server_port
+            }
+            for server in Server.query.filter(Server.id.in_(server_ids)).all()
+        }
+
+
+def _reconcile_players(server_id, info):
+    """Listener PlayerPolleru – srovná seznam hráčů z konzole s výsledkem sondy"""
+    # Status ping vrací jen vzorek jmen, úplný seznam dává query a diagnostika
+    complete = info["method"] != "status" or info["count"] == len(info["names"])
+    player_tracker.reconcile(server_id, info["names"], complete=complete)
+
+
+def _log_index_targets(app):
+    """Vrátí {server_id: složka logs} pro background indexaci"""
+    with app.app_context():
+        return {
+            server.id: os.path.join(_server_dir(server), "minecraft-server", "logs")
+            for server in Server.query.all()
+        }
+
+
+def _running_status(server_id, proc, instance, cpu_max, build_type):
+    """Sestaví odpověď pro běžící server z posledního snapshotu sampleru"""
+    sample = metrics_sampler.get(server_id)
+    if sample and sample['pid'] == proc.pid:
+        ram_used_mb = sample['ram_used_mb']
+        cpu = sample['cpu_percent']
+        threads = sample['threads']
+        since_ts = sample['create_time']
+    else:
+        # Proces ještě sampler neviděl (právě spuštěn / nalezen) – jen levné údaje bez CPU
+        ram_used_mb = round(proc.memory_info().rss / (1024 ** 2))
+        cpu = 0.0
+        threads = None
+        since_ts = proc.create_time()
+
+    return {
+        'status': 'running',
+        'pid': proc.pid,
+        'ram_used_mb': ram_used_mb,
+        'cpu_percent': round(cpu, 1) if cpu >= 0.1 else 0.0,
+        'threads': threads,
+        'since': datetime.fromtimestamp(since_ts).strftime('%d.%m.%Y %H:%M'),
+        'port': 25565,
+        'cpu_max': cpu_max,
+        'build_type': build_type,
+        'assigned_cores': instance.get_assigned_cores(),
+        'cpu_pool': 'shared' if cpu_rebalancer.is_shared(server_id) else 'dedicated',
+        'cgroup': cgroup_manager.stats(instance.cgroup_path),
+        # Doba startu z hlášky "Done (x s)!" – pro porovnání startů s AppCDS a bez něj
+        'startup_seconds': instance.lifecycle.startup_seconds,
+        'app_cds': instance.app_cds,
+        'state': instance.lifecycle.state
+    }
+
+
+def _server_status_meta(server):
+    """Vrátí (build_type, cpu_max) pro server – používá jen již načtené vztahy"""
+    build_type = server.build_version.build_type.name.upper() if server.build_version else "VANILLA"
+
+    # Limit CPU podle service levelu (vynucuje ho cpu.max v cgroup serveru)
+    level = SERVICE_LEVELS.get(server.service_level, SERVICE_LEVELS[1])
+    cpu_max = f"{level['cpu_limit_percent']} %"
+    return build_type, cpu_max
+
+
+def _probe_server_process(server_id, jar_name, build_type, cpu_max):
+    """Zjistí stav procesu serveru bez přístupu do databáze"""
     # --- 1) Zkontrolovat náš manager ---
     instance = server_manager.get_instance(server_id)
     
@@ -638,20 +1118,7 @@ def get_server_status(server_id):
         try:
             proc = instance.psutil_proc
             if proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE:
-                mem = proc.memory_info()
-                cpu = proc.cpu_percent(interval=0.1)
-
-                return {
-                    'status': 'running',
-                    'pid': proc.pid,
-                    'ram_used_mb': round(mem.rss / (1024 ** 2)),
-                    'cpu_percent': round(cpu, 1) if cpu >= 0.1 else 0.0,
-                    'since': datetime.fromtimestamp(proc.create_time()).strftime('%d.%m.%Y %H:%M'),
-                    'port': 25565,
-                    'cpu_max': CPU_max_usage,
-                    'build_type': build_type,
-                    'assigned_cores': instance.get_assigned_cores()
-                }
+                return _running_status(server_id, proc, instance, cpu_max, build_type)
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             # proces už neběží
             print(f"Proces serveru {server_id} již neběží, provádím cleanup")
@@ -667,119 +1134,121 @@ def get_server_status(server_id):
                     cmdline = ' '.join(child.cmdline())
                     if jar_name in cmdline or 'java' in child.name().lower():
                         instance.psutil_proc = child
-                        mem = child.memory_info()
-                        cpu = child.cpu_percent(interval=0.1)
-                        
-                        return {
-                            'status': 'running',
-                            'pid': child.pid,
-                            'ram_used_mb': round(mem.rss / (1024 ** 2)),
-                            'cpu_percent': round(cpu, 1) if cpu >= 0.1 else 0.0,
-                            'since': datetime.fromtimestamp(child.create_time()).strftime('%d.%m.%Y %H:%M'),
-                            'port': 25565,
-                            'cpu_max': CPU_max_usage,
-                            'build_type': build_type,
-                            'assigned_cores': instance.get_assigned_cores()
-                        }
+                        return _running_status(server_id, child, instance, cpu_max, build_type)
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     continue
         except Exception as e:
             print(f"Chyba při hledání procesu: {e}")
 
-    # --- 2) Fallback: hledat v systému podle jar_name ---
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time']):
-        try:
-            cmdline = proc.info.get('cmdline') or []
-            cmdline_str = ' '.join(cmdline) if isinstance(cmdline, (list, tuple)) else str(cmdline)
-
-            if (build_type == "FORGE" and is_forge_process(proc, jar_name)) or \
-               (build_type != "FORGE" and jar_name in cmdline_str):
-                mem = proc.memory_info()
-                cpu = proc.cpu_percent(interval=0.1)
-
-                # Aktualizovat instanci s nalezeným procesem
-                instance.psutil_proc = proc
-                
-                return {
-                    'status': 'running',
-                    'pid': proc.pid,
-                    'ram_used_mb': round(mem.rss / (1024 ** 2)),
-                    'cpu_percent': round(cpu, 1) if cpu >= 0.1 else 0.0,
-                    'since': datetime.fromtimestamp(proc.info['create_time']).strftime('%d.%m.%Y %H:%M'),
-                    'port': 25565,
-                    'cpu_max': CPU_max_usage,
-                    'build_type': build_type,
-                    'assigned_cores': instance.get_assigned_cores()
-                }
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
+    # --- 2) Fallback: PID registr (proces spuštěný před restartem webu) ---
+    proc = pid_registry.lookup(server_id)
+    if proc is not None:
+        instance = _adopt_process(server_id, proc)
+        return _running_status(server_id, proc, instance, cpu_max, build_type)
 
     # --- 3) Pokud nic neběží ---
-    instance.cleanup()
+    # Rozběhnutý start ještě nemá uložený proces, ale už drží paměť, jádra i cgroup
+    if not instance.starting and instance.lifecycle.state != STATE_STARTING:
+        instance.cleanup()
 
     return {
         'status': 'stopped',
-        'cpu_max': CPU_max_usage,
-        'build_type': build_type
+        'cpu_max': cpu_max,
+        'build_type': build_type,
+        'state': instance.lifecycle.state,
+        # Uspaný server: na herním portu odpovídá zástupce a připojení hráče ho probudí
+        'hibernating': hibernation.is_sleeping(server_id),
+        'waking': hibernation.is_waking(server_id),
+        # Spadlý server: naplánovaný restart, nebo rozpojená pojistka proti smyčce pádů
+        'crash': crash_watchdog.state(server_id)
     }
 
 
+@supervised
+def get_server_status(server_id):
+    """Získá stav a statistiky Minecraft serveru"""
+    server = Server.query.get(server_id)
+    if not server:
+        return {'status': 'error', 'message': 'Server not found'}
 
-def get_online_player_info(server_id):
-    """
-    Vrátí informace o hráčích online (počet + seznam jmen).
-    Upřednostňuje query, pak ping, pak diagnostiku.
+    build_type, cpu_max = _server_status_meta(server)
+    return _probe_server_process(server_id, _server_jar_name(server_id), build_type, cpu_max)
+
+
+def status_query():
+    """Dotaz na servery s eager-load buildu – pro hromadný sběr stavů jedním SELECTem"""
+    return Server.query.options(
+        joinedload(Server.build_version).joinedload(BuildVersion.build_type)
+    )
+
+
+def collect_servers_status(servers, deadline=None):
     """
-    try:
-        server = Server.query.get(server_id)
-        if not server:
-            print(f"[WARN] Server {server_id} nebyl nalezen v databázi.")
-            return {"count": 0, "names": []}
+    Hromadně zjistí stavy serverů.
 
-        server_ip = "localhost"
+    Metadata se čtou z již načtených objektů (viz status_query), procesy se zjišťují
+    paralelně. Servery, které nestihnou odpovědět do `deadline` sekund, se vrátí
+    se stavem 'unknown' a příznakem 'pending' místo blokování celé odpovědi.
+    """
+    if deadline is None:
+        deadline = STATUS_BATCH_DEADLINE_MS / 1000
+
+    targets = [(server.id, *_server_status_meta(server)) for server in servers]
+    return probe_servers_status(targets, deadline)
+
+
+@supervised
+def probe_servers_status(targets, deadline):
+    """Paralelní sondy procesů pro [(server_id, build_type, cpu_max)] – bez přístupu do databáze"""
+    futures = {}
+    fallback = {}
+    for server_id, build_type, cpu_max in targets:
+        fallback[server_id] = {
+            'status': 'unknown',
+            'pending': True,
+            'cpu_max': cpu_max,
+            'build_type': build_type
+        }
+        future = _status_executor.submit(
+            _probe_server_process, server_id, _server_jar_name(server_id), build_type, cpu_max
+        )
+        futures[future] = server_id
 
-        # 1. Query (UDP)
-        if server.query_port:
+    statuses = {}
+    if futures:
+        done, not_done = wait(futures, timeout=deadline)
+        for future in done:
+            server_id = futures[future]
             try:
-                query = JavaServer(server_ip, server.query_port).query()
-                return {
-                    "count": query.players.online,
-                    "names": query.players.names or []
-                }
+                statuses[server_id] = future.result()
             except Exception as e:
-                print(f"[WARN] Query selhalo na portu {server.query_port}: {e}")
+                print(f"[WARN] Zjištění stavu serveru {server_id} selhalo: {e}")
+                statuses[server_id] = {**fallback[server_id], 'pending': False, 'status': 'error'}
+        for future in not_done:
+            server_id = futures[future]
+            print(f"[WARN] Stav serveru {server_id} nebyl zjištěn do {deadline:.1f} s")
+            statuses[server_id] = fallback[server_id]
 
-        # 2. Status (TCP ping)
-        if server.server_port:
-            try:
-                status = JavaServer(server_ip, server.server_port).status()
-                return {
-                    "count": status.players.online,
-                    "names": [p.name for p in (status.players.sample or [])]
-                }
-            except Exception as e:
-                print(f"[WARN] Ping selhal na portu {server.server_port}: {e}")
+    return statuses
 
-        # 3. Diagnostický endpoint (HTTP)
-        if server.diagnostic_server_port:
-            try:
-                url = f"http://localhost:{server.diagnostic_server_port}/players"
-                print(f"[INFO] Pokus o dotaz na diagnostický endpoint: {url}")
-                response = requests.get(url, timeout=3)
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "count": data.get("online_players", 0),
-                        "names": data.get("player_names", [])
-                    }
-            except requests.exceptions.RequestException as e:
-                print(f"[WARN] Chyba při dotazu na diagnostický port: {e}")
 
-        return {"count": 0, "names": []}
 
-    except Exception as e:
-        print(f"[ERROR] Neočekávaná chyba při získávání hráčů pro server {server_id}: {e}")
+@supervised
+def get_online_player_info(server_id):
+    """
+    Vrátí informace o hráčích online (počet + seznam jmen).
+    Čte z PlayerTrackeru (konzole), u převzatých serverů z cache PlayerPolleru –
+    request nikdy nečeká na query/ping/diagnostiku.
+    """
+    if player_tracker.is_authoritative(server_id):
+        # Konzoli serveru čteme od startu – seznam z join/leave událostí je přesný a okamžitý
+        names = sorted(player_tracker.online(server_id))
+        return {"count": len(names), "names": names}
+
+    info = player_poller.get(server_id)
+    if info is None:
         return {"count": 0, "names": []}
+    return {"count": info["count"], "names": list(info["names"])}
 
 #these two from old methods
 def get_online_players(server_id):
@@ -818,9 +1287,47 @@ def get_folder_size(path):
             total += get_folder_size(entry.path)
     return total
 
+def _app_cds_launch(server, paths, level, build_type):
+    """(jar pro -jar, příznaky JVM) – s AppCDS archivem buildu, pokud sedí na jar serveru, JVM a její parametry"""
+    if not server.build_version:
+        return paths['server_jar'], []
+    found = find_app_cds_archive(
+        build_source_path(server.build_version),
+        os.path.join(paths['server_path'], paths['server_jar']),
+        JAVA_EXECUTABLE,
+        jvm_flags(level, build_type, server.jvm_profile)
+    )
+    if not found:
+        return paths['server_jar'], []
+    launch_jar = prepare_app_cds_jar(paths['server_path'], paths['server_jar'])
+    if not launch_jar:
+        return paths['server_jar'], []
+    archive_path, meta = found
+    print(
+        f"[INFO] Server {server.id} startuje s AppCDS archivem "
+        f"(trénink: {meta.get('baseline_seconds')} s -> {meta.get('cds_seconds')} s)"
+    )
+    return launch_jar, [f"-XX:SharedArchiveFile={archive_path}"]
+
+
+def _java_heap_mb(java_args):
+    """Max. halda z parametru -Xmx v MB (0, pokud chybí)"""
+    units = {"k": 1 / 1024, "m": 1, "g": 1024}
+    for arg in java_args:
+        match = re.fullmatch(r"-Xmx(\d+)([kKmMgG]?)", arg)
+        if match:
+            return int(int(match.group(1)) * units.get(match.group(2).lower(), 1 / (1024 * 1024)))
+    return 0
+
+
+def _admission_mb(server):
+    """Paměť, kterou server podle tarifu zabere (halda + režie JVM, stejně jako memory.max cgroup)"""
+    level = SERVICE_LEVELS.get(server.service_level, SERVICE_LEVELS[1])
+    return memory_limit_mb(level, level["heap_mb"])
+
+
 def start_server(server_id):
     """Start a specific server"""
-    global USED_CPU
     paths = get_server_paths(server_id)
     if not paths:
         return False
@@ -828,36 +1335,75 @@ def start_server(server_id):
     server = Server.query.get(server_id)
     if not server:
         return False
+    _ensure_rcon_configured(server)
     upnp_ok, fw_ok = ensure_ports_open(server_id, server.server_port, server.query_port)
     if not (upnp_ok or fw_ok):
         print(f"[WARN] Nepodařilo se otevřít porty pro server {server_id}")
     
     build_type = server.build_version.build_type.name.upper() if server.build_version else "VANILLA"
     instance = server_manager.get_instance(server_id)
+    instance.set_console_limit(server.service_level)
+    instance.start_error = None
 
     # Kontrola, zda již server běží
     if instance.process and instance.process.poll() is None:
         print(f"Server {server_id} již běží")
+        instance.start_error = "Server již běží"
+        return False
+
+    # Od teď patří server tomuto startu; čtecí vlákno předchozího JVM po jeho konci nic neuklízí
+    start_token = instance.start_token = object()
+
+    # Do uložení procesu instance "nic neběží" – sonda stavu ji mezitím nesmí uklidit
+    # (uvolnila by jádra, paměť i cgroup, které tento start už drží)
+    instance.starting = True
+
+    # Jádra vybereme před spuštěním JVM, ať se proces nespouští zbytečně
+    level = SERVICE_LEVELS.get(server.service_level, SERVICE_LEVELS[1])
+    free_cores = cpu_allocator.allocate(server_id, level["cores"], dedicated=level.get("dedicated_cores", False))
+    if free_cores is None:
+        print("Nedostatek volných jader!")
+        instance.start_error = "Nedostatek volných jader"
+        instance.starting = False
+        return False
+
+    # Paměť hostitele – JVM, na jehož haldu není místo, by poslalo do swapu všechny servery
+    admitted, reason = admission.admit(server_id, memory_limit_mb(level, level["heap_mb"]))
+    if not admitted:
+        print(f"[WARN] Server {server_id} nelze spustit: {reason}")
+        cpu_allocator.release(server_id)
+        instance.start_error = reason
+        instance.starting = False
         return False
     
     try:
-        # Forge potřebuje jiné parametry
-        if build_type == "FORGE":
-            java_args = [
-                JAVA_EXECUTABLE, "-Xmx6G", "-Xms3G",
-                "-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled",
-                "-XX:MaxGCPauseMillis=200", "-XX:+UnlockExperimentalVMOptions",
-                "-XX:+DisableExplicitGC", "-XX:+AlwaysPreTouch",
-                "-jar", paths['server_jar'], "nogui"
-            ]
-        else:
-            java_args = [JAVA_EXECUTABLE, "-Xmx4G", "-Xms2G", "-jar", paths['server_jar'], "nogui"]
+        # Halda a GC podle tarifu, typu buildu a profilu serveru (stejně jako start.bat/start.sh)
+        launch_jar, cds_flags = _app_cds_launch(server, paths, level, build_type)
+        instance.app_cds = bool(cds_flags)
+        java_args = java_command(
+            JAVA_EXECUTABLE, launch_jar, level, build_type, server.jvm_profile, extra_flags=cds_flags
+        )
+
+        # Zástupce uspaného serveru musí uvolnit herní port dřív, než ho obsadí JVM
+        hibernation.release(server_id)
+
+        # Limity tarifu: JVM se zapíše do své cgroup ještě před exec, takže se počítá celá halda
+        cgroup_path = cgroup_manager.prepare(
+            server_id, cgroup_manager.limits_for(level, _java_heap_mb(java_args))
+        )
+        instance.cgroup_path = cgroup_path
+        instance.started_at = time.time()
+        instance.saw_stopping = False
+        instance.startup_profiler = StartupProfiler()
 
         # Spuštění serveru
         process = subprocess.Popen(
             java_args,
             cwd=paths['server_path'],
-            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
+            # Vlastní skupina procesů – Ctrl+C ani ukončení webu se nepropaguje do JVM
+            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0,
+            start_new_session=os.name != 'nt',
+            preexec_fn=cgroup_manager.attach_hook(cgroup_path) if cgroup_path else None,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             stdin=subprocess.PIPE,
@@ -865,22 +1411,11 @@ def start_server(server_id):
             bufsize=1,
             encoding='utf-8'
         )
-
-        time.sleep(2)  # Dej JVM chvilku času
-
-        if process.poll() is not None:
-            try:
-                early_output = process.stdout.read() if process.stdout else ""
-                for line in early_output.splitlines():
-                    instance.add_output_line(line.strip())
-                    print(line)
-            except Exception as output_error:
-                print(f"Chyba při čtení výstupu po pádu serveru {server_id}: {output_error}")
-
-            instance.cleanup()
-            _close_server_ports(server_id)
-            print(f"Server {server_id} se nespustil, JVM skončila s kódem {process.returncode}")
-            return False
+        instance.lifecycle.set(STATE_STARTING)
+        if cgroup_path and cgroup_manager.path_of(process.pid) != cgroup_path:
+            print(f"[WARN] Server {server_id} se nepodařilo zařadit do cgroup {cgroup_path}, limity se nevynucují")
+            instance.cgroup_path = None
+            cgroup_manager.remove(cgroup_path)
 
         # Najít skutečný JVM proces
         psutil_proc = None
@@ -901,29 +1436,8 @@ def start_server(server_id):
         except Exception as e:
             print(f"Chyba při hledání procesu: {e}")
             psutil_proc = psutil.Process(process.pid)
-
-        # Nastavení afinity (CPU core assignment)
-        if server.service_level == 1:
-            cores_to_assign = 2
-        elif server.service_level == 2:
-            cores_to_assign = 4
-        else:
-            cores_to_assign = 6
-
-        free_cores = []
-        for core in range(total_cores):
-            if core not in USED_CPU:
-                free_cores.append(core)
-            if len(free_cores) >= cores_to_assign:
-                break
-
-        if len(free_cores) < cores_to_assign:
-            print("Nedostatek volných jader!")
-            process.terminate()
-            return False
     
         # Přiřazení jader
-        USED_CPU.extend(free_cores)
         try:
             psutil_proc.cpu_affinity(free_cores)
         except Exception as e:
@@ -933,35 +1447,63 @@ def start_server(server_id):
         instance.process = process
         instance.psutil_proc = psutil_proc
         instance.set_assigned_cores(free_cores)
+        player_tracker.server_started(server_id)
+        try:
+            pid_registry.register(server_id, psutil_proc, paths['server_jar'], paths['server_path'])
+        except (OSError, psutil.Error) as e:
+            print(f"[WARN] Nepodařilo se zapsat server {server_id} do PID registru: {e}")
 
-        # Start čtení konzole
+        # Start čtení konzole – pád JVM i připravenost (řádek "Done") zjistí až toto vlákno
         threading.Thread(
             target=read_console_output, 
-            args=(server_id, process),
+            args=(server_id, process, current_app._get_current_object(), start_token),
             daemon=True
         ).start()
 
-        print(f"Server {server_id} úspěšně spuštěn, přiřazena jádra: {free_cores}")
+        print(f"Server {server_id} spuštěn, přiřazena jádra: {free_cores}")
         return True
         
     except Exception as e:
         print(f"Chyba při startu serveru {server_id}: {e}")
+        instance.start_error = f"Chyba při startu: {e}"
+        instance.startup_profiler = None
         # Uvolnění jader při chybě
         instance.cleanup()
+        instance.lifecycle.set(STATE_CRASHED)
         return False
+    finally:
+        instance.starting = False
 
     
-def read_console_output(server_id, process):
-    """Read console output for a specific server"""
+def read_console_output(server_id, process, app=None, start_token=None):
+    """Read console output for a specific server
+
+    Po konci procesu uklidí a vyhodnotí pád jen vlákno aktuálního startu (start_token) –
+    starý JVM při restartu může skončit až po spuštění nového.
+    """
     instance = server_manager.get_instance(server_id)
     
     try:
         for line in iter(process.stdout.readline, ''):
             if line:
-                instance.add_output_line(line.strip())
-                
-                if "Done" in line:  # Server started successfully
-                    print(f"Server {server_id} started successfully: {line.strip()}")
+                line = line.strip()
+                instance.add_output_line(line)
+                if not instance.saw_stopping and is_stopping_line(line):
+                    instance.saw_stopping = True
+
+                # Časová osa startu se skládá jen do řádku "Done", pak už parser nestojí nic
+                profiler = instance.startup_profiler
+                if profiler is not None:
+                    profiler.feed(line)
+
+                startup_seconds = parse_ready_line(line)
+                if startup_seconds is not None and instance.lifecycle.transition(
+                        (STATE_STARTING,), STATE_READY, startup_seconds=startup_seconds):
+                    admission.settle(server_id)
+                    print(f"Server {server_id} started successfully: {line}")
+                    if profiler is not None:
+                        instance.startup_profiler = None
+                        _record_startup(server_id, instance, profiler.finish(startup_seconds), app)
     except Exception as e:
         print(f"Chyba při čtení konzole serveru {server_id}: {e}")
     finally:
@@ -973,10 +1515,97 @@ def read_console_output(server_id, process):
             
         return_code = process.wait()
         print(f"Proces serveru {server_id} skončil s kódem: {return_code}")
-        instance.cleanup()
+        if start_token is not None and instance.start_token is not start_token:
+            # Mezitím proběhl nový start – jádra, cgroup, PID registr i stav patří novému JVM
+            print(f"[INFO] Server {server_id}: konec předchozího procesu se ignoruje, běží novější start")
+        else:
+            # Start, který nedoběhl do "Done", se nezaznamená (časová osa se jinak maže jen v start_server)
+            instance.startup_profiler = None
+            instance.cleanup()
+            _classify_process_exit(server_id, instance, return_code, app)
+
+
+def _classify_process_exit(server_id, instance, return_code, app):
+    """Konec po "stop" (z webu nebo z konzole) je řádné vypnutí, jinak pád"""
+    if instance.lifecycle.state != STATE_STOPPED:
+        if app is not None:
+            with app.app_context():
+                _handle_process_exit(server_id, instance, return_code)
+        elif instance.lifecycle.state == STATE_STOPPING or (return_code == 0 and instance.saw_stopping):
+            instance.lifecycle.set(STATE_STOPPED, exit_code=return_code)
+        else:
+            instance.lifecycle.set(STATE_CRASHED, exit_code=return_code)
 
-def stop_server(server_id, pid=None):
-    """Stop a specific server and close its ports."""
+
+def _record_startup(server_id, instance, profile, app):
+    """Uloží časovou osu startu (fáze, pluginy/mody) do ServerStartup"""
+    if app is None:
+        return
+    slowest = ", ".join(f"{item['name']} {item['seconds']:.1f} s" for item in profile["components"][:3])
+    print(f"[INFO] Server {server_id}: start {profile['total_seconds']:.1f} s" + (f", nejpomalejší: {slowest}" if slowest else ""))
+    with app.app_context():
+        server = Server.query.get(server_id)
+        startup = ServerStartup(
+            server_id=server_id,
+            build_type=_server_status_meta(server)[0] if server else None,
+            total_seconds=profile["total_seconds"],
+            reported_seconds=profile["reported_seconds"],
+            app_cds=instance.app_cds,
+            timeline=json.dumps({"phases": profile["phases"], "world_progress": profile["world_progress"]})
+        )
+        startup.components = [
+            StartupComponent(kind=item["kind"], name=item["name"][:100], seconds=item["seconds"])
+            for item in profile["components"]
+        ]
+        try:
+            db.session.add(startup)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"[WARN] Nepodařilo se uložit průběh startu serveru {server_id}: {e}")
+
+
+def _handle_process_exit(server_id, instance, return_code):
+    """Rozliší řádné vypnutí od pádu; pád zapíše a předá watchdogu k restartu"""
+    paths = get_server_paths(server_id)
+    crash_report = find_crash_report(paths['server_path'], instance.started_at) \
+        if paths and instance.started_at else None
+    reason = classify_exit(
+        return_code, instance.lifecycle.state == STATE_STOPPING, instance.saw_stopping, crash_report
+    )
+    if reason is None:
+        instance.lifecycle.set(STATE_STOPPED, exit_code=return_code)
+        return
+
+    instance.lifecycle.set(STATE_CRASHED, exit_code=return_code)
+    action, delay = crash_watchdog.record_crash(server_id)
+    uptime = round(time.time() - instance.started_at, 1) if instance.started_at else None
+    if action == ACTION_RESTART:
+        print(f"[WARN] Server {server_id} spadl ({reason}), restart za {delay} s")
+    else:
+        print(f"[WARN] Server {server_id} spadl ({reason}), automatický restart neproběhne ({action})")
+        # Porty zůstávají otevřené jen pro naplánovaný restart
+        _close_server_ports(server_id)
+
+    try:
+        db.session.add(CrashEvent(
+            server_id=server_id,
+            exit_code=return_code,
+            uptime_seconds=uptime,
+            reason=reason[:255],
+            crash_report=os.path.basename(crash_report) if crash_report else None,
+            last_lines="\n".join(instance.get_output(CRASH_EVENT_LINES)),
+            action=action,
+            restart_delay=delay
+        ))
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"[WARN] Nepodařilo se zapsat pád serveru {server_id}: {e}")
+
+@supervised
+def stop_server(server_id, pid=None, close_ports=True, timeout=None):
+    """Stop a specific server and close its ports (uspávaný server je nechá otevřené)."""
     instance = server_manager.get_instance(server_id)
     
     try:
@@ -992,26 +1621,27 @@ def stop_server(server_id, pid=None):
         if not target_pid:
             print(f"Nelze najít PID pro zastavení serveru {server_id}")
             instance.cleanup()
+            instance.lifecycle.set(STATE_STOPPED)
             # I když proces není nalezen, zkusíme zavřít porty (pro jistotu)
-            _close_server_ports(server_id)
+            if close_ports:
+                _close_server_ports(server_id)
             return True  # Už je zastavený
             
-        # Pokus o graceful shutdown
-        if instance.process and instance.process.poll() is None:
-            try:
-                instance.process.stdin.write('stop\n')
-                instance.process.stdin.flush()
-            except Exception as e:
-                print(f"Chyba při posílání stop příkazu: {e}")
+        instance.lifecycle.set(STATE_STOPPING)
+
+        # Pokus o graceful shutdown – přes stdin, u převzatého serveru přes RCON
+        result = run_server_command(server_id, 'stop')
+        if not result['success']:
+            print(f"Chyba při posílání stop příkazu: {result.get('error')}")
         
-        # Wait max 30 seconds for shutdown
-        for _ in range(30):
-            if not psutil.pid_exists(target_pid):
-                instance.cleanup()
-                print(f"Server {server_id} úspěšně zastaven")
+        # Čekáme na skutečný konec procesu (max LIFECYCLE_STOP_TIMEOUT s), ne v pevných krocích
+        if _wait_for_exit(instance, target_pid, LIFECYCLE_STOP_TIMEOUT if timeout is None else timeout):
+            instance.cleanup()
+            instance.lifecycle.set(STATE_STOPPED)
+            print(f"Server {server_id} úspěšně zastaven")
+            if close_ports:
                 _close_server_ports(server_id)
-                return True
-            time.sleep(1)
+            return True
         
         # Forceful termination if still running
         print(f"Vynucené ukončení serveru {server_id}")
@@ -1026,14 +1656,32 @@ def stop_server(server_id, pid=None):
                 pass
                 
         instance.cleanup()
-        _close_server_ports(server_id)
+        instance.lifecycle.set(STATE_STOPPED)
+        if close_ports:
+            _close_server_ports(server_id)
         return True
         
     except Exception as e:
         print(f"Chyba při zastavování serveru {server_id}: {e}")
         instance.cleanup()
+        instance.lifecycle.set(STATE_STOPPED)
         # I při chybě se pokusíme zavřít porty
-        _close_server_ports(server_id)
+        if close_ports:
+            _close_server_ports(server_id)
+        return False
+
+
+def _wait_for_exit(instance, target_pid, timeout):
+    """Počká na ukončení procesu serveru; vrací True, pokud skončil do timeoutu"""
+    try:
+        if instance.process and instance.process.pid == target_pid:
+            instance.process.wait(timeout=timeout)
+        else:
+            psutil.Process(target_pid).wait(timeout=timeout)
+        return True
+    except psutil.NoSuchProcess:
+        return True
+    except (subprocess.TimeoutExpired, psutil.TimeoutExpired):
         return False
 
 def _close_server_ports(server_id):
@@ -1047,36 +1695,395 @@ def _close_server_ports(server_id):
     except Exception as e:
         print(f"[ERROR] Chyba při zavírání portů serveru {server_id}: {e}")
     
+@supervised
 def restart_server(server_id):
     """Restart a specific server"""
     status = get_server_status(server_id)
     if status['status'] == 'running':
+        # stop_server se vrací až po skutečném konci JVM, start může následovat hned
         if not stop_server(server_id, status['pid']):
             return False
-        time.sleep(5)
     return start_server(server_id)
 
+def _start_and_wait(server_id, on_wait=None):
+    """Spustí server a počká na řádek "Done" (nebo pád JVM); vrací (success, error)"""
+    instance = server_manager.get_instance(server_id)
+    server = Server.query.get(server_id)
+    if server and not (instance.process and instance.process.poll() is None):
+        # Bez volné paměti start počká ve frontě, než některý server skončí nebo se uspí
+        reason = admission.wait(server_id, _admission_mb(server), ADMISSION_QUEUE_SECONDS, on_wait=on_wait)
+        if reason:
+            return False, reason
+    if not start_server(server_id):
+        return False, instance.start_error or "Server se nepodařilo spustit"
+
+    state = instance.lifecycle.wait_for((STATE_READY, STATE_CRASHED, STATE_STOPPED), LIFECYCLE_START_TIMEOUT)
+    if state == STATE_READY:
+        return True, None
+    if state == STATE_STARTING:
+        return False, f"Server nenahlásil dokončení startu do {LIFECYCLE_START_TIMEOUT} s"
+    return False, f"Server se při startu ukončil (kód {instance.lifecycle.exit_code})"
+
+
+def _start_job(job):
+    success, error = _start_and_wait(
+        job.server_id, on_wait=lambda waiting: job.result.update({'admission': waiting})
+    )
+    job.result = server_manager.get_instance(job.server_id).lifecycle.to_dict()
+    if not success:
+        # Uspaný server zůstává uspaný, další pokus o připojení ho zkusí probudit znovu
+        hibernation.wake_failed(job.server_id)
+    return success, error
+
+
+def _stop_job(job):
+    status = get_server_status(job.server_id)
+    if status['status'] != 'running':
+        if hibernation.release(job.server_id):
+            # Ruční vypnutí uspaného serveru – zrušit zástupce i otevřené porty
+            _close_server_ports(job.server_id)
+            return True, None
+        return False, "Server neběží"
+    success = stop_server(job.server_id, status['pid'])
+    job.result = server_manager.get_instance(job.server_id).lifecycle.to_dict()
+    return success, None if success else "Server se nepodařilo zastavit"
+
+
+def _hibernate_job(job):
+    """Zastaví nečinný server a na jeho port postaví zástupce, který ho při připojení probudí"""
+    status = get_server_status(job.server_id)
+    if status['status'] != 'running':
+        return False, "Server neběží"
+    if get_online_player_info(job.server_id)["count"] > 0:
+        return False, "Na serveru jsou hráči"
+    server = Server.query.get(job.server_id)
+    properties_path = get_server_properties_path(job.server_id)
+    properties = parse_server_properties_file(properties_path) \
+        if properties_path and os.path.exists(properties_path) else {}
+
+    # Porty zůstávají otevřené – bude na nich poslouchat zástupce
+    success = stop_server(job.server_id, status['pid'], close_ports=False)
+    job.result = server_manager.get_instance(job.server_id).lifecycle.to_dict()
+    if not success:
+        return False, "Server se nepodařilo zastavit"
+    try:
+        max_players = int(properties.get("max-players") or 20)
+    except ValueError:
+        max_players = 20
+    if not hibernation.sleep(server.id, server.server_port, properties.get("motd") or server.name, max_players):
+        _close_server_ports(server.id)
+        return False, "Server je zastavený, ale zástupce na jeho portu se nepodařilo spustit"
+    print(f"[INFO] Server {server.id} uspán, port {server.server_port} hlídá zástupce")
+    return True, None
+
+
+def _restart_job(job):
+    status = get_server_status(job.server_id)
+    if status['status'] == 'running':
+        # stop_server se vrací až po skutečném konci JVM, start může následovat hned
+        if not stop_server(job.server_id, status['pid']):
+            return False, "Server se nepodařilo zastavit"
+    return _start_job(job)
+
+
+LIFECYCLE_ACTIONS = {
+    'start': _start_job,
+    'stop': _stop_job,
+    'restart': _restart_job,
+    'hibernate': _hibernate_job,
+    # Restart po pádu naplánovaný watchdogem – na rozdíl od ručního startu nespojí pojistku
+    'crash_restart': _start_job,
+}
+
+
+@supervised
+def submit_lifecycle_job(server_id, action):
+    """Naplánuje start/stop/restart na pozadí; vrací (job, created)"""
+    if action in ('start', 'restart'):
+        # Ruční zásah – zapomenout pády a spojit pojistku proti smyčce pádů
+        crash_watchdog.reset(server_id)
+    elif action == 'stop':
+        crash_watchdog.cancel(server_id)
+    return lifecycle_jobs.submit(
+        server_id, action, LIFECYCLE_ACTIONS[action], current_app._get_current_object()
+    )
+
+
+def _fleet_stop(server_id, timeout):
+    status = get_server_status(server_id)
+    if status['status'] != 'running':
+        return True, None
+    if stop_server(server_id, status['pid'], timeout=timeout):
+        return True, None
+    return False, "Server se nepodařilo zastavit"
+
+
+# Hromadný start (po "Done" dalšího serveru) a vypnutí se společným limitem, viz fleet.py
+fleet = FleetOrchestrator(_start_and_wait, _fleet_stop)
+
+
+def _fleet_servers(server_ids=None, levels=None):
+    query = status_query()
+    if server_ids:
+        query = query.filter(Server.id.in_(server_ids))
+    if levels:
+        query = query.filter(Server.service_level.in_(levels))
+    servers = query.all()
+    # Přesný stav je důležitější než rychlá odpověď – server ve stavu 'unknown' by se startoval podruhé
+    return servers, collect_servers_status(servers, deadline=LIFECYCLE_STOP_TIMEOUT)
+
+
+@supervised
+def submit_fleet_boot(server_ids=None, levels=None, concurrency=None):
+    """Spustí zastavené servery podle priority tarifu, najednou nejvýš `concurrency`; vrací (run, created)"""
+    servers, statuses = _fleet_servers(server_ids, levels)
+    targets = [
+        server.id for server in boot_order(servers)
+        if statuses.get(server.id, {}).get('status') != 'running'
+    ]
+    run, created = fleet.boot(
+        targets, concurrency or FLEET_BOOT_CONCURRENCY, current_app._get_current_object()
+    )
+    return run.to_dict(), created
+
+
+@supervised
+def submit_fleet_shutdown(server_ids=None, levels=None, budget_seconds=None):
+    """Pošle stop všem běžícím serverům najednou, po `budget_seconds` je ukončí; vrací (run, created)"""
+    servers, statuses = _fleet_servers(server_ids, levels)
+    for server in servers:
+        # Spadlý server se během údržby nesmí sám nastartovat
+        crash_watchdog.cancel(server.id)
+    targets = [server.id for server in servers if statuses.get(server.id, {}).get('status') == 'running']
+    run, created = fleet.shutdown(
+        targets, budget_seconds or FLEET_SHUTDOWN_BUDGET, current_app._get_current_object()
+    )
+    return run.to_dict(), created
+
+
+@supervised
+def get_fleet_run(run_id=None):
+    """Stav hromadné operace (bez ID poslední); None, pokud neexistuje"""
+    run = fleet.get(run_id) if run_id else fleet.latest()
+    return run.to_dict() if run else None
+
+
+@supervised
+def get_memory_capacity():
+    """Přidělená paměť serverů vs. fyzická RAM hostitele (viz admission.py)"""
+    return admission.summary()
+
+
+@supervised
 def send_command_to_server(server_id, command):
     """Send command to specific server"""
-    instance = server_manager.get_instance(server_id)
-    
-    if not instance.process or instance.process.poll() is not None:
-        return False
-        
+    return run_server_command(server_id, command)['success']
+
+
+def _ensure_rcon_configured(server):
+    """Doplní RCON do server.properties serverů vytvořených před jeho zavedením"""
+    properties_path = get_server_properties_path(server.id)
+    if not properties_path or not os.path.exists(properties_path):
+        return
+    properties = parse_server_properties_file(properties_path)
+    expected_port = str(server.server_port + RCON_PORT_OFFSET)
+    if properties.get("enable-rcon") == "true" and properties.get("rcon.password") \
+            and properties.get("rcon.port") == expected_port:
+        return
     try:
-        instance.process.stdin.write(command + '\n')
-        instance.process.stdin.flush()
-        return True
-    except Exception as e:
-        print(f"Command error for server {server_id}: {e}")
-        return False
+        write_server_properties_file(
+            properties_path, rcon_properties(server.server_port, properties.get("rcon.password") or None)
+        )
+    except OSError as e:
+        print(f"[WARN] Nepodařilo se nastavit RCON serveru {server.id}: {e}")
+
+
+def _rcon_settings(server_id):
+    """(port, heslo) z server.properties, nebo None, pokud server nemá RCON zapnutý"""
+    properties_path = get_server_properties_path(server_id)
+    try:
+        mtime = os.path.getmtime(properties_path)
+    except (TypeError, OSError):
+        return None
+    cached = _rcon_settings_cache.get(server_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    properties = parse_server_properties_file(properties_path)
+    settings = None
+    port = properties.get("rcon.port", "")
+    if properties.get("enable-rcon") == "true" and properties.get("rcon.password") and port.isdigit():
+        settings = (int(port), properties["rcon.password"])
+    _rcon_settings_cache[server_id] = (mtime, settings)
+    return settings
+
+
+def _run_rcon_commands(server_id, settings, commands):
+    if settings is None:
+        return {'success': False, 'responses': [], 'error': 'RCON není na serveru zapnutý'}
+    responses = []
+    try:
+        for command in commands:
+            responses.append(rcon_pool.command(server_id, settings[0], settings[1], command))
+    except RconError as e:
+        return {'success': False, 'responses': responses, 'error': str(e)}
+    return {'success': True, 'responses': responses}
+
+
+@supervised
+def run_server_command(server_id, command, capture=False):
+    """
+    Provede příkaz na serveru; vrací {'success', 'response', 'via'} (při chybě 'error').
+
+    Bez `capture` jde příkaz na stdin, takže se výstup objeví v konzoli. S `capture`,
+    nebo u převzatého serveru bez stdin, jde přes RCON a vrací se odpověď serveru.
+    """
+    instance = server_manager.get_instance(server_id)
+    if not capture:
+        try:
+            if instance.write_stdin(command):
+                return {'success': True, 'response': None, 'via': 'stdin'}
+        except (OSError, ValueError) as e:
+            print(f"Command error for server {server_id}: {e}")
+
+    result = _run_rcon_commands(server_id, _rcon_settings(server_id), [command])
+    if not result['success']:
+        return {'success': False, 'response': None, 'via': 'rcon', 'error': result['error']}
+    return {'success': True, 'response': result['responses'][0], 'via': 'rcon'}
+
 
+@supervised
+def run_bulk_commands(server_ids, commands):
+    """
+    Provede příkazy přes RCON na více serverech souběžně (save-all, whitelist, ...).
+
+    Na jednom serveru jdou příkazy v pořadí; vrací {server_id: {'success', 'responses', 'error'}}.
+    """
+    # server.properties se čtou zde – vlákna poolu nemají app context
+    settings = {server_id: _rcon_settings(server_id) for server_id in server_ids}
+    futures = {
+        server_id: _command_executor.submit(_run_rcon_commands, server_id, settings[server_id], commands)
+        for server_id in server_ids
+    }
+    return {server_id: future.result() for server_id, future in futures.items()}
+
+@supervised
 def read_latest_logs(server_id, lines=50):
     """Get latest logs for specific server"""
     instance = server_manager.get_instance(server_id)
     return instance.get_output(lines)
 
 
+@supervised
+def get_lifecycle_job(job_id):
+    """Stav lifecycle jobu včetně stavu serveru, nebo None"""
+    job = lifecycle_jobs.get(job_id)
+    if not job:
+        return None
+    data = job.to_dict()
+    data['server_state'] = server_manager.get_instance(job.server_id).lifecycle.to_dict()
+    return data
+
+
+@supervised
+def get_lifecycle_info(server_id):
+    """Aktuální stav serveru a jeho poslední lifecycle job"""
+    job = lifecycle_jobs.latest(server_id)
+    return {
+        **server_manager.get_instance(server_id).lifecycle.to_dict(),
+        'job': job.to_dict() if job else None
+    }
+
+
+@supervised
+def get_crash_watchdog_state(server_id):
+    """Pády v okně, stav pojistky a čas naplánovaného restartu"""
+    return crash_watchdog.state(server_id)
+
+
+@supervised
+def get_player_playtime(server_id):
+    return player_tracker.playtime(server_id)
+
+
+@supervised
+def get_server_metrics(server_id, range_name):
+    """Historie metrik serveru pro daný rozsah, None pro neznámý rozsah"""
+    return metrics_store.query(server_id, range_name)
+
+
+def _console_payload(instance, entries, reset):
+    # HTML se skládá z fragmentů převedených jen jednou za život řádku
+    return {
+        "html": instance.console_output.render_html(entries),
+        "first_seq": entries[0].seq if entries else None,
+        "last_seq": entries[-1].seq if entries else instance.console_output.last_seq,
+        "reset": reset
+    }
+
+
+@supervised
+def get_console_lines(server_id, lines=50, since=None):
+    """Posledních `lines` řádků konzole, nebo (se since) jen řádky novější než since"""
+    instance = server_manager.get_instance(server_id)
+    if since is None:
+        return _console_payload(instance, instance.console_output.tail(lines), True)
+    entries, reset = instance.get_output_since(since, limit=max(lines, 1))
+    return _console_payload(instance, entries, reset)
+
+
+@supervised
+def wait_console_lines(server_id, since, lines=200, timeout=15):
+    """
+    Počká nejvýš `timeout` s na řádky novější než since.
+
+    Vrací stejný payload jako get_console_lines, nebo None, pokud nic nepřibylo.
+    """
+    instance = server_manager.get_instance(server_id)
+    buffer = instance.console_output
+    # Přihlásit se před kontrolou bufferu, aby se mezi tím neztratil žádný řádek
+    subscriber = buffer.subscribe()
+    try:
+        payload = get_console_lines(server_id, lines, since=since)
+        if payload["first_seq"] is None and not payload["reset"]:
+            subscriber.get(timeout=timeout)
+            payload = get_console_lines(server_id, lines, since=since)
+    finally:
+        buffer.unsubscribe(subscriber)
+    if payload["first_seq"] is None and not payload["reset"]:
+        return None
+    return payload
+
+
+@supervised
+def get_console_history(server_id, before, limit=500):
+    """Starší řádky konzole ze záznamu na disku (before = seq nejstaršího zobrazeného řádku)"""
+    instance = server_manager.get_instance(server_id)
+    entries = instance.get_output_before(before, limit)
+    first_seq = entries[0].seq if entries else before
+    return {
+        "html": instance.console_output.render_html(entries),
+        "first_seq": first_seq,
+        "has_more": first_seq > max(instance.console_capture.first_seq, 1)
+    }
+
+
+@supervised
+def search_server_logs(server_id, logs_dir, query, levels=None, since=None, until=None, limit=200):
+    """Fulltextové hledání v lozích serveru; index zapisuje jen proces, který vlastní běhový stav"""
+    # Požadavek jen čte hotový index – indexaci (gzip archivy, FTS) dělá výhradně vlákno na pozadí
+    log_search.ensure_started()
+    index = log_search.get_index(server_id, logs_dir)
+    started = time.perf_counter()
+    hits = index.search(query, levels=levels, since=since, until=until, limit=limit)
+    return {
+        'hits': hits,
+        'indexing': not index.up_to_date,
+        'indexed_at': index.synced_at,
+        'took_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
 def create_backup_for_server(server_id, backup_name=None):
     """Create backup for specific server"""
     paths = get_server_paths(server_id)
@@ -1210,22 +2217,25 @@ def get_disk_usage_for_server(server_id):
 server_api = Blueprint('server_api', __name__)
 
 
+@server_api.app_errorhandler(SupervisorUnavailable)
+def supervisor_unavailable(error):
+    print(f"[ERROR] {error}")
+    return jsonify({'error': 'Supervisor serverů není dostupný'}), 503
+
+
 @server_api.route('/api/servers/status')
 @login_required
 def all_servers_status_api():
     """Vrátí stavy všech serverů uživatele v jednom requestu"""
     user = current_user
     
-    # Získat všechny servery uživatele
-    owned = user.owned_servers
-    admin_only = user.admin_of_servers.filter(Server.owner_id != user.id).all()
-    all_servers = list(owned) + admin_only
-    
-    statuses = {}
-    for server in all_servers:
-        status = get_server_status(server.id)
-        statuses[server.id] = status
+    # Všechny servery uživatele (vlastněné i spravované) jedním dotazem
+    all_servers = status_query().filter(db.or_(
+        Server.owner_id == user.id,
+        Server.admins.any(User.id == user.id)
+    )).all()
     
+    statuses = collect_servers_status(all_servers)
     return jsonify(statuses)
 
 # API endpoints
@@ -1255,6 +2265,41 @@ def server_status_api():
     return jsonify(status)
 
 
+@server_api.route('/api/server/players/playtime', methods=['GET'])
+@login_required
+def server_playtime_api():
+    """Odehraný čas hráčů (celkem, počet sessions, aktuální session)"""
+    server_id = request.args.get('server_id', type=int)
+    if not server_id:
+        return jsonify({'error': 'Missing server_id'}), 400
+
+    server = Server.query.get_or_404(server_id)
+    if not user_can_manage_server(server):
+        abort(403)
+
+    return jsonify({'players': get_player_playtime(server_id)})
+
+
+@server_api.route('/api/server/metrics', methods=['GET'])
+@login_required
+def server_metrics_api():
+    """Historie CPU/RAM serveru ve sloupcovém formátu pro graf"""
+    server_id = request.args.get('server_id', type=int)
+    if not server_id:
+        return jsonify({'error': 'Missing server_id'}), 400
+
+    server = Server.query.get_or_404(server_id)
+    if not user_can_manage_server(server):
+        abort(403)
+
+    range_name = request.args.get('range', '1h')
+    data = get_server_metrics(server_id, range_name)
+    if data is None:
+        return jsonify({'error': f"Unknown range, use one of: {', '.join(METRICS_RANGES)}"}), 400
+
+    return jsonify({'server_id': server_id, **data})
+
+
 @server_api.route('/api/server/info', methods=['GET'])
 @login_required
 def get_server_info():
@@ -1295,6 +2340,17 @@ def server_backups_api():
     
     return jsonify(get_backups(server_id))
 
+def _lifecycle_response(server_id, action):
+    job, created = submit_lifecycle_job(server_id, action)
+    if not created:
+        return jsonify({
+            'success': False,
+            'error': f'Na serveru už probíhá {job.action}',
+            'job': job.to_dict()
+        }), 409
+    return jsonify({'success': True, 'job': job.to_dict()}), 202
+
+
 @server_api.route('/api/server/start', methods=['POST'])
 @login_required
 def start_server_api():
@@ -1307,8 +2363,7 @@ def start_server_api():
     if not server_id:
         return jsonify({'error': 'Missing server_id in JSON body'}), 400
     
-    success = start_server(server_id)
-    return jsonify({'success': success})
+    return _lifecycle_response(int(server_id), 'start')
 
 @server_api.route('/api/server/stop', methods=['POST'])
 @login_required
@@ -1323,9 +2378,9 @@ def stop_server_api():
         return jsonify({'error': 'Missing server_id in JSON body'}), 400
     
     status = get_server_status(server_id)
-    if status['status'] == 'running':
-        success = stop_server(server_id, status['pid'])
-        return jsonify({'success': success})
+    # Uspaný server se "vypne" zrušením zástupce na jeho portu
+    if status['status'] == 'running' or status.get('hibernating'):
+        return _lifecycle_response(int(server_id), 'stop')
     return jsonify({'error': 'Server is not running'}), 400
 
 @server_api.route('/api/server/restart', methods=['POST'])
@@ -1340,33 +2395,180 @@ def restart_server_api():
     if not server_id:
         return jsonify({'error': 'Missing server_id in JSON body'}), 400
     
-    status = get_server_status(server_id)
-    if status['status'] == 'running':
-        stop_success = stop_server(server_id, status['pid'])
-        if not stop_success:
-            return jsonify({'error': 'Failed to stop server'}), 500
-        time.sleep(5)
-    
-    start_success = start_server(server_id)
-    return jsonify({'success': start_success})
+    return _lifecycle_response(int(server_id), 'restart')
 
+@server_api.route('/api/server/jobs/<job_id>')
 @login_required
+def lifecycle_job_api(job_id):
+    """Stav lifecycle jobu (queued / running / succeeded / failed) a stav serveru"""
+    data = get_lifecycle_job(job_id)
+    if not data:
+        return jsonify({'error': 'Job not found'}), 404
+
+    server = Server.query.get_or_404(data['server_id'])
+    if not user_can_manage_server(server):
+        abort(403)
+
+    return jsonify(data)
+
+@server_api.route('/api/server/lifecycle')
+@login_required
+def server_lifecycle_api():
+    """Aktuální stav serveru a poslední lifecycle job"""
+    server_id = request.args.get('server_id', type=int)
+    if not server_id:
+        return jsonify({'error': 'Missing server_id'}), 400
+
+    server = Server.query.get_or_404(server_id)
+    if not user_can_manage_server(server):
+        abort(403)
+
+    return jsonify(get_lifecycle_info(server_id))
+
+@server_api.route('/api/server/crashes', methods=['GET'])
+@login_required
+def server_crashes_api():
+    """Poslední pády serveru s posledními řádky konzole"""
+    server_id = request.args.get('server_id', type=int)
+    if not server_id:
+        return jsonify({'error': 'Missing server_id'}), 400
+
+    server = Server.query.get_or_404(server_id)
+    if not user_can_manage_server(server):
+        abort(403)
+
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    events = server.crash_events.order_by(CrashEvent.occurred_at.desc()).limit(limit).all()
+    return jsonify({
+        'watchdog': get_crash_watchdog_state(server_id),
+        'crashes': [{
+            'id': event.id,
+            'occurred_at': event.occurred_at.isoformat() if event.occurred_at else None,
+            'exit_code': event.exit_code,
+            'uptime_seconds': event.uptime_seconds,
+            'reason': event.reason,
+            'crash_report': event.crash_report,
+            'action': event.action,
+            'restart_delay': event.restart_delay,
+            'last_lines': (event.last_lines or '').splitlines(),
+        } for event in events]
+    })
+
+@server_api.route('/api/server/startups', methods=['GET'])
+@login_required
+def server_startups_api():
+    """Poslední starty serveru: fáze, příprava světa a nejpomalejší pluginy/mody"""
+    server_id = request.args.get('server_id', type=int)
+    if not server_id:
+        return jsonify({'error': 'Missing server_id'}), 400
+
+    server = Server.query.get_or_404(server_id)
+    if not user_can_manage_server(server):
+        abort(403)
+
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    startups = server.startups.options(joinedload(ServerStartup.components)) \
+        .order_by(ServerStartup.started_at.desc()).limit(limit).all()
+    return jsonify({'startups': [{
+        'id': startup.id,
+        'started_at': startup.started_at.isoformat() if startup.started_at else None,
+        'build_type': startup.build_type,
+        'total_seconds': startup.total_seconds,
+        'reported_seconds': startup.reported_seconds,
+        'app_cds': startup.app_cds,
+        **json.loads(startup.timeline or '{}'),
+        'components': [
+            {'kind': component.kind, 'name': component.name, 'seconds': component.seconds}
+            for component in sorted(startup.components, key=lambda component: -component.seconds)
+        ],
+    } for startup in startups]})
+
 @server_api.route('/api/server/logs')
+@login_required
 def server_logs_api():
     server_id = request.args.get('server_id', type=int)
     if not server_id:
         return jsonify({'error': 'Missing server_id'}), 400
 
+    server = Server.query.get_or_404(server_id)
+    if not user_can_manage_server(server):
+        abort(403)
+
     lines = request.args.get('lines', default=50, type=int)
-    ansi_lines = read_latest_logs(server_id, lines)  # předpokládám, že to vrací list řádků s ANSI kódy
+    # Se since jen inkrementální režim – řádky novější než since
+    since = request.args.get('since', type=int)
+    return jsonify(get_console_lines(server_id, lines, since=since))
+
+@server_api.route('/api/server/logs/history')
+@login_required
+def server_logs_history_api():
+    """Starší řádky konzole ze záznamu na disku (before = seq nejstaršího zobrazeného řádku)"""
+    server_id = request.args.get('server_id', type=int)
+    before = request.args.get('before', type=int)
+    if not server_id or not before:
+        return jsonify({'error': 'Missing server_id or before'}), 400
+
+    server = Server.query.get_or_404(server_id)
+    if not user_can_manage_server(server):
+        abort(403)
+
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+    return jsonify(get_console_history(server_id, before, limit))
+
+
+def _sse_event(event, data, event_id=None):
+    payload = f"id: {event_id}\n" if event_id is not None else ""
+    return payload + f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@server_api.route('/api/server/logs/stream')
+@login_required
+def server_logs_stream_api():
+    """Server-Sent Events stream nových řádků konzole (obnovení přes Last-Event-ID)"""
+    server_id = request.args.get('server_id', type=int)
+    if not server_id:
+        return jsonify({'error': 'Missing server_id'}), 400
+
+    server = Server.query.get_or_404(server_id)
+    if not user_can_manage_server(server):
+        abort(403)
+
+    lines = request.args.get('lines', default=200, type=int)
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_seq = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_seq = None
+
+    def generate():
+        sent_seq = last_seq
+        # Spojení drží vlákno WSGI serveru – po krátkém okně ho ukončíme a prohlížeč se
+        # hned (retry) připojí znovu s Last-Event-ID, takže otevřené konzole neblokují panel
+        deadline = time.monotonic() + CONSOLE_STREAM_MAX_SECONDS
+        yield f"retry: {CONSOLE_STREAM_RETRY_MS}\n\n"
+        payload = get_console_lines(server_id, lines, since=sent_seq)
+        if payload['first_seq'] is not None or payload['reset']:
+            sent_seq = payload['last_seq']
+            yield _sse_event('lines', payload, sent_seq)
+
+        while time.monotonic() < deadline:
+            # Čekání na nové řádky (v supervisoru přes RPC); za každé volání nejvýš jedna dávka
+            timeout = min(15, max(deadline - time.monotonic(), 1))
+            payload = wait_console_lines(server_id, sent_seq or 0, lines=max(lines, 1), timeout=timeout)
+            if payload is None:
+                yield ": ping\n\n"
+                continue
 
-    # Spojíme řádky do jednoho textu
-    ansi_text = "\n".join(ansi_lines)
+            sent_seq = payload['last_seq']
+            yield _sse_event('lines', payload, sent_seq)
 
-    conv = Ansi2HTMLConverter(inline=True)
-    html_text = conv.convert(ansi_text, full=False)
+    # Generátor nepotřebuje request context, takže se DB session uvolní hned po vrácení odpovědi
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
-    return jsonify({"html": html_text})
 
 @server_api.route('/api/server/old-logs')
 @login_required
@@ -1390,41 +2592,132 @@ def list_old_logs():
 @server_api.route('/api/server/old-logs/view')
 @login_required
 def view_old_log():
+    """
+    Stránkované čtení archivovaného logu.
+
+    Parametry: offset + limit (stránka od začátku), nebo tail (posledních N řádků).
+    Bez offsetu i tailu se vrací konec logu. Soubor se nikdy nenačítá celý do paměti.
+    """
     server_id = request.args.get('server_id')
     filename = request.args.get('filename')
     paths = get_server_paths(server_id)
     if not paths or not filename:
         abort(400)
 
+    # Jen soubory přímo ve složce logs (žádné ../)
+    if os.path.basename(filename) != filename or not filename.endswith((".log", ".log.gz")):
+        abort(400)
+
     log_path = os.path.join(paths['server_path'], "logs", filename)
     if not os.path.exists(log_path):
         abort(404)
 
-    # Pokud je soubor komprimovaný
-    if filename.endswith('.gz'):
-        import gzip
-        with gzip.open(log_path, 'rt', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    else:
-        with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+    limit = min(max(request.args.get('limit', OLD_LOG_PAGE_LINES, type=int), 1), OLD_LOG_MAX_PAGE_LINES)
+    offset = request.args.get('offset', type=int)
+    tail = request.args.get('tail', type=int)
+    if offset is None and tail is None:
+        tail = limit
+
+    try:
+        page = log_reader.read_page(log_path, offset=offset or 0, limit=limit, tail=tail)
+    except OSError as e:
+        print(f"[WARN] Nepodařilo se přečíst log {log_path}: {e}")
+        abort(500)
+
+    page["name"] = filename
+    page["content"] = "\n".join(page.pop("lines"))
+    return jsonify(page)
+
+@server_api.route('/api/server/logs/search')
+@login_required
+def search_logs_api():
+    """
+    Fulltextové hledání v aktuálním i archivovaných lozích serveru.
+
+    Parametry: q (slova, `slovo*` = prefix), level (např. WARN,ERROR),
+    from / to (ISO datum a čas), limit. Zásahy obsahují soubor a číslo řádku.
+    """
+    server_id = request.args.get('server_id', type=int)
+    query = (request.args.get('q') or '').strip()
+    if not server_id or not query:
+        return jsonify({'error': 'Missing server_id or q'}), 400
+
+    server = Server.query.get(server_id)
+    if not server:
+        return jsonify({'error': 'Server not found'}), 404
+    if not user_can_manage_server(server):
+        return jsonify({'error': 'Forbidden'}), 403
+
+    levels = [level.strip().upper() for level in (request.args.get('level') or '').split(',') if level.strip()]
+    if any(level not in LOG_LEVELS for level in levels):
+        return jsonify({'error': f'Invalid level, use {", ".join(LOG_LEVELS)}'}), 400
+
+    try:
+        since = datetime.fromisoformat(request.args['from']).timestamp() if request.args.get('from') else None
+        until = datetime.fromisoformat(request.args['to']).timestamp() if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid from/to, use ISO format (2024-03-12T10:00)'}), 400
+    limit = min(max(request.args.get('limit', 200, type=int), 1), 1000)
+
+    logs_dir = os.path.join(_server_dir(server), "minecraft-server", "logs")
+    return jsonify(search_server_logs(
+        server_id, logs_dir, query, levels=levels, since=since, until=until, limit=limit
+    ))
 
-    return jsonify({"name": filename, "content": content})
 
 @server_api.route('/api/server/command', methods=['POST'])
 @login_required
 def send_command_api():
-    server_id = request.args.get('server_id', type=int)
+    """Příkaz na server; s "capture": true přes RCON s odpovědí serveru"""
+    server_id = get_server_id_from_request()
     if not server_id:
         return jsonify({'error': 'Missing server_id'}), 400
-    
-    data = request.get_json()
-    command = data.get('command')
+
+    server = Server.query.get_or_404(server_id)
+    if not user_can_manage_server(server):
+        abort(403)
+
+    data = get_json_body()
+    command = (data.get('command') or '').strip()
     if not command:
         return jsonify({'error': 'Missing command'}), 400
-    
-    success = send_command_to_server(server_id, command)
-    return jsonify({'success': success})
+
+    return jsonify(run_server_command(server_id, command, capture=bool(data.get('capture'))))
+
+
+@server_api.route('/api/servers/command', methods=['POST'])
+@login_required
+def bulk_command_api():
+    """
+    Hromadné příkazy přes RCON, např. {"server_ids": [1, 2], "commands": ["save-all"]}.
+
+    Vrací výsledek a odpovědi pro každý server zvlášť.
+    """
+    data = get_json_body()
+    commands = data.get('commands') or ([data['command']] if data.get('command') else [])
+    commands = [str(command).strip() for command in commands if str(command).strip()]
+    try:
+        server_ids = sorted({int(server_id) for server_id in data.get('server_ids') or []})
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid server_ids'}), 400
+    if not server_ids or not commands:
+        return jsonify({'error': 'Missing server_ids or commands'}), 400
+    if len(commands) > BULK_COMMANDS_MAX:
+        return jsonify({'error': f'Max {BULK_COMMANDS_MAX} commands'}), 400
+
+    servers = Server.query.filter(Server.id.in_(server_ids)).all()
+    if len(servers) != len(server_ids):
+        return jsonify({'error': 'Server not found'}), 404
+    if not all(user_can_manage_server(server) for server in servers):
+        abort(403)
+
+    started = time.perf_counter()
+    results = run_bulk_commands(server_ids, commands)
+    return jsonify({
+        'results': results,
+        'failed': [server_id for server_id, result in results.items() if not result['success']],
+        'took_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
 
 
 def get_json_body():
@@ -0,0 +1,223 @@
+# metrics_store.py
+import json
+import os
+import threading
+import time
+from array import array
+
+
+# Úrovně historie: (název, délka bucketu v s, počet bodů) – 10 s na 1 h, 1 min na 24 h, 15 min na 7 dní
+TIERS = (
+    ("10s", 10, 360),
+    ("1m", 60, 1440),
+    ("15m", 900, 672),
+)
+
+# Rozsahy pro API a úroveň, ze které se čtou
+RANGES = {
+    "1h": (3600, "10s"),
+    "6h": (6 * 3600, "1m"),
+    "24h": (24 * 3600, "1m"),
+    "7d": (7 * 24 * 3600, "15m"),
+}
+
+# Ukládané veličiny: průměr CPU, špička CPU v bucketu, průměrná RAM (MB), počet vláken
+FIELDS = ("cpu", "cpu_peak", "ram", "threads")
+
+PERSIST_INTERVAL = 300
+
+
+class RingSeries:
+    """Časová řada s pevnou kapacitou nad array('d') – paměť se po vytvoření nemění."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.values = {field: array("d", bytes(8 * capacity)) for field in FIELDS}
+        self.head = 0      # index dalšího zápisu
+        self.count = 0
+
+    def append(self, timestamp, values):
+        self.ts[self.head] = timestamp
+        for field in FIELDS:
+            self.values[field][self.head] = values[field]
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _indices(self):
+        start = (self.head - self.count) % self.capacity
+        return [(start + i) % self.capacity for i in range(self.count)]
+
+    def read(self, since=0):
+        """Vrátí sloupcová data (t + FIELDS) od času `since`."""
+        indices = [i for i in self._indices() if self.ts[i] >= since]
+        result = {"t": [int(self.ts[i]) for i in indices]}
+        for field in FIELDS:
+            column = self.values[field]
+            result[field] = [round(column[i], 1) for i in indices]
+        return result
+
+    def to_dict(self):
+        data = self.read()
+        data["capacity"] = self.capacity
+        return data
+
+    def load(self, data):
+        timestamps = data.get("t", [])
+        offset = max(len(timestamps) - self.capacity, 0)
+        for i in range(offset, len(timestamps)):
+            self.append(timestamps[i], {field: data[field][i] for field in FIELDS})
+
+
+class _Bucket:
+    """Akumulátor jednoho bucketu pro roll-up do další úrovně."""
+
+    def __init__(self, start):
+        self.start = start
+        self.n = 0
+        self.cpu_sum = 0.0
+        self.cpu_peak = 0.0
+        self.ram_sum = 0.0
+        self.threads_sum = 0.0
+
+    def add(self, values, weight=1):
+        self.n += weight
+        self.cpu_sum += values["cpu"] * weight
+        self.cpu_peak = max(self.cpu_peak, values["cpu_peak"])
+        self.ram_sum += values["ram"] * weight
+        self.threads_sum += values["threads"] * weight
+
+    def result(self):
+        return {
+            "cpu": self.cpu_sum / self.n,
+            "cpu_peak": self.cpu_peak,
+            "ram": self.ram_sum / self.n,
+            "threads": self.threads_sum / self.n,
+        }
+
+
+class ServerSeries:
+    """Historie jednoho serveru se všemi úrovněmi a automatickým roll-upem."""
+
+    def __init__(self):
+        self.tiers = {name: RingSeries(capacity) for name, _, capacity in TIERS}
+        self._buckets = {name: None for name, _, _ in TIERS}
+        self.lock = threading.Lock()
+
+    def add_sample(self, timestamp, values):
+        with self.lock:
+            self._feed(0, timestamp, values, 1)
+
+    def _feed(self, level, timestamp, values, weight):
+        name, step, _ = TIERS[level]
+        bucket_start = timestamp - (timestamp % step)
+        bucket = self._buckets[name]
+
+        if bucket is not None and bucket.start != bucket_start:
+            closed = bucket.result()
+            self.tiers[name].append(bucket.start, closed)
+            if level + 1 < len(TIERS):
+                self._feed(level + 1, bucket.start, closed, bucket.n)
+            bucket = None
+
+        if bucket is None:
+            bucket = _Bucket(bucket_start)
+            self._buckets[name] = bucket
+        bucket.add(values, weight)
+
+    def read(self, tier, since):
+        with self.lock:
+            return self.tiers[tier].read(since)
+
+    def to_dict(self):
+        with self.lock:
+            return {name: series.to_dict() for name, series in self.tiers.items()}
+
+    def load(self, data):
+        with self.lock:
+            for name, series in self.tiers.items():
+                if name in data:
+                    series.load(data[name])
+
+
+class MetricsStore:
+    """
+    In-process úložiště historie metrik pro všechny servery.
+
+    Plní se z MetricsSampleru (listener), takže nepřidává žádnou práci do requestů.
+    Úrovně se periodicky ukládají do `storage_path`, aby historie přežila restart webu.
+    """
+
+    def __init__(self, storage_path):
+        self.storage_path = storage_path
+        self.series = {}
+        self.lock = threading.Lock()
+        self._last_persist = time.monotonic()
+
+    def _get_series(self, server_id, create=True):
+        with self.lock:
+            series = self.series.get(server_id)
+            if series is None and create:
+                series = ServerSeries()
+                series.load(self._read_file(server_id))
+                self.series[server_id] = series
+            return series
+
+    def on_sample(self, snapshot, timestamp):
+        """Listener pro MetricsSampler – přidá vzorek každého běžícího serveru."""
+        for server_id, sample in snapshot.items():
+            self._get_series(server_id).add_sample(timestamp, {
+                "cpu": sample["cpu_percent"],
+                "cpu_peak": sample["cpu_percent"],
+                "ram": sample["ram_used_mb"],
+                "threads": sample["threads"],
+            })
+
+        if time.monotonic() - self._last_persist >= PERSIST_INTERVAL:
+            self._last_persist = time.monotonic()
+            self.persist()
+
+    def query(self, server_id, range_name="1h"):
+        """Vrátí sloupcová data pro graf, nebo None pro neznámý rozsah."""
+        if range_name not in RANGES:
+            return None
+        seconds, tier = RANGES[range_name]
+        step = next(step for name, step, _ in TIERS if name == tier)
+        series = self._get_series(server_id, create=False)
+        if series is None:
+            data = self._read_file(server_id).get(tier) or {"t": [], **{field: [] for field in FIELDS}}
+            data.pop("capacity", None)
+            since = time.time() - seconds
+            keep = [i for i, timestamp in enumerate(data["t"]) if timestamp >= since]
+            data = {key: [values[i] for i in keep] for key, values in data.items()}
+        else:
+            data = series.read(tier, time.time() - seconds)
+        return {"range": range_name, "step": step, **data}
+
+    def persist(self):
+        os.makedirs(self.storage_path, exist_ok=True)
+        with self.lock:
+            items = list(self.series.items())
+        for server_id, series in items:
+            path = self._file_path(server_id)
+            try:
+                temp_path = path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as metrics_file:
+                    json.dump(series.to_dict(), metrics_file, separators=(",", ":"))
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"[WARN] Nepodařilo se uložit metriky serveru {server_id}: {e}")
+
+    def _file_path(self, server_id):
+        return os.path.join(self.storage_path, f"server_{server_id}.json")
+
+    def _read_file(self, server_id):
+        path = self._file_path(server_id)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as metrics_file:
+                return json.load(metrics_file)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Nepodařilo se načíst metriky serveru {server_id}: {e}")
+            return {}
@@ -0,0 +1,60 @@
+"""add server_startup and startup_component
+
+Revision ID: a52d8c6e0b37
+Revises: e7b3f92c1d45
+Create Date: 2026-10-17 16:21:47.508913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a52d8c6e0b37'
+down_revision = 'e7b3f92c1d45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('server_startup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('server_id', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('build_type', sa.String(length=50), nullable=True),
+    sa.Column('total_seconds', sa.Float(), nullable=True),
+    sa.Column('reported_seconds', sa.Float(), nullable=True),
+    sa.Column('app_cds', sa.Boolean(), nullable=True),
+    sa.Column('timeline', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['server_id'], ['server.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('server_startup', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_server_startup_server_id'), ['server_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_server_startup_started_at'), ['started_at'], unique=False)
+
+    op.create_table('startup_component',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('startup_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('seconds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['startup_id'], ['server_startup.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('startup_component', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_startup_component_name'), ['name'], unique=False)
+        batch_op.create_index(batch_op.f('ix_startup_component_startup_id'), ['startup_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('startup_component', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_startup_component_startup_id'))
+        batch_op.drop_index(batch_op.f('ix_startup_component_name'))
+
+    op.drop_table('startup_component')
+    with op.batch_alter_table('server_startup', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_server_startup_started_at'))
+        batch_op.drop_index(batch_op.f('ix_server_startup_server_id'))
+
+    op.drop_table('server_startup')
@@ -0,0 +1,26 @@
+"""add jvm_profile to server
+
+Revision ID: c41d7e2a9f10
+Revises: 5a8e9a480893
+Create Date: 2026-10-17 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e2a9f10'
+down_revision = '5a8e9a480893'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('server', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('jvm_profile', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('server', schema=None) as batch_op:
+        batch_op.drop_column('jvm_profile')
@@ -0,0 +1,42 @@
+"""add crash_event
+
+Revision ID: e7b3f92c1d45
+Revises: c41d7e2a9f10
+Create Date: 2026-10-17 14:05:12.731840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3f92c1d45'
+down_revision = 'c41d7e2a9f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('crash_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('server_id', sa.Integer(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=True),
+    sa.Column('exit_code', sa.Integer(), nullable=True),
+    sa.Column('uptime_seconds', sa.Float(), nullable=True),
+    sa.Column('reason', sa.String(length=255), nullable=True),
+    sa.Column('crash_report', sa.String(length=255), nullable=True),
+    sa.Column('last_lines', sa.Text(), nullable=True),
+    sa.Column('action', sa.String(length=20), nullable=True),
+    sa.Column('restart_delay', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['server_id'], ['server.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('crash_event', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_crash_event_server_id'), ['server_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('crash_event', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_crash_event_server_id'))
+
+    op.drop_table('crash_event')
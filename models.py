@@ -61,6 +61,8 @@ class Server(db.Model):
     diagnostic_server_port = db.Column(db.Integer, nullable=True)
     # informace o buildu  
     build_version_id = db.Column(db.Integer, db.ForeignKey('build_version.id'), nullable=False)
+    # Profil JVM (jvm_profiles.PROFILES), None = automaticky podle tarifu
+    jvm_profile = db.Column(db.String(32), nullable=True)
     # Nainstalované pluginy (M:N vztah)
     plugins = db.relationship('Plugin', secondary=server_plugins, 
                             backref='servers', lazy='dynamic')
@@ -311,4 +313,61 @@ class PlayerServerAccess(db.Model):
     # Vztahy
     user = db.relationship('User', backref=db.backref('player_server_accesses', lazy=True))
     server = db.relationship('Server', backref=db.backref('player_accesses', lazy=True))
-    access_code = db.relationship('PlayerAccessCode', backref=db.backref('accesses', lazy=True))
\ No newline at end of file
+    access_code = db.relationship('PlayerAccessCode', backref=db.backref('accesses', lazy=True))
+
+
+class CrashEvent(db.Model):
+    """Pád serveru zachycený watchdogem (crash_watchdog.py)"""
+    __tablename__ = "crash_event"
+
+    id = db.Column(db.Integer, primary_key=True)
+    server_id = db.Column(db.Integer, db.ForeignKey('server.id'), nullable=False, index=True)
+    occurred_at = db.Column(db.DateTime, default=datetime.utcnow)
+    exit_code = db.Column(db.Integer, nullable=True)
+    uptime_seconds = db.Column(db.Float, nullable=True)
+    reason = db.Column(db.String(255))
+    crash_report = db.Column(db.String(255), nullable=True)  # soubor v crash-reports/
+    last_lines = db.Column(db.Text)
+    action = db.Column(db.String(20))  # restart, circuit_open, disabled
+    restart_delay = db.Column(db.Integer, nullable=True)  # sekundy do automatického restartu
+
+    # Vztahy
+    server = db.relationship('Server', backref=db.backref('crash_events', lazy='dynamic'))
+
+    def __repr__(self):
+        return f'<CrashEvent server {self.server_id} at {self.occurred_at}>'
+
+
+class ServerStartup(db.Model):
+    """Jeden start serveru s časovou osou z konzole (startup_profiler.py)"""
+    __tablename__ = "server_startup"
+
+    id = db.Column(db.Integer, primary_key=True)
+    server_id = db.Column(db.Integer, db.ForeignKey('server.id'), nullable=False, index=True)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    build_type = db.Column(db.String(50))
+    total_seconds = db.Column(db.Float)  # od spuštění procesu po "Done"
+    reported_seconds = db.Column(db.Float, nullable=True)  # podle hlášky "Done (x s)!"
+    app_cds = db.Column(db.Boolean, default=False)
+    timeline = db.Column(db.Text)  # JSON: fáze, průběh přípravy světa
+
+    # Vztahy
+    server = db.relationship('Server', backref=db.backref('startups', lazy='dynamic'))
+    components = db.relationship('StartupComponent', backref='startup', lazy=True, cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f'<ServerStartup server {self.server_id} {self.total_seconds} s>'
+
+
+class StartupComponent(db.Model):
+    """Čas inicializace jednoho pluginu nebo modu při startu"""
+    __tablename__ = "startup_component"
+
+    id = db.Column(db.Integer, primary_key=True)
+    startup_id = db.Column(db.Integer, db.ForeignKey('server_startup.id'), nullable=False, index=True)
+    kind = db.Column(db.String(10), nullable=False)  # plugin, mod
+    name = db.Column(db.String(100), nullable=False, index=True)
+    seconds = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<StartupComponent {self.kind} {self.name} {self.seconds} s>'
@@ -0,0 +1,91 @@
+# pid_registry.py
+import json
+import os
+import threading
+import time
+
+import psutil
+
+
+# Tolerance při porovnání create_time (float uložený v JSON vs. hodnota z OS)
+CREATE_TIME_TOLERANCE = 0.5
+
+
+class PidRegistry:
+    """
+    Perzistentní registr JVM procesů spuštěných webem.
+
+    Každý záznam obsahuje pid, create_time, server_id, jar a cwd. Díky create_time
+    je vyhledání procesu jediný psutil.Process(pid) bez procházení všech procesů
+    a recyklovaný PID se nikdy nezamění za náš server.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as registry_file:
+                data = json.load(registry_file)
+            return {int(server_id): entry for server_id, entry in data.items()}
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Nepodařilo se načíst PID registr {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as registry_file:
+            json.dump({str(k): v for k, v in self._entries.items()}, registry_file, indent=2)
+        os.replace(temp_path, self.path)
+
+    def register(self, server_id, proc, jar, cwd):
+        """Zapíše (nebo přepíše) záznam pro běžící JVM serveru."""
+        entry = {
+            "server_id": server_id,
+            "pid": proc.pid,
+            "create_time": proc.create_time(),
+            "jar": jar,
+            "cwd": cwd,
+            "registered_at": time.time(),
+        }
+        with self.lock:
+            self._entries[server_id] = entry
+            self._save()
+
+    def unregister(self, server_id):
+        with self.lock:
+            if self._entries.pop(server_id, None) is not None:
+                self._save()
+
+    def entries(self):
+        with self.lock:
+            return {server_id: dict(entry) for server_id, entry in self._entries.items()}
+
+    def lookup(self, server_id):
+        """Vrátí ověřený psutil.Process pro server, nebo None (neplatný záznam se smaže)."""
+        with self.lock:
+            entry = self._entries.get(server_id)
+        if not entry:
+            return None
+
+        proc = self.validate(entry)
+        if proc is None:
+            self.unregister(server_id)
+        return proc
+
+    @staticmethod
+    def validate(entry):
+        try:
+            proc = psutil.Process(entry["pid"])
+            if abs(proc.create_time() - entry["create_time"]) > CREATE_TIME_TOLERANCE:
+                return None
+            if proc.status() == psutil.STATUS_ZOMBIE:
+                return None
+            return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied, KeyError, TypeError):
+            return None
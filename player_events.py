@@ -0,0 +1,202 @@
+# player_events.py
+import json
+import os
+import re
+import threading
+import time
+
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+# Hlavička řádku: "[12:34:56] [Server thread/INFO]: ", "[12:34:56 INFO]: ",
+# Forge "[12Mar2024 12:34:56.789] [Server thread/INFO] [minecraft/DedicatedServer]: "
+_PREFIX_RE = re.compile(r"^(?:\[[^\]]*\]\s*)+:\s*")
+# Java jména (3-16 znaků), Bedrock přes Floodgate mívá prefix "." nebo "*"
+_NAME = r"(?P<name>[.*]?[A-Za-z0-9_]{1,16})"
+
+JOIN_PATTERNS = (
+    re.compile(rf"^{_NAME} joined the game$"),
+    re.compile(rf"^{_NAME}\[/[^\]]+\] logged in with entity id"),
+)
+LEAVE_PATTERNS = (
+    re.compile(rf"^{_NAME} left the game$"),
+    re.compile(rf"^{_NAME} lost connection: (?P<reason>.*)$"),
+    re.compile(rf"^Kicked {_NAME}(?: from the game)?: (?P<reason>.*)$"),
+    re.compile(rf"^Disconnecting {_NAME} \([^)]*\): (?P<reason>.*)$"),
+)
+
+
+def parse_player_event(line):
+    """Vrátí ("join" | "leave", jméno) pro řádek konzole, nebo None."""
+    if "\x1b" in line:
+        line = _ANSI_RE.sub("", line)
+    match = _PREFIX_RE.match(line)
+    if not match:
+        return None
+    message = line[match.end():].rstrip()
+    # Chat "<Steve> Bob joined the game" začíná "<" a na vzory nepasuje
+    for pattern in JOIN_PATTERNS:
+        found = pattern.match(message)
+        if found:
+            return "join", found.group("name")
+    for pattern in LEAVE_PATTERNS:
+        found = pattern.match(message)
+        if found:
+            return "leave", found.group("name")
+    return None
+
+
+class PlayerTracker:
+    """
+    Seznam hráčů online a odehraný čas podle událostí z konzole.
+
+    Server, jehož konzoli čteme od startu, je "autoritativní" – jeho seznam hráčů
+    se bere přímo odsud a síťové sondy slouží jen k občasné kontrole. U serverů
+    převzatých po restartu webu (bez stdout) se seznam přebírá ze sond.
+    """
+
+    def __init__(self, storage_path):
+        self.storage_path = storage_path
+        self.lock = threading.Lock()
+        self._online = {}                 # {server_id: {jméno: čas připojení}}
+        self._authoritative = set()
+        self._last_reconciled = {}        # {server_id: time.time()}
+        self._playtime = {}               # {server_id: {jméno: {seconds, sessions, last_seen}}}
+
+    # --- události ----------------------------------------------------------
+
+    def server_started(self, server_id):
+        """Server spuštěný webem – od teď známe každý join/leave."""
+        with self.lock:
+            self._close_all(server_id, time.time())
+            self._authoritative.add(server_id)
+            self._last_reconciled[server_id] = time.time()
+
+    def server_stopped(self, server_id):
+        with self.lock:
+            self._close_all(server_id, time.time())
+            self._authoritative.discard(server_id)
+            self._last_reconciled.pop(server_id, None)
+
+    def feed(self, server_id, line):
+        """Zpracuje řádek konzole; vrací rozpoznanou událost nebo None."""
+        if "joined" not in line and "logged in" not in line and "lost connection" not in line \
+                and "left the game" not in line and "Kicked" not in line and "Disconnecting" not in line:
+            return None
+        event = parse_player_event(line)
+        if event is None:
+            return None
+        kind, name = event
+        now = time.time()
+        with self.lock:
+            online = self._online.setdefault(server_id, {})
+            if kind == "join":
+                online.setdefault(name, now)
+            elif name in online:
+                self._close_session(server_id, name, online.pop(name), now)
+        return event
+
+    def reconcile(self, server_id, names, complete=True):
+        """
+        Srovná seznam s výsledkem síťové sondy.
+
+        `complete` = sonda vrátila úplný seznam jmen (query / diagnostika), status ping
+        vrací jen vzorek – takový seznam jen doplňuje, nikoho neodebírá.
+        """
+        now = time.time()
+        names = set(names or [])
+        with self.lock:
+            self._last_reconciled[server_id] = now
+            online = self._online.setdefault(server_id, {})
+            missing = names - set(online)
+            extra = set(online) - names if complete else set()
+            if (missing or extra) and server_id in self._authoritative:
+                print(f"[INFO] Server {server_id}: seznam hráčů opraven podle sondy (+{sorted(missing)} -{sorted(extra)})")
+            for name in missing:
+                online[name] = now
+            for name in extra:
+                self._close_session(server_id, name, online.pop(name), now)
+
+    # --- čtení -------------------------------------------------------------
+
+    def is_authoritative(self, server_id):
+        with self.lock:
+            return server_id in self._authoritative
+
+    def needs_reconcile(self, server_id, interval):
+        with self.lock:
+            if server_id not in self._authoritative:
+                return True
+            return time.time() - self._last_reconciled.get(server_id, 0) >= interval
+
+    def online(self, server_id):
+        """Vrátí {jméno: čas připojení} hráčů online."""
+        with self.lock:
+            return dict(self._online.get(server_id, {}))
+
+    def playtime(self, server_id):
+        """Odehraný čas všech známých hráčů včetně právě běžící session."""
+        now = time.time()
+        with self.lock:
+            totals = {name: dict(stats) for name, stats in self._load_playtime(server_id).items()}
+            online = dict(self._online.get(server_id, {}))
+        result = []
+        for name in set(totals) | set(online):
+            stats = totals.get(name, {"seconds": 0, "sessions": 0, "last_seen": None})
+            joined_at = online.get(name)
+            current = now - joined_at if joined_at else 0
+            result.append({
+                "name": name,
+                "online": joined_at is not None,
+                "session_seconds": int(current),
+                "total_seconds": int(stats["seconds"] + current),
+                "sessions": stats["sessions"] + (1 if joined_at else 0),
+                "last_seen": now if joined_at else stats["last_seen"],
+            })
+        result.sort(key=lambda item: item["total_seconds"], reverse=True)
+        return result
+
+    # --- interní -----------------------------------------------------------
+
+    def _close_all(self, server_id, now):
+        online = self._online.pop(server_id, {})
+        for name, joined_at in online.items():
+            self._close_session(server_id, name, joined_at, now, save=False)
+        if online:
+            self._save_playtime(server_id)
+
+    def _close_session(self, server_id, name, joined_at, now, save=True):
+        stats = self._load_playtime(server_id).setdefault(name, {"seconds": 0, "sessions": 0, "last_seen": None})
+        stats["seconds"] += max(now - joined_at, 0)
+        stats["sessions"] += 1
+        stats["last_seen"] = now
+        if save:
+            self._save_playtime(server_id)
+
+    def _file_path(self, server_id):
+        return os.path.join(self.storage_path, f"server_{server_id}.json")
+
+    def _load_playtime(self, server_id):
+        playtime = self._playtime.get(server_id)
+        if playtime is not None:
+            return playtime
+        playtime = {}
+        path = self._file_path(server_id)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as playtime_file:
+                    playtime = json.load(playtime_file)
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Nepodařilo se načíst odehraný čas serveru {server_id}: {e}")
+        self._playtime[server_id] = playtime
+        return playtime
+
+    def _save_playtime(self, server_id):
+        try:
+            os.makedirs(self.storage_path, exist_ok=True)
+            path = self._file_path(server_id)
+            temp_path = path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as playtime_file:
+                json.dump(self._playtime.get(server_id, {}), playtime_file, separators=(",", ":"))
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"[WARN] Nepodařilo se uložit odehraný čas serveru {server_id}: {e}")
@@ -0,0 +1,138 @@
+# player_poller.py
+import asyncio
+import threading
+import time
+from types import MappingProxyType
+
+import requests
+from mcstatus import JavaServer
+
+
+# Pořadí zkoušených metod, dokud se pro server nenajde fungující
+PROBE_METHODS = ("query", "status", "http")
+
+
+class PlayerPoller:
+    """
+    Background asyncio smyčka, která v intervalu zjišťuje hráče na všech běžících serverech.
+
+    Všechny servery se dotazují souběžně, výsledky se drží v cache s TTL a pro každý
+    server se pamatuje metoda (query / status / http), která naposledy fungovala –
+    mrtvý query port tak zdrží jen první pokus, ne každé obnovení panelu.
+    """
+
+    def __init__(self, target_provider, interval=5, ttl=20, timeout=1.5):
+        # target_provider() -> {server_id: {"query_port", "server_port", "diagnostic_port"}}
+        self.target_provider = target_provider
+        self.interval = max(float(interval), 1)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.host = "localhost"
+        self._cache = MappingProxyType({})
+        self._preferred = {}              # {server_id: metoda}
+        self._listeners = []
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="player-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def add_listener(self, callback):
+        """Zaregistruje callback(server_id, info) volaný pro každý čerstvě zjištěný údaj."""
+        self._listeners.append(callback)
+
+    def get(self, server_id):
+        """Vrátí {count, names, method, updated_at} nebo None, pokud údaj chybí či je starší než TTL."""
+        entry = self._cache.get(server_id)
+        if entry is None or time.time() - entry["updated_at"] > self.ttl:
+            return None
+        return entry
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"[WARN] Zjišťování hráčů selhalo: {e}")
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(self.interval - elapsed, 0.1))
+
+    async def poll_once(self):
+        targets = self.target_provider() or {}
+        results = await asyncio.gather(
+            *(self._probe_server(server_id, ports) for server_id, ports in targets.items())
+        )
+
+        cache = {}
+        now = time.time()
+        for server_id, result in zip(targets, results):
+            if result is not None:
+                cache[server_id] = MappingProxyType({**result, "updated_at": now})
+                for listener in self._listeners:
+                    try:
+                        listener(server_id, cache[server_id])
+                    except Exception as e:
+                        print(f"[WARN] Listener hráčů selhal pro server {server_id}: {e}")
+            elif server_id in self._cache:
+                # Dočasný výpadek – necháme doběhnout TTL posledního údaje
+                cache[server_id] = self._cache[server_id]
+        self._preferred = {server_id: method for server_id, method in self._preferred.items() if server_id in targets}
+        self._cache = MappingProxyType(cache)
+
+    async def _probe_server(self, server_id, ports):
+        preferred = self._preferred.get(server_id)
+        methods = sorted(PROBE_METHODS, key=lambda method: method != preferred)
+        for method in methods:
+            try:
+                result = await asyncio.wait_for(self._probe(method, ports), self.timeout)
+            except Exception:
+                continue
+            if result is None:
+                continue
+            if preferred != method:
+                self._preferred[server_id] = method
+            result["method"] = method
+            return result
+        return None
+
+    async def _probe(self, method, ports):
+        """Jeden pokus danou metodou; None = metoda pro server není k dispozici."""
+        if method == "query":
+            if not ports.get("query_port"):
+                return None
+            query = await JavaServer(self.host, ports["query_port"], timeout=self.timeout).async_query(tries=1)
+            return {"count": query.players.online, "names": list(query.players.names or [])}
+
+        if method == "status":
+            if not ports.get("server_port"):
+                return None
+            status = await JavaServer(self.host, ports["server_port"], timeout=self.timeout).async_status(tries=1)
+            return {
+                "count": status.players.online,
+                "names": [player.name for player in (status.players.sample or [])]
+            }
+
+        if not ports.get("diagnostic_port"):
+            return None
+        url = f"http://{self.host}:{ports['diagnostic_port']}/players"
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, lambda: requests.get(url, timeout=self.timeout))
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        return {"count": data.get("online_players", 0), "names": data.get("player_names", [])}
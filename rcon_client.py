@@ -0,0 +1,222 @@
+# rcon_client.py
+import itertools
+import socket
+import struct
+import threading
+
+
+# Typy paketů RCON protokolu
+PACKET_RESPONSE = 0
+PACKET_COMMAND = 2
+PACKET_AUTH_RESPONSE = 2
+PACKET_AUTH = 3
+
+# Vanilla server přijme příkaz nejvýš o 1446 bajtech
+MAX_COMMAND_BYTES = 1446
+_HEADER = struct.Struct("<iii")
+
+
+class RconError(Exception):
+    """Chyba spojení nebo příkazu přes RCON."""
+
+
+class RconAuthError(RconError):
+    """Server odmítl heslo."""
+
+
+def _packet(request_id, packet_type, body):
+    payload = body.encode("utf-8")
+    return _HEADER.pack(len(payload) + 10, request_id, packet_type) + payload + b"\x00\x00"
+
+
+class _Request:
+    __slots__ = ("end_id", "chunks", "done", "error")
+
+    def __init__(self, end_id):
+        self.end_id = end_id
+        self.chunks = []
+        self.done = threading.Event()
+        self.error = None
+
+
+class RconConnection:
+    """
+    Jedno trvalé RCON spojení se serverem.
+
+    Příkazy z více vláken se posílají souběžně (pipelining), odpovědi páruje čtecí
+    vlákno podle id paketu. Za každým příkazem jde prázdný paket s vlastním id –
+    server odpovídá v pořadí, takže odpověď na něj znamená, že předchozí
+    odpověď (i rozdělená do více paketů) je kompletní.
+    """
+
+    def __init__(self, host, port, password, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._pending = {}                # {id paketu: _Request}
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        try:
+            self._authenticate(password)
+        except EOFError as e:
+            self._sock.close()
+            raise RconError(str(e)) from e
+        except (OSError, RconError):
+            self._sock.close()
+            raise
+        self._sock.settimeout(None)
+        self._reader = threading.Thread(target=self._read_loop, name=f"rcon-{port}", daemon=True)
+        self._reader.start()
+
+    @property
+    def alive(self):
+        return not self._closed
+
+    def command(self, command, timeout=None):
+        """Provede příkaz a vrátí jeho textovou odpověď."""
+        if len(command.encode("utf-8")) > MAX_COMMAND_BYTES:
+            raise RconError(f"Příkaz je delší než {MAX_COMMAND_BYTES} bajtů")
+        with self._send_lock:
+            if self._closed:
+                raise RconError("Spojení je uzavřené")
+            request_id = self._next_id()
+            request = _Request(self._next_id())
+            self._pending[request_id] = request
+            self._pending[request.end_id] = request
+            try:
+                self._sock.sendall(_packet(request_id, PACKET_COMMAND, command) +
+                                   _packet(request.end_id, PACKET_RESPONSE, ""))
+            except OSError as e:
+                self._fail(f"Odeslání příkazu selhalo: {e}")
+
+        if not request.done.wait(self.timeout if timeout is None else timeout):
+            self._pending.pop(request_id, None)
+            self._pending.pop(request.end_id, None)
+            raise RconError(f"Server neodpověděl na '{command}'")
+        if request.error:
+            raise RconError(request.error)
+        return "".join(request.chunks)
+
+    def close(self):
+        self._fail("Spojení bylo uzavřeno")
+
+    # --- interní -----------------------------------------------------------
+
+    def _next_id(self):
+        return next(self._ids) & 0x7FFFFFFF
+
+    def _authenticate(self, password):
+        auth_id = self._next_id()
+        self._sock.sendall(_packet(auth_id, PACKET_AUTH, password))
+        while True:
+            response_id, packet_type, _ = self._read_packet()
+            if packet_type != PACKET_AUTH_RESPONSE:
+                continue
+            if response_id == -1:
+                raise RconAuthError("Server odmítl RCON heslo")
+            if response_id == auth_id:
+                return
+
+    def _read_exact(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._sock.recv(size - len(data))
+            if not chunk:
+                raise EOFError("Server uzavřel RCON spojení")
+            data += chunk
+        return bytes(data)
+
+    def _read_packet(self):
+        length = struct.unpack("<i", self._read_exact(4))[0]
+        if length < 10:
+            raise RconError(f"Neplatný RCON paket (délka {length})")
+        data = self._read_exact(length)
+        request_id, packet_type = struct.unpack("<ii", data[:8])
+        return request_id, packet_type, data[8:-2].decode("utf-8", errors="replace")
+
+    def _read_loop(self):
+        try:
+            while True:
+                response_id, _, body = self._read_packet()
+                request = self._pending.get(response_id)
+                if request is None:
+                    continue
+                if response_id == request.end_id:
+                    self._pending.pop(response_id, None)
+                    request.done.set()
+                else:
+                    request.chunks.append(body)
+        except (OSError, EOFError, RconError) as e:
+            self._fail(f"RCON spojení přerušeno: {e}")
+
+    def _fail(self, message):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for request in pending:
+            if not request.done.is_set():
+                request.error = message
+                request.done.set()
+
+
+class RconPool:
+    """
+    Trvalá RCON spojení ke všem serverům (jedno na server).
+
+    Spojení se otevírá líně při prvním příkazu a znovu po výpadku nebo změně
+    portu/hesla; na server se připojuje jen jedno vlákno najednou.
+    """
+
+    def __init__(self, timeout=5.0, host="127.0.0.1"):
+        self.timeout = timeout
+        self.host = host
+        self._connections = {}            # {server_id: ((port, heslo), RconConnection)}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def command(self, server_id, port, password, command, timeout=None):
+        return self._connection(server_id, port, password).command(command, timeout)
+
+    def close(self, server_id):
+        with self._lock:
+            entry = self._connections.pop(server_id, None)
+        if entry is not None:
+            entry[1].close()
+
+    def close_all(self):
+        with self._lock:
+            entries = list(self._connections.values())
+            self._connections.clear()
+        for _, connection in entries:
+            connection.close()
+
+    def _connection(self, server_id, port, password):
+        key = (port, password)
+        with self._lock:
+            entry = self._connections.get(server_id)
+            if entry is not None and entry[0] == key and entry[1].alive:
+                return entry[1]
+            server_lock = self._locks.setdefault(server_id, threading.Lock())
+
+        with server_lock:
+            with self._lock:
+                entry = self._connections.get(server_id)
+            if entry is not None and entry[0] == key and entry[1].alive:
+                return entry[1]
+            if entry is not None:
+                entry[1].close()
+            try:
+                connection = RconConnection(self.host, port, password, self.timeout)
+            except OSError as e:
+                raise RconError(f"Nelze se připojit k RCON na portu {port}: {e}") from e
+            with self._lock:
+                self._connections[server_id] = (key, connection)
+            return connection
@@ -0,0 +1,25 @@
+# serve.py
+"""
+Produkční spuštění webu přes waitress.
+
+Na rozdíl od `from app import app` (CLI skripty, migrace) převezme tento proces běžící
+servery z PID registru a spustí vlákna na pozadí (metriky, index logů, hráči, jádra,
+uspávání) – viz init_server_runtime. Se supervisorem je vlastní supervisor a web jen volá RPC.
+
+Spuštění:  python serve.py
+"""
+from waitress import serve
+
+from app import app
+from app_config import WEB_HOST, WEB_PORT, WEB_THREADS
+from mc_server import init_server_runtime
+
+
+def main():
+    init_server_runtime(app)
+    print(f"[INFO] Web naslouchá na http://{WEB_HOST}:{WEB_PORT} ({WEB_THREADS} vláken)")
+    serve(app, host=WEB_HOST, port=WEB_PORT, threads=WEB_THREADS)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,29 @@
 import os
 import re
+import secrets
 import shutil
 import time
 
-from app_config import BASE_BUILD_PATH, BASE_SERVERS_PATH, PORT_RANGE_END, PORT_RANGE_START
+from app_config import BASE_BUILD_PATH, BASE_SERVERS_PATH, PORT_RANGE_END, PORT_RANGE_START, RCON_PORT_OFFSET
+from app_cds import ARCHIVE_NAME, META_NAME
+from cgroups import JVM_OVERHEAD_MB
+from jvm_profiles import PROFILE_AUTO, PROFILES, java_command
 from models import BuildVersion, Server, User, db
 
 
+# heap_mb = halda JVM (viz jvm_profiles.py),
+# cpu_limit_percent, memory_max_mb a io_weight vynucuje cgroup serveru (viz cgroups.py);
+# memory_max_mb = halda + JVM_OVERHEAD_MB (metaspace, code cache, zásobníky vláken, direct buffery) –
+# limit rovný haldě by JVM zabil OOM killer. Stejnou paměť serveru přiděluje i admission.py.
+# hibernate = server bez hráčů se uspí a probudí při připojení (viz hibernation.py)
 SERVICE_LEVELS = {
-    1: {"label": "Basic", "cores": 2, "ram": "4 GB RAM"},
-    2: {"label": "Advanced", "cores": 4, "ram": "6 GB RAM"},
-    3: {"label": "Premium", "cores": 6, "ram": "8 GB RAM"},
+    1: {"label": "Basic", "cores": 2, "ram": "4 GB RAM", "heap_mb": 4096, "console_buffer_kb": 64,
+        "cpu_limit_percent": 100, "memory_max_mb": 4096 + JVM_OVERHEAD_MB, "io_weight": 50, "hibernate": True},
+    2: {"label": "Advanced", "cores": 4, "ram": "6 GB RAM", "heap_mb": 6144, "console_buffer_kb": 128,
+        "cpu_limit_percent": 200, "memory_max_mb": 6144 + JVM_OVERHEAD_MB, "io_weight": 100, "hibernate": True},
+    # dedicated_cores = celá fyzická jádra (včetně SMT sourozenců) na jednom NUMA uzlu
+    3: {"label": "Premium", "cores": 6, "ram": "8 GB RAM", "heap_mb": 8192, "console_buffer_kb": 256,
+        "dedicated_cores": True, "cpu_limit_percent": 300, "memory_max_mb": 8192 + JVM_OVERHEAD_MB, "io_weight": 200},
 }
 
 ALLOWED_GAMEMODES = {"survival", "creative", "adventure", "spectator"}
@@ -32,6 +45,10 @@ def create_server_from_payload(data):
     if service_level not in SERVICE_LEVELS:
         return False, "Neplatná úroveň serveru.", None
 
+    jvm_profile = (data.get("jvm_profile") or PROFILE_AUTO).strip().lower()
+    if jvm_profile not in PROFILES:
+        return False, "Neplatný profil JVM.", None
+
     if Server.query.filter_by(name=server_name).first():
         return False, "Server s tímto názvem už existuje.", None
 
@@ -48,6 +65,7 @@ def create_server_from_payload(data):
         name=server_name,
         owner_id=owner.id,
         service_level=service_level,
+        jvm_profile=None if jvm_profile == PROFILE_AUTO else jvm_profile,
         server_port=25565,
         query_port=25565,
         diagnostic_server_port=None,
@@ -66,7 +84,7 @@ def create_server_from_payload(data):
         os.makedirs(paths["server_path"], exist_ok=True)
 
         _copy_build_files(build_version, paths["server_path"], server.id)
-        _create_start_bat(paths["server_path"], server.id, build_version.build_type.name, service_level)
+        write_start_scripts(paths["server_path"], server.id, build_version.build_type.name, service_level, server.jvm_profile)
         _write_server_properties(
             paths["server_path"],
             minecraft_port,
@@ -110,7 +128,7 @@ def _version_folder_name(build_version):
     return build_version.mc_version
 
 
-def _build_source_path(build_version):
+def build_source_path(build_version):
     if build_version.file_path and os.path.exists(build_version.file_path):
         return build_version.file_path
 
@@ -135,18 +153,18 @@ def _build_source_path(build_version):
     return jar_files[0] if jar_files else None
 
 
-def _copy_build_files(build_version, target_server_path, server_id):
-    source_path = _build_source_path(build_version)
+def _copy_build_files(build_version, target_server_path, server_id, jar_name=None):
+    source_path = build_source_path(build_version)
     if not source_path:
         raise FileNotFoundError("Soubor buildu nebyl nalezen. Nejdřív proveď synchronizaci buildů.")
 
-    target_jar = os.path.join(target_server_path, f"server_{server_id}.jar")
+    target_jar = os.path.join(target_server_path, jar_name or f"server_{server_id}.jar")
     build_name = build_version.build_type.name.upper()
 
     if build_name == "FORGE":
         source_dir = os.path.dirname(source_path)
         for item in os.listdir(source_dir):
-            if item == "installer.jar":
+            if item in ("installer.jar", ARCHIVE_NAME, META_NAME):
                 continue
             src = os.path.join(source_dir, item)
             dst = os.path.join(target_server_path, item)
@@ -167,25 +185,35 @@ def _copy_build_files(build_version, target_server_path, server_id):
         raise FileNotFoundError("Nepodařilo se připravit server jar.")
 
 
-def _create_start_bat(server_path, server_id, build_type_name, service_level):
+def write_start_scripts(server_path, server_id, build_type_name, service_level, jvm_profile=None):
+    """Zapíše start.bat a start.sh se stejnými parametry JVM, jaké používá launcher."""
     jar_filename = f"server_{server_id}.jar"
-    max_ram = {1: "4G", 2: "6G", 3: "8G"}.get(service_level, "4G")
-    min_ram = {1: "2G", 2: "3G", 3: "4G"}.get(service_level, "2G")
+    level = SERVICE_LEVELS.get(service_level, SERVICE_LEVELS[1])
+    args = " ".join(java_command("java", jar_filename, level, build_type_name, jvm_profile)[1:])
     title = f"Minecraft {build_type_name} Server {server_id}"
     bat_content = f"""@echo off
 title {title}
 echo Starting {title}...
 
 if defined MINECRAFT_JAVA_PATH (
-    "%MINECRAFT_JAVA_PATH%" -Xmx{max_ram} -Xms{min_ram} -jar "{jar_filename}" nogui
+    "%MINECRAFT_JAVA_PATH%" {args}
 ) else (
-    java -Xmx{max_ram} -Xms{min_ram} -jar "{jar_filename}" nogui
+    java {args}
 )
 
 pause
+"""
+    sh_content = f"""#!/bin/sh
+# {title}
+cd "$(dirname "$0")"
+exec "${{MINECRAFT_JAVA_PATH:-java}}" {args}
 """
     with open(os.path.join(server_path, "start.bat"), "w", encoding="utf-8") as bat_file:
         bat_file.write(bat_content)
+    sh_path = os.path.join(server_path, "start.sh")
+    with open(sh_path, "w", encoding="utf-8", newline="\n") as sh_file:
+        sh_file.write(sh_content)
+    os.chmod(sh_path, 0o755)
 
 
 def _build_server_properties(data):
@@ -226,6 +254,7 @@ def _write_server_properties(server_path, server_port, query_port, extra_propert
         "server-port": str(server_port),
         "query.port": str(query_port),
         "enable-query": "true",
+        **rcon_properties(server_port),
         **extra_properties,
     }
 
@@ -239,6 +268,16 @@ def _write_server_properties(server_path, server_port, query_port, extra_propert
         prop_file.write("\n".join(content) + "\n")
 
 
+def rcon_properties(server_port, password=None):
+    """Nastavení RCON pro server.properties – port odvozený od herního portu, náhodné heslo"""
+    return {
+        "enable-rcon": "true",
+        "rcon.port": str(server_port + RCON_PORT_OFFSET),
+        "rcon.password": password or secrets.token_urlsafe(24),
+        "broadcast-rcon-to-ops": "false",
+    }
+
+
 def _accept_eula(server_path):
     with open(os.path.join(server_path, "eula.txt"), "w", encoding="utf-8") as eula_file:
         eula_file.write("# By changing the setting below to TRUE you agree to the Minecraft EULA.\n")
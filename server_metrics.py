@@ -0,0 +1,122 @@
+# server_metrics.py
+import threading
+import time
+from types import MappingProxyType
+
+import psutil
+
+
+class MetricsSampler:
+    """
+    Background vlákno, které v pevném intervalu vzorkuje všechny spravované JVM procesy.
+
+    Výsledek každého ticku je publikován jako neměnný snapshot {server_id: metriky},
+    takže status endpointy jen čtou ze slovníku a nikdy samy neblokují na psutil.
+    """
+
+    def __init__(self, target_provider, interval=2):
+        # target_provider() -> {server_id: psutil.Process}
+        self.target_provider = target_provider
+        self.interval = max(float(interval), 0.5)
+        self._snapshot = MappingProxyType({})
+        self._previous = {}               # {server_id: (pid, cpu_time, monotonic)}
+        self._listeners = []
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def ensure_started(self):
+        """Spustí vzorkovací vlákno, pokud ještě neběží."""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def add_listener(self, callback):
+        """Zaregistruje callback(snapshot, timestamp) volaný po každém ticku."""
+        self._listeners.append(callback)
+
+    def snapshot(self):
+        return self._snapshot
+
+    def get(self, server_id):
+        """Vrátí poslední vzorek pro server nebo None."""
+        return self._snapshot.get(server_id)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.sample_once()
+            except Exception as e:
+                print(f"[WARN] Vzorkování metrik selhalo: {e}")
+            elapsed = time.monotonic() - started
+            self._stop_event.wait(max(self.interval - elapsed, 0.1))
+
+    def sample_once(self):
+        targets = self.target_provider() or {}
+        now = time.monotonic()
+        timestamp = time.time()
+        samples = {}
+        previous = {}
+
+        for server_id, proc in targets.items():
+            result = self._sample_process(proc, self._previous.get(server_id), now)
+            if result is None:
+                continue
+            sample, cpu_time = result
+            samples[server_id] = MappingProxyType(sample)
+            previous[server_id] = (sample["pid"], cpu_time, now)
+
+        self._previous = previous
+        self._snapshot = MappingProxyType(samples)
+
+        for callback in list(self._listeners):
+            try:
+                callback(self._snapshot, timestamp)
+            except Exception as e:
+                print(f"[WARN] Listener metrik selhal: {e}")
+
+    @staticmethod
+    def _sample_process(proc, previous, now):
+        try:
+            with proc.oneshot():
+                if proc.status() == psutil.STATUS_ZOMBIE:
+                    return None
+                cpu_times = proc.cpu_times()
+                mem = proc.memory_info()
+                threads = proc.num_threads()
+                create_time = proc.create_time()
+                try:
+                    io = proc.io_counters()
+                except (psutil.AccessDenied, AttributeError, NotImplementedError):
+                    io = None
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+        cpu_time = cpu_times.user + cpu_times.system
+        cpu_percent = 0.0
+        # CPU počítáme z rozdílu mezi dvěma ticky – první vzorek nového procesu má 0 %
+        if previous and previous[0] == proc.pid:
+            wall_delta = now - previous[2]
+            if wall_delta > 0:
+                cpu_percent = max((cpu_time - previous[1]) / wall_delta * 100, 0.0)
+
+        sample = {
+            "pid": proc.pid,
+            "create_time": create_time,
+            "cpu_percent": round(cpu_percent, 1),
+            "ram_used_mb": round(mem.rss / (1024 ** 2)),
+            "threads": threads,
+            "io_read_mb": round(io.read_bytes / (1024 ** 2), 1) if io else None,
+            "io_write_mb": round(io.write_bytes / (1024 ** 2), 1) if io else None,
+            "sampled_at": time.time(),
+        }
+        return sample, cpu_time
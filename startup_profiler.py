@@ -0,0 +1,121 @@
+# startup_profiler.py
+import re
+import time
+
+
+# Fáze startu podle první hlášky; fáze trvá do začátku další fáze (poslední do "Done")
+PHASE_MARKERS = [
+    ("libraries", re.compile(
+        r"Loading libraries|Downloading mojang|Applying patches|with Fabric Loader|ModLauncher running"
+    )),
+    ("mods", re.compile(r"Loading \d+ mods|Found \d+ mods|Scanning mod candidates|modloading-worker")),
+    ("server_init", re.compile(r"Starting minecraft server version")),
+    ("plugins", re.compile(r"\]: \[[^\]]+\] Loading (?:server plugin )?\S+ v")),
+    ("world", re.compile(r"Preparing level|Preparing start region")),
+    ("plugins_enable", re.compile(r"\]: \[[^\]]+\] Enabling \S+ v")),
+]
+# Od spuštění procesu do prvního řádku konzole, pak start JVM do první známé hlášky
+PHASE_SPAWN = "spawn"
+PHASE_JVM = "jvm_boot"
+
+WORLD_PROGRESS_RE = re.compile(r"Preparing spawn area: (\d+)%")
+# Paper/Spigot: "[12:00:00 INFO]: [LuckPerms] Enabling LuckPerms v5.4" – řádky s prefixem pluginu
+PLUGIN_RE = re.compile(r"\]: \[([A-Za-z0-9_.\-]+)\] ")
+# Forge/NeoForge: "[modloading-worker-0/INFO] [create/]: ..."
+FORGE_MOD_RE = re.compile(r"\[modloading-worker-\d+/\w+\] \[([A-Za-z0-9_.\-]+)/")
+# Fabric/Quilt: "[main/INFO] (sodium) ..."
+FABRIC_MOD_RE = re.compile(r"\[[^\]/]+/\w+\] \(([A-Za-z0-9_.\-]+)\) ")
+# Loader samotný se do modů nepočítá
+IGNORED_COMPONENTS = {"FabricLoader", "FabricLoader/GameProvider", "Minecraft", "minecraft", "mixin", "forge", "neoforge"}
+
+MAX_COMPONENTS = 200
+
+
+class StartupProfiler:
+    """
+    Časová osa jednoho startu serveru z řádků konzole.
+
+    Čas řádku je okamžik přečtení (time.monotonic), protože log má rozlišení jen na sekundy.
+    Čas pluginu/modu = součet úseků od jeho řádku do dalšího řádku konzole, tj. jak dlouho
+    start "stál" na jeho inicializaci.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.monotonic() if started is None else started
+        self.phases = []                  # [(název, začátek v s)]
+        self.world_progress = []          # [(čas v s, procenta)]
+        self.components = {}              # {(druh, název): sekundy}
+        self._seen_phases = set()
+        self._current = None              # (druh, název, čas řádku) naposledy aktivní komponenty
+        self._last_at = None
+
+    def feed(self, line, now=None):
+        now = time.monotonic() if now is None else now
+        offset = now - self.started
+        first_line = self._last_at is None
+        if first_line:
+            self.phases.append((PHASE_SPAWN, 0.0))
+        self._close_segment(offset)
+        self._last_at = offset
+
+        for name, pattern in PHASE_MARKERS:
+            if name not in self._seen_phases and pattern.search(line):
+                self._seen_phases.add(name)
+                self.phases.append((name, round(offset, 3)))
+                break
+        else:
+            if first_line:
+                self.phases.append((PHASE_JVM, round(offset, 3)))
+
+        match = WORLD_PROGRESS_RE.search(line)
+        if match:
+            self.world_progress.append((round(offset, 3), int(match.group(1))))
+            return
+
+        component = self._component(line)
+        if component is not None:
+            self._current = (*component, offset)
+
+    def _component(self, line):
+        match = FORGE_MOD_RE.search(line) or FABRIC_MOD_RE.search(line)
+        if match:
+            kind, name = "mod", match.group(1)
+        else:
+            match = PLUGIN_RE.search(line)
+            if not match:
+                return None
+            kind, name = "plugin", match.group(1)
+        if name in IGNORED_COMPONENTS:
+            return None
+        if (kind, name) not in self.components and len(self.components) >= MAX_COMPONENTS:
+            return None
+        return kind, name
+
+    def _close_segment(self, offset):
+        if self._current is None:
+            return
+        kind, name, since = self._current
+        self.components[(kind, name)] = self.components.get((kind, name), 0.0) + (offset - since)
+        self._current = None
+
+    def finish(self, reported_seconds=None, now=None):
+        """Uzavře časovou osu po řádku "Done"; vrací slovník pro uložení."""
+        now = time.monotonic() if now is None else now
+        total = now - self.started
+        self._close_segment(total)
+        phases = []
+        for index, (name, start) in enumerate(self.phases):
+            end = self.phases[index + 1][1] if index + 1 < len(self.phases) else total
+            phases.append({"name": name, "start": round(start, 3), "seconds": round(end - start, 3)})
+        components = sorted(
+            ({"kind": kind, "name": name, "seconds": round(seconds, 3)}
+             for (kind, name), seconds in self.components.items()),
+            key=lambda item: -item["seconds"]
+        )
+        return {
+            "total_seconds": round(total, 3),
+            "reported_seconds": reported_seconds,
+            "phases": phases,
+            "world_progress": self.world_progress,
+            "components": components,
+        }
@@ -188,6 +188,15 @@ class APIService {
         return this.post(API_ENDPOINTS.SERVER_RESTART, { server_id: serverId });
     }
 
+    /**
+     * Získá stav lifecycle jobu (start / stop / restart)
+     * @param {string} jobId 
+     * @returns {Promise<Object>}
+     */
+    async getLifecycleJob(jobId) {
+        return this.get(`${API_ENDPOINTS.SERVER_JOBS}/${encodeURIComponent(jobId)}`);
+    }
+
     /**
      * Odešle příkaz na server
      * @param {number} serverId 
@@ -205,15 +214,42 @@ class APIService {
      * Získá logy serveru
      * @param {number} serverId 
      * @param {number} lines 
+     * @param {number|null} since - poslední známé sekvenční číslo řádku (jen nové řádky)
      * @returns {Promise<Object>}
      */
-    async getServerLogs(serverId, lines = 200) {
-        return this.get(API_ENDPOINTS.SERVER_LOGS, { 
+    async getServerLogs(serverId, lines = 200, since = null) {
+        const params = { 
             server_id: serverId,
             lines 
+        };
+        if (since !== null && since !== undefined) {
+            params.since = since;
+        }
+        return this.get(API_ENDPOINTS.SERVER_LOGS, params);
+    }
+
+    /**
+     * Získá historii metrik serveru (sloupcová data pro graf)
+     * @param {number} serverId 
+     * @param {string} range - 1h, 6h, 24h nebo 7d
+     * @returns {Promise<Object>}
+     */
+    async getServerMetrics(serverId, range = '1h') {
+        return this.get(API_ENDPOINTS.SERVER_METRICS, {
+            server_id: serverId,
+            range
         });
     }
 
+    /**
+     * Získá odehraný čas hráčů na serveru
+     * @param {number} serverId 
+     * @returns {Promise<Object>} { players: [...] }
+     */
+    async getPlayerPlaytime(serverId) {
+        return this.get(API_ENDPOINTS.SERVER_PLAYTIME, { server_id: serverId });
+    }
+
     /**
      * Získá staré logy
      * @param {number} serverId 
@@ -222,6 +258,51 @@ class APIService {
     async getOldLogs(serverId) {
         return this.get(API_ENDPOINTS.SERVER_OLD_LOGS, { server_id: serverId });
     }
+
+    /**
+     * Získá starší řádky konzole ze záznamu na disku
+     * @param {number} serverId 
+     * @param {number} before - seq nejstaršího zobrazeného řádku
+     * @param {number} limit 
+     * @returns {Promise<Object>} { html, first_seq, has_more }
+     */
+    async getServerLogHistory(serverId, before, limit = 500) {
+        return this.get(API_ENDPOINTS.SERVER_LOGS_HISTORY, {
+            server_id: serverId,
+            before,
+            limit
+        });
+    }
+
+    /**
+     * Fulltextové hledání v lozích serveru
+     * @param {number} serverId 
+     * @param {string} query 
+     * @param {Object} filters - {level, from, to, limit}
+     * @returns {Promise<Object>}
+     */
+    async searchServerLogs(serverId, query, filters = {}) {
+        return this.get(API_ENDPOINTS.SERVER_LOGS_SEARCH, {
+            server_id: serverId,
+            q: query,
+            ...filters
+        });
+    }
+
+    /**
+     * Získá stránku starého logu
+     * @param {number} serverId 
+     * @param {string} filename 
+     * @param {Object} page - {offset, limit} nebo {tail, limit}
+     * @returns {Promise<Object>}
+     */
+    async getOldLogPage(serverId, filename, page = {}) {
+        return this.get(API_ENDPOINTS.SERVER_OLD_LOG_VIEW, {
+            server_id: serverId,
+            filename,
+            ...page
+        });
+    }
 }
 
 // Export singleton instance
@@ -2,13 +2,19 @@
 export const API_ENDPOINTS = {
     SERVER_INFO: '/api/server/info',
     SERVER_STATUS: '/api/server/status',
+    SERVER_METRICS: '/api/server/metrics',
+    SERVER_PLAYTIME: '/api/server/players/playtime',
     SERVER_BUILD_TYPE: '/api/server/build-type',
     SERVER_START: '/api/server/start',
     SERVER_STOP: '/api/server/stop',
     SERVER_RESTART: '/api/server/restart',
+    SERVER_JOBS: '/api/server/jobs',
     SERVER_COMMAND: '/api/server/command',
     SERVER_LOGS: '/api/server/logs',
+    SERVER_LOGS_SEARCH: '/api/server/logs/search',
+    SERVER_LOGS_HISTORY: '/api/server/logs/history',
     SERVER_OLD_LOGS: '/api/server/old-logs',
+    SERVER_OLD_LOG_VIEW: '/api/server/old-logs/view',
     SERVER_ADMINS: '/api/server/admins',
     SERVER_ADMINS_ADD: '/api/server/admins/add',
     SERVER_ADMINS_REMOVE: '/api/server/admins/remove',
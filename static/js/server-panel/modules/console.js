@@ -3,12 +3,24 @@ import { api } from '../core/api.js';
 import { eventBus, EVENTS } from '../core/event-bus.js';
 import { getCurrentServerId } from '../core/utils.js';
 
+// Počet řádků jedné stránky starého logu
+const OLD_LOG_PAGE_LINES = 1000;
+
 class ConsoleManager {
     constructor() {
         this.serverId = getCurrentServerId();
         this.lastLogContent = "";
+        this.lastSeq = null;
+        this.firstSeq = null;
+        this.loadingHistory = false;
+        this.historyExhausted = false;
+        this.appendedLines = 0;
+        this.maxAppendedLines = 2000;
         this.lastServerStatus = "";
         this.logUpdateInterval = null;
+        this.eventSource = null;
+        this.statusListener = null;
+        this.streamErrors = 0;
     }
 
     /**
@@ -22,8 +34,10 @@ class ConsoleManager {
 
         this.setupEventListeners();
         this.setupTabs();
-        await this.loadLogs();
-        this.startAutoUpdate();
+        if (!this.startStream()) {
+            await this.loadLogs();
+            this.startAutoUpdate();
+        }
     }
 
     /**
@@ -44,6 +58,14 @@ class ConsoleManager {
             });
         }
 
+        // Odscrollování na začátek konzole načte starší řádky z historie
+        const logBox = document.getElementById('log-output');
+        if (logBox) {
+            logBox.addEventListener('scroll', () => {
+                if (logBox.scrollTop < 20) this.loadOlderLogs();
+            });
+        }
+
         // Tlačítko pro přidání nové záložky
         const addButton = document.getElementById('add-log-tab');
         if (addButton) {
@@ -103,32 +125,19 @@ class ConsoleManager {
         const logBox = document.getElementById('log-output');
         if (!logBox) return;
 
-        const isAtBottom = logBox.scrollHeight - logBox.scrollTop - logBox.clientHeight < 50;
-
         try {
             // Zjištění stavu serveru
             const statusData = await api.getServerStatus(this.serverId);
-            const currentStatus = statusData.status || "unknown";
+            this.handleStatusChange(statusData.status || "unknown");
 
-            // Pokud došlo k vypnutí serveru -> smaž log
-            if (currentStatus === "stopped" && this.lastServerStatus !== "stopped") {
-                logBox.innerHTML = "";
-                this.lastLogContent = "";
+            // Příliš mnoho přidaných řádků v DOM -> načti znovu jen posledních 200
+            if (this.appendedLines > this.maxAppendedLines) {
+                this.lastSeq = null;
             }
-            this.lastServerStatus = currentStatus;
 
-            // Načtení logů
-            const logData = await api.getServerLogs(this.serverId, 200);
-            const newLog = logData.html || logData.text || "";
-
-            // Aktualizuj jen pokud se obsah změnil
-            if (newLog !== this.lastLogContent) {
-                logBox.innerHTML = newLog;
-                this.lastLogContent = newLog;
-                if (isAtBottom) {
-                    logBox.scrollTop = logBox.scrollHeight;
-                }
-            }
+            // Načtení logů – po prvním načtení už jen nové řádky od lastSeq
+            const logData = await api.getServerLogs(this.serverId, 200, this.lastSeq);
+            this.applyLogData(logData);
 
         } catch (error) {
             console.error("Chyba při načítání logů:", error);
@@ -139,6 +148,139 @@ class ConsoleManager {
         }
     }
 
+    /**
+     * Pokud došlo k vypnutí serveru -> smaž log (nové řádky se dál přidávají od lastSeq)
+     * @param {string} currentStatus 
+     */
+    handleStatusChange(currentStatus) {
+        const logBox = document.getElementById('log-output');
+        if (logBox && currentStatus === "stopped" && this.lastServerStatus !== "stopped") {
+            logBox.innerHTML = "";
+            this.lastLogContent = "";
+            this.appendedLines = 0;
+        }
+        this.lastServerStatus = currentStatus;
+    }
+
+    /**
+     * Vykreslí data z /api/server/logs nebo ze SSE streamu
+     * @param {Object} logData - { html, last_seq, reset }
+     */
+    applyLogData(logData) {
+        const logBox = document.getElementById('log-output');
+        if (!logBox) return;
+
+        const isAtBottom = logBox.scrollHeight - logBox.scrollTop - logBox.clientHeight < 50;
+        const newLog = logData.html || logData.text || "";
+
+        if (logData.reset || this.lastSeq === null) {
+            // Celý obsah nahrazujeme jen pokud se změnil
+            if (newLog !== this.lastLogContent) {
+                logBox.innerHTML = newLog;
+                this.lastLogContent = newLog;
+            }
+            this.appendedLines = 0;
+            this.firstSeq = logData.first_seq ?? null;
+            this.historyExhausted = false;
+        } else if (newLog) {
+            logBox.insertAdjacentHTML('beforeend', (logBox.hasChildNodes() ? "\n" : "") + newLog);
+            this.lastLogContent = null;
+            this.appendedLines += newLog.split("\n").length;
+        }
+
+        if (typeof logData.last_seq === 'number') {
+            this.lastSeq = logData.last_seq;
+        }
+
+        if (newLog && isAtBottom) {
+            logBox.scrollTop = logBox.scrollHeight;
+        }
+
+        eventBus.emit(EVENTS.SERVER_LOGS_UPDATED, { lastSeq: this.lastSeq });
+    }
+
+    /**
+     * Načte starší řádky konzole (ze záznamu na disku) a vloží je na začátek
+     */
+    async loadOlderLogs() {
+        const logBox = document.getElementById('log-output');
+        if (!logBox || this.loadingHistory || this.historyExhausted || !this.firstSeq || this.firstSeq <= 1) return;
+
+        this.loadingHistory = true;
+        try {
+            const history = await api.getServerLogHistory(this.serverId, this.firstSeq, 500);
+            if (history.html) {
+                const previousHeight = logBox.scrollHeight;
+                logBox.insertAdjacentHTML('afterbegin', history.html + "\n");
+                // Zachovej pozici, na kterou se uživatel díval
+                logBox.scrollTop += logBox.scrollHeight - previousHeight;
+                this.lastLogContent = null;
+            }
+            this.firstSeq = history.first_seq;
+            this.historyExhausted = !history.has_more;
+        } catch (error) {
+            console.error("Chyba při načítání historie konzole:", error);
+        } finally {
+            this.loadingHistory = false;
+        }
+    }
+
+    /**
+     * Otevře SSE stream konzole. Prohlížeč se po výpadku sám připojí znovu
+     * a pošle Last-Event-ID, takže server dopošle jen chybějící řádky.
+     * @returns {boolean} true pokud se stream podařilo otevřít
+     */
+    startStream() {
+        if (!window.EventSource) return false;
+
+        const url = `/api/server/logs/stream?server_id=${this.serverId}&lines=200`;
+        this.eventSource = new EventSource(url);
+        this.streamErrors = 0;
+
+        // Server spojení po krátkém okně sám ukončí; úspěšné znovupřipojení není výpadek
+        this.eventSource.addEventListener('open', () => {
+            this.streamErrors = 0;
+        });
+
+        this.eventSource.addEventListener('lines', (event) => {
+            this.streamErrors = 0;
+            try {
+                this.applyLogData(JSON.parse(event.data));
+            } catch (error) {
+                console.error("Chyba při zpracování streamu konzole:", error);
+            }
+        });
+
+        this.eventSource.addEventListener('error', () => {
+            this.streamErrors += 1;
+            // Opakované selhání (např. proxy bez podpory streamu) -> zpět na polling
+            if (this.streamErrors >= 3) {
+                console.warn("SSE stream konzole selhal, přecházím na pravidelné načítání");
+                this.stopStream();
+                this.startAutoUpdate();
+            }
+        });
+
+        // Stav serveru hlídá StatusManager – reagujeme jen na jeho změny
+        this.statusListener = ({ newStatus }) => this.handleStatusChange(newStatus);
+        eventBus.on(EVENTS.SERVER_STATUS_CHANGED, this.statusListener);
+        return true;
+    }
+
+    /**
+     * Zavře SSE stream
+     */
+    stopStream() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+        if (this.statusListener) {
+            eventBus.off(EVENTS.SERVER_STATUS_CHANGED, this.statusListener);
+            this.statusListener = null;
+        }
+    }
+
     /**
      * Odešle příkaz na server
      */
@@ -149,11 +291,19 @@ class ConsoleManager {
         if (!command || !this.serverId) return;
 
         try {
-            await api.sendCommand(this.serverId, command);
+            const result = await api.sendCommand(this.serverId, command);
             input.value = '';
+
+            // Převzatý server bez stdin odpovídá přes RCON – odpověď v konzoli nebude, vypíšeme ji sami
+            if (result?.via === 'rcon') {
+                this.appendCommandResponse(command, result.success ? result.response : result.error);
+                return;
+            }
             
-            // Počkej a načti nové logy
-            setTimeout(() => this.loadLogs(), 1000);
+            // Při streamu přijde odpověď sama, jinak počkej a načti nové logy
+            if (!this.eventSource) {
+                setTimeout(() => this.loadLogs(), 1000);
+            }
             
         } catch (error) {
             console.error("Chyba při odesílání příkazu:", error);
@@ -164,6 +314,21 @@ class ConsoleManager {
         }
     }
 
+    /**
+     * Vypíše do konzole příkaz a jeho odpověď z RCON (nejsou součástí logu serveru)
+     */
+    appendCommandResponse(command, response) {
+        const logBox = document.getElementById('log-output');
+        if (!logBox) return;
+
+        const block = document.createElement('span');
+        block.className = 'console-rcon-response';
+        block.textContent = `${logBox.hasChildNodes() ? "\n" : ""}> ${command}${response ? "\n" + response : ""}`;
+        logBox.appendChild(block);
+        this.lastLogContent = null;
+        logBox.scrollTop = logBox.scrollHeight;
+    }
+
     /**
      * Zobrazí dialog s výběrem starých logů
      */
@@ -204,13 +369,12 @@ class ConsoleManager {
     }
 
     /**
-     * Otevře starý log v nové záložce
+     * Otevře starý log v nové záložce (načte jen konec, starší části po stránkách)
      * @param {string} filename 
      */
     async openOldLog(filename) {
         try {
-            const logData = await fetch(`/api/server/old-logs/view?server_id=${this.serverId}&filename=${encodeURIComponent(filename)}`)
-                .then(r => r.json());
+            const logData = await api.getOldLogPage(this.serverId, filename, { tail: OLD_LOG_PAGE_LINES });
 
             const tabId = `old-${Date.now()}`;
             const tabContainer = document.querySelector('.console-tabs');
@@ -221,7 +385,11 @@ class ConsoleManager {
             const tab = document.createElement('div');
             tab.className = 'tab';
             tab.dataset.tab = tabId;
-            tab.innerHTML = `${filename} <span class="tab-close">✖</span>`;
+            tab.textContent = `${filename} `;
+            const closeButton = document.createElement('span');
+            closeButton.className = 'tab-close';
+            closeButton.textContent = '✖';
+            tab.appendChild(closeButton);
             
             const addButton = document.getElementById('add-log-tab');
             tabContainer.insertBefore(tab, addButton);
@@ -230,7 +398,33 @@ class ConsoleManager {
             const content = document.createElement('div');
             content.className = 'tab-content';
             content.id = `tab-${tabId}`;
-            content.innerHTML = `<pre class="console-output">${logData.content}</pre>`;
+
+            const olderButton = document.createElement('button');
+            olderButton.className = 'btn btn-secondary btn-sm';
+            olderButton.textContent = 'Načíst starší řádky';
+
+            const output = document.createElement('pre');
+            output.className = 'console-output';
+            output.textContent = logData.content;
+
+            let firstLine = logData.offset;
+            olderButton.hidden = !logData.has_more_before;
+            olderButton.addEventListener('click', async () => {
+                const limit = Math.min(OLD_LOG_PAGE_LINES, firstLine);
+                const page = await api.getOldLogPage(this.serverId, filename, {
+                    offset: firstLine - limit,
+                    limit
+                });
+                const previousHeight = output.scrollHeight;
+                output.prepend(document.createTextNode(page.content + '\n'));
+                // Zachovej pozici, na kterou se uživatel díval
+                output.scrollTop += output.scrollHeight - previousHeight;
+                firstLine = page.offset;
+                olderButton.hidden = !page.has_more_before;
+            });
+
+            content.appendChild(olderButton);
+            content.appendChild(output);
             
             const tabContentContainer = document.getElementById('console-tab-content');
             if (tabContentContainer) {
@@ -242,6 +436,7 @@ class ConsoleManager {
             document.querySelectorAll('.tab-content').forEach(c => c.classList.remove('active'));
             tab.classList.add('active');
             content.classList.add('active');
+            output.scrollTop = output.scrollHeight;
 
         } catch (error) {
             console.error("Chyba při otevírání starého logu:", error);
@@ -281,6 +476,7 @@ class ConsoleManager {
      * Vyčistí zdroje
      */
     cleanup() {
+        this.stopStream();
         this.stopAutoUpdate();
     }
 }
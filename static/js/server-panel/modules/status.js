@@ -96,6 +96,33 @@ class StatusManager {
         }, delay);
     }
 
+    /**
+     * Sleduje lifecycle job až do konce a pak odemkne tlačítka
+     * @param {Object} job 
+     * @param {string} doneMessage 
+     * @param {string} failMessage 
+     */
+    async followJob(job, doneMessage, failMessage) {
+        let current = job;
+        try {
+            while (current && (current.status === 'queued' || current.status === 'running')) {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                current = await api.getLifecycleJob(current.id);
+            }
+            if (current) {
+                const succeeded = current.status === 'succeeded';
+                eventBus.emit(EVENTS.NOTIFICATION_SHOW, {
+                    type: succeeded ? 'success' : 'error',
+                    message: succeeded ? doneMessage : (current.error || failMessage)
+                });
+            }
+        } catch (error) {
+            console.error('Chyba při sledování operace serveru:', error);
+        } finally {
+            this.unlockActionButtons(0);
+        }
+    }
+
     /**
      * Aktualizuje stav serveru
      */
@@ -228,7 +255,7 @@ class StatusManager {
                     message: 'Server se spouští...'
                 });
 
-                this.unlockActionButtons(3000);
+                this.followJob(result.job, 'Server je připraven.', 'Chyba při spouštění serveru!');
             } else {
                 throw new Error('Chyba při spouštění serveru');
             }
@@ -261,7 +288,7 @@ class StatusManager {
                     message: 'Server se vypíná...'
                 });
 
-                this.unlockActionButtons(5000);
+                this.followJob(result.job, 'Server je vypnutý.', 'Chyba při vypínání serveru!');
             } else {
                 throw new Error(result.error || 'Chyba při vypínání serveru');
             }
@@ -294,7 +321,7 @@ class StatusManager {
                     message: 'Server se restartuje...'
                 });
 
-                this.unlockActionButtons(8000);
+                this.followJob(result.job, 'Server je po restartu připraven.', 'Chyba při restartu serveru!');
             } else {
                 throw new Error(result.error || 'Chyba při restartu serveru');
             }
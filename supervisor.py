@@ -0,0 +1,184 @@
+# supervisor.py
+"""
+Samostatný supervisor Minecraft serverů.
+
+Vlastní JVM procesy, jejich konzole a přiřazení jader. Webová aplikace s nastaveným
+SUPERVISOR_ADDRESS volá funkce z mc_server přes RPC (viz @supervised), takže může
+běžet ve více procesech (waitress/gunicorn) a restartovat se bez ztráty stdin/stdout
+běžících serverů.
+
+Spuštění:  python supervisor.py
+"""
+import os
+import queue
+import sys
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+
+class SupervisorError(Exception):
+    """Volání v supervisoru skončilo výjimkou."""
+
+
+class SupervisorUnavailable(SupervisorError):
+    """Supervisor neběží nebo neodpověděl včas."""
+
+
+def check_authkey(authkey, secret_key):
+    """
+    Klíč pro RPC jako bytes; bez vlastního klíče supervisor ani klient nepoběží.
+
+    Supervisor rozbalí (unpickle) cokoliv, co pošle ověřený klient – klíč je jediná ochrana
+    proti spuštění cizího kódu, proto nesmí chybět ani být stejný jako SECRET_KEY webu.
+    """
+    if not authkey:
+        raise SupervisorError("Nastavte SUPERVISOR_AUTHKEY (dlouhé náhodné heslo) v .env")
+    if authkey == secret_key:
+        raise SupervisorError("SUPERVISOR_AUTHKEY musí být jiný než SECRET_KEY")
+    return authkey.encode("utf-8")
+
+
+def parse_address(address):
+    """"127.0.0.1:47100" -> ("127.0.0.1", 47100), cokoliv jiného je cesta k Unix socketu."""
+    host, separator, port = address.rpartition(":")
+    if separator and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+class SupervisorClient:
+    """
+    Klient RPC supervisoru s poolem spojení.
+
+    Jedno spojení obsluhuje vždy jen jedno volání; volné spojení se před dalším
+    použitím ověří (restart supervisoru ho uzavře), takže se nikdy neposílá do mrtvého socketu.
+    """
+
+    def __init__(self, address, authkey, timeout=60, pool_size=8):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+
+    def call(self, name, *args, **kwargs):
+        connection = self._acquire()
+        try:
+            connection.send((name, args, kwargs))
+            if not connection.poll(self.timeout):
+                raise SupervisorUnavailable(f"Supervisor neodpověděl na {name} do {self.timeout} s")
+            status, value = connection.recv()
+        except SupervisorUnavailable:
+            connection.close()
+            raise
+        except (EOFError, OSError) as e:
+            connection.close()
+            raise SupervisorUnavailable(f"Spojení se supervisorem přerušeno: {e}") from e
+        self._release(connection)
+        if status != "ok":
+            raise SupervisorError(f"{name}: {value}")
+        return value
+
+    def _acquire(self):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            # Nečinné spojení nemá co číst – pokud ano, druhá strana ho zavřela
+            try:
+                if not connection.poll():
+                    return connection
+            except (EOFError, OSError):
+                pass
+            connection.close()
+        try:
+            return Client(self.address, authkey=self.authkey)
+        except (OSError, AuthenticationError) as e:
+            raise SupervisorUnavailable(f"Supervisor na {self.address} není dostupný: {e}") from e
+
+    def _release(self, connection):
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+
+class SupervisorServer:
+    """RPC server: každé spojení má vlastní vlákno, každé volání běží v app contextu."""
+
+    def __init__(self, address, authkey, functions, app):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.functions = functions        # {jméno: funkce}
+        self.app = app
+
+    def serve_forever(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            # Socket po předchozím běhu
+            os.remove(self.address)
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(f"[INFO] Supervisor naslouchá na {self.address}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except (AuthenticationError, OSError, EOFError) as e:
+                    print(f"[WARN] Odmítnuto spojení se supervisorem: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection):
+        with connection:
+            while True:
+                try:
+                    name, args, kwargs = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    connection.send(self._dispatch(name, args, kwargs))
+                except (EOFError, OSError):
+                    return
+                except Exception as e:
+                    # Výsledek nejde serializovat
+                    connection.send(("error", str(e)))
+
+    def _dispatch(self, name, args, kwargs):
+        func = self.functions.get(name)
+        if func is None:
+            return "error", f"Neznámá funkce {name}"
+        try:
+            with self.app.app_context():
+                return "ok", func(*args, **kwargs)
+        except Exception as e:
+            print(f"[ERROR] Volání {name} v supervisoru selhalo: {e}")
+            return "error", str(e)
+
+
+def main():
+    from app_config import SECRET_KEY, SUPERVISOR_ADDRESS, SUPERVISOR_AUTHKEY
+
+    if not SUPERVISOR_ADDRESS:
+        print("[ERROR] Nastavte SUPERVISOR_ADDRESS (např. 127.0.0.1:47100) v .env")
+        return 1
+    try:
+        authkey = check_authkey(SUPERVISOR_AUTHKEY, SECRET_KEY)
+    except SupervisorError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    # Běhový stav musí patřit tomuto procesu ještě před importem aplikace
+    import mc_server
+    functions = mc_server.become_supervisor()
+    from app import app
+    mc_server.init_server_runtime(app)
+
+    server = SupervisorServer(SUPERVISOR_ADDRESS, authkey, functions, app)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("[INFO] Supervisor ukončen")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())